@@ -0,0 +1,138 @@
+"""
+Debug API routes for diagnosing a running worker.
+
+All routes require the X-Admin-Token header. Each worker process answers
+for itself, so behind a multi-worker server a request profiles whichever
+worker accepted it.
+"""
+import asyncio
+import logging
+from typing import Any, Dict
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, Response
+
+from app.config import settings
+from app.utils.loop_monitor import get_loop_monitor
+from app.utils.profiling import folded_report, sample_cpu, sample_memory, top_functions
+from app.utils.security import require_admin
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/debug", dependencies=[Depends(require_admin)])
+
+# One profile at a time per worker
+_profile_lock = asyncio.Lock()
+
+
+def _check_duration(seconds: float) -> None:
+    """Reject durations above settings.profile_max_seconds."""
+    if seconds > settings.profile_max_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must be at most {settings.profile_max_seconds}"
+        )
+
+
+def _check_idle() -> None:
+    """Reject a profile request while another one is running."""
+    if _profile_lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running in this worker"
+        )
+
+
+@router.get(
+    "/event-loop",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Event loop diagnostics",
+    description="Event loop lag and recent slow callbacks with the stacks that blocked the loop"
+)
+async def get_event_loop_diagnostics() -> Dict[str, Any]:
+    """
+    Get event loop diagnostics for this worker.
+    
+    Each slow callback records when it happened, how long the loop was
+    blocked and, when the watchdog caught it in the act, the loop thread's
+    stack at that moment.
+    """
+    monitor = get_loop_monitor()
+    return {
+        **monitor.get_stats(),
+        "slow_callback_threshold_ms": monitor.slow_threshold * 1000,
+        "events": monitor.get_events()
+    }
+
+
+@router.get(
+    "/profile/cpu",
+    status_code=status.HTTP_200_OK,
+    responses={200: {"content": {"text/plain": {}, "application/json": {}}}},
+    summary="Sampling CPU profile",
+    description="Sample every thread's stack for N seconds and download the profile"
+)
+async def profile_cpu(
+    seconds: float = Query(10.0, gt=0, description="Sampling duration"),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="Time between samples"),
+    format: str = Query("folded", pattern="^(folded|json)$", description="Report format"),
+    top: int = Query(30, ge=1, le=500, description="Functions listed in the json report")
+) -> Response:
+    """
+    Profile where this worker's CPU time goes.
+    
+    **folded** returns one `thread;outer;...;inner count` line per distinct
+    stack, ready for flame graph tools. **json** returns the functions
+    with the most samples, as self and total percentages.
+    """
+    _check_duration(seconds)
+    _check_idle()
+    async with _profile_lock:
+        logger.info(f"CPU profile started for {seconds}s")
+        stacks = await asyncio.to_thread(sample_cpu, seconds, interval_ms / 1000)
+    
+    if format == "json":
+        report = {
+            "seconds": seconds,
+            "samples": sum(stacks.values()),
+            "functions": top_functions(stacks, top)
+        }
+        return Response(
+            content=orjson.dumps(report),
+            media_type="application/json",
+            headers={"Content-Disposition": 'attachment; filename="cpu-profile.json"'}
+        )
+    return PlainTextResponse(
+        folded_report(stacks),
+        headers={"Content-Disposition": 'attachment; filename="cpu-profile.folded"'}
+    )
+
+
+@router.get(
+    "/profile/memory",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Allocation profile",
+    description="Trace allocations with tracemalloc for N seconds and return the top sites"
+)
+async def profile_memory(
+    seconds: float = Query(10.0, gt=0, description="Tracing duration"),
+    top: int = Query(25, ge=1, le=500, description="Allocation sites returned")
+) -> Response:
+    """
+    Report the allocation sites that grew the most during the window.
+    
+    Tracing slows allocation-heavy code noticeably, so keep the window short.
+    """
+    _check_duration(seconds)
+    _check_idle()
+    async with _profile_lock:
+        logger.info(f"Memory profile started for {seconds}s")
+        allocations = await sample_memory(seconds, top)
+    
+    return Response(
+        content=orjson.dumps({"seconds": seconds, "allocations": allocations}),
+        media_type="application/json",
+        headers={"Content-Disposition": 'attachment; filename="memory-profile.json"'}
+    )
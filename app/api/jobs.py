@@ -0,0 +1,98 @@
+"""
+API routes for asynchronous batch jobs.
+"""
+import logging
+
+from fastapi import APIRouter, HTTPException, Path, Query, status
+
+from app.models import (
+    ErrorResponse,
+    JobRequest,
+    JobResponse,
+    JobResultsResponse
+)
+from app.services.job_service import JobNotFoundError, get_job_manager
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/jobs")
+
+JobId = Path(..., pattern="^[0-9a-f]{32}$", description="Job identifier")
+
+
+async def _get_job_or_404(job_id: str) -> dict:
+    """Look up a job, raising 404 if it does not exist."""
+    try:
+        return await get_job_manager().get_job(job_id)
+    except JobNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found"
+        )
+
+
+@router.post(
+    "",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        202: {
+            "description": "Job accepted for background processing",
+            "model": JobResponse
+        },
+        422: {
+            "description": "Invalid input",
+            "model": ErrorResponse
+        }
+    },
+    summary="Submit a batch job",
+    description="Queues many texts for background sentiment analysis and returns a job id to poll."
+)
+async def create_job(request: JobRequest) -> JobResponse:
+    """
+    Submit texts for background analysis.
+    
+    Returns immediately with `202 Accepted`; poll `GET /jobs/{job_id}`
+    for progress and page through `GET /jobs/{job_id}/results`.
+    """
+    meta = await get_job_manager().create_job(request.texts)
+    return JobResponse(**meta)
+
+
+@router.get(
+    "/{job_id}",
+    response_model=JobResponse,
+    responses={404: {"description": "Job not found", "model": ErrorResponse}},
+    summary="Get job status",
+    description="Returns the status and progress of a batch job."
+)
+async def get_job(job_id: str = JobId) -> JobResponse:
+    """Get job status and progress."""
+    return JobResponse(**await _get_job_or_404(job_id))
+
+
+@router.get(
+    "/{job_id}/results",
+    response_model=JobResultsResponse,
+    responses={404: {"description": "Job not found", "model": ErrorResponse}},
+    summary="Get job results",
+    description=(
+        "Returns a page of results in input order. "
+        "Results are available as soon as they complete."
+    )
+)
+async def get_job_results(
+    job_id: str = JobId,
+    offset: int = Query(0, ge=0, description="Index of the first result"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of results")
+) -> JobResultsResponse:
+    """Page through job results."""
+    meta = await _get_job_or_404(job_id)
+    results = await get_job_manager().get_results(job_id, offset, limit)
+    return JobResultsResponse(
+        job_id=job_id,
+        status=meta["status"],
+        offset=offset,
+        limit=limit,
+        total=meta["total"],
+        results=results
+    )
@@ -1,20 +1,36 @@
 """
 API routes for sentiment analysis.
 """
+import asyncio
 import logging
-from typing import Dict
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import JSONResponse
 
 from app.models import (
+    CachePrimeRequest,
+    DocumentRequest,
+    DocumentSentimentResponse,
     SentimentRequest,
     SentimentResponse,
     HealthResponse,
     ErrorResponse
 )
+from app.services.admission import admit_request, get_admission_controller
+from app.services.cache_priming import (
+    PrimingAlreadyRunningError,
+    PrimingPlan,
+    get_cache_primer,
+    read_corpus,
+)
+from app.services.job_service import get_job_manager
 from app.services.sentiment_service import get_sentiment_service
 from app.config import settings
+from app.utils.security import require_admin
+from app.utils.serialization import FastJSONResponse
+from app.utils.timing import mark_since_start, phase, request_timer
+from app.utils.tracing import span
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -23,11 +39,23 @@ router = APIRouter()
 @router.post(
     "/analyze-sentiment",
     response_model=SentimentResponse,
+    response_class=FastJSONResponse,
+    dependencies=[Depends(admit_request)],
     status_code=status.HTTP_200_OK,
     responses={
         200: {
             "description": "Successful sentiment analysis",
-            "model": SentimentResponse
+            "model": SentimentResponse,
+            "headers": {
+                "X-Cache": {
+                    "description": "HIT, MISS, COALESCED, LOCAL, STALE or FALLBACK",
+                    "schema": {"type": "string"}
+                },
+                "Server-Timing": {
+                    "description": "Phase durations (cache, llm, parse, total) in milliseconds",
+                    "schema": {"type": "string"}
+                }
+            }
         },
         400: {
             "description": "Invalid input",
@@ -36,12 +64,16 @@ router = APIRouter()
         500: {
             "description": "Internal server error",
             "model": ErrorResponse
+        },
+        503: {
+            "description": "Low priority request shed while the upstream queue is long",
+            "model": ErrorResponse
         }
     },
     summary="Analyze text sentiment",
     description="Analyzes the sentiment of the provided text and returns positive, negative, or neutral classification with explanation."
 )
-async def analyze_sentiment(request: SentimentRequest) -> SentimentResponse:
+async def analyze_sentiment(request: SentimentRequest) -> FastJSONResponse:
     """
     Analyze the sentiment of the provided text.
     
@@ -69,24 +101,26 @@ async def analyze_sentiment(request: SentimentRequest) -> SentimentResponse:
     }
 ```
     """
+    # Receiving, parsing and validating the body happen before the handler runs
+    mark_since_start("validation")
     try:
         logger.info(f"Received sentiment analysis request: {request.text[:50]}...")
         
         # Get sentiment service
         service = get_sentiment_service()
         
-        # Analyze sentiment
-        result = await service.analyze_sentiment(request.text)
+        # Analyze sentiment; the body is already validated and serialized,
+        # so it is returned directly instead of through response_model
+        with request_timer() as timer, span("route.analyze_sentiment"):
+            body, cache_status = await service.analyze_sentiment_json(request.text)
         
-        # Convert to response model
-        response = SentimentResponse(
-            sentiment=result.sentiment,
-            confidence=result.confidence,
-            explanation=result.explanation
-        )
+        headers = {"X-Cache": cache_status.value}
+        if timer is not None:
+            headers["Server-Timing"] = timer.server_timing()
         
-        logger.info(f"Sentiment analysis successful: {response.sentiment}")
-        return response
+        logger.info("Sentiment analysis successful")
+        with phase("serialization"):
+            return FastJSONResponse(content=body, headers=headers)
         
     except ValueError as e:
         logger.warning(f"Validation error: {str(e)}")
@@ -102,6 +136,52 @@ async def analyze_sentiment(request: SentimentRequest) -> SentimentResponse:
         )
 
 
+@router.post(
+    "/analyze-document",
+    response_model=DocumentSentimentResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(admit_request)],
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {
+            "description": "Successful document analysis",
+            "model": DocumentSentimentResponse
+        },
+        500: {
+            "description": "Internal server error",
+            "model": ErrorResponse
+        }
+    },
+    summary="Analyze a long document",
+    description=(
+        "Splits a long document into chunks, analyzes them concurrently and combines "
+        "the results into one verdict."
+    )
+)
+async def analyze_document(request: DocumentRequest) -> DocumentSentimentResponse:
+    """
+    Analyze the sentiment of a long document.
+    
+    **Input:**
+    - text: The document to analyze (up to 200,000 characters)
+    - include_chunks: Whether to include per-chunk results
+    
+    **Output:**
+    - sentiment, confidence, explanation: the document verdict
+    - chunk_count: number of chunks analyzed
+    - chunks: per-chunk results with character offsets (optional)
+    """
+    try:
+        service = get_sentiment_service()
+        return await service.analyze_document(request.text, request.include_chunks)
+    except Exception as e:
+        logger.error(f"Error processing document analysis: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while analyzing the document"
+        )
+
+
 @router.get(
     "/health",
     response_model=HealthResponse,
@@ -122,6 +202,45 @@ async def health_check() -> HealthResponse:
     )
 
 
+@router.get(
+    "/health/live",
+    response_model=Dict[str, str],
+    status_code=status.HTTP_200_OK,
+    summary="Liveness probe",
+    description="Check that the worker process is running and its event loop responds"
+)
+async def liveness() -> Dict[str, str]:
+    """
+    Liveness probe.
+    
+    Only fails if the worker cannot answer at all; restart it in that case.
+    """
+    return {"status": "alive"}
+
+
+@router.get(
+    "/health/ready",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    responses={503: {"description": "Worker should not receive traffic"}},
+    summary="Readiness probe",
+    description="Check warm-up, upstream queue wait, upstream availability and event loop lag"
+)
+async def readiness():
+    """
+    Readiness probe.
+    
+    Returns 503 with the failing checks while the worker is warming up,
+    its upstream queue is too long, every upstream member is ejected, or
+    its event loop is lagging. Stop routing traffic to it until it passes.
+    """
+    ready, checks = get_admission_controller().readiness()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if ready else "not_ready", "checks": checks}
+    )
+
+
 @router.get(
     "/cache/stats",
     response_model=Dict[str, int],
@@ -139,6 +258,73 @@ async def get_cache_stats() -> Dict[str, int]:
     return service.get_cache_stats()
 
 
+@router.get(
+    "/metrics",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get service metrics",
+    description="Get cache, per-model route, upstream and job metrics"
+)
+async def get_metrics() -> Dict[str, Any]:
+    """
+    Get service metrics.
+    
+    Per-model routes report requests routed, calls, errors, latency
+    (EWMA, p50, p95) and prompt/completion token totals.
+    """
+    metrics = get_sentiment_service().get_metrics()
+    metrics["jobs"] = get_job_manager().get_stats()
+    metrics["admission"] = get_admission_controller().get_stats()
+    return metrics
+
+
+@router.get(
+    "/aggregates",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    responses={404: {"description": "Aggregation is disabled", "model": ErrorResponse}},
+    summary="Windowed sentiment aggregates",
+    description="Label counts, mean confidence and confidence quantiles per minute or hour"
+)
+async def get_aggregates(
+    window: str = Query("minute", pattern="^(minute|hour)$", description="Bucket width"),
+    tag: Optional[str] = Query(None, max_length=64, description="X-Client-Tag to filter on")
+) -> Dict[str, Any]:
+    """
+    Get sentiment aggregates for the last hour by minute or the last day by hour.
+    
+    Buckets are listed newest first and merge every worker's results, as
+    of each worker's last snapshot. Quantiles are accurate to 0.01.
+    """
+    aggregates = get_sentiment_service().aggregates
+    if aggregates is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Aggregation is disabled"
+        )
+    return await asyncio.to_thread(aggregates.query, window, tag)
+
+
+@router.post(
+    "/local-model/reload",
+    response_model=Dict[str, bool],
+    dependencies=[Depends(require_admin)],
+    status_code=status.HTTP_200_OK,
+    summary="Reload local model",
+    description="Load the local model file if it changed, without a restart"
+)
+async def reload_local_model() -> Dict[str, bool]:
+    """
+    Hot-swap the distilled local model. Requires the X-Admin-Token header.
+    
+    Workers also pick up a new model file on their own within
+    settings.local_model_check_interval seconds.
+    """
+    service = get_sentiment_service()
+    loaded = await asyncio.to_thread(service.reload_local_model)
+    return {"loaded": loaded}
+
+
 @router.post(
     "/cache/clear",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -157,4 +343,91 @@ async def clear_cache():
     return JSONResponse(
         status_code=status.HTTP_204_NO_CONTENT,
         content=None
-    )
\ No newline at end of file
+    )
+
+
+@router.post(
+    "/cache/prime",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_admin)],
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        400: {
+            "description": "No usable texts given or found in the traffic capture",
+            "model": ErrorResponse
+        },
+        409: {
+            "description": "Caching is disabled or priming is already running in any worker",
+            "model": ErrorResponse
+        }
+    },
+    summary="Prime the cache",
+    description=(
+        "Rank historical texts by frequency and pre-score the top N in background batches"
+    )
+)
+async def prime_cache(request: CachePrimeRequest) -> Dict[str, Any]:
+    """
+    Start priming the cache. Requires the X-Admin-Token header.
+    
+    Texts come from the request, or else from the traffic capture at
+    settings.capture_path when it holds raw texts. Returns the plan's
+    coverage and expected hit rate at once; poll `GET /cache/prime` for
+    progress. One worker primes at a time; starting a run while another
+    worker or the `app.cli.prime_cache` command is priming returns 409.
+    """
+    if not settings.enable_cache:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Caching is disabled")
+    primer = get_cache_primer()
+    if primer.running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Cache priming is already running"
+        )
+    
+    service = get_sentiment_service()
+    top_n = request.top_n or settings.priming_top_n
+    if request.texts is not None:
+        plan = PrimingPlan(request.texts, top_n, service._get_cache_key)
+    else:
+        try:
+            plan = await asyncio.to_thread(
+                lambda: PrimingPlan(
+                    read_corpus(settings.capture_path), top_n, service._get_cache_key
+                )
+            )
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No texts given and no traffic capture found"
+            )
+    if not plan.texts:
+        # A capture written without capture_raw_text holds only hashes
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No usable texts to prime"
+        )
+    
+    try:
+        primer.start(
+            plan,
+            request.batch_size or settings.priming_batch_size,
+            (request.batch_interval_ms if request.batch_interval_ms is not None
+             else settings.priming_batch_interval_ms) / 1000
+        )
+    except PrimingAlreadyRunningError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    logger.info(f"Cache priming started for {len(plan.texts)} texts")
+    return primer.progress
+
+
+@router.get(
+    "/cache/prime",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_admin)],
+    status_code=status.HTTP_200_OK,
+    summary="Cache priming progress",
+    description="Progress of the current or last priming run in any worker"
+)
+async def get_priming_progress() -> Dict[str, Any]:
+    """Get cache priming progress. Requires the X-Admin-Token header."""
+    return await asyncio.to_thread(get_cache_primer().get_progress)
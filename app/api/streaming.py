@@ -0,0 +1,216 @@
+"""
+Streaming API routes for large inputs.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, Depends, Query, Request, status
+from pydantic import ValidationError
+from starlette.requests import ClientDisconnect
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.config import settings
+from app.models import MAX_TEXT_LENGTH, SentimentRequest
+from app.services.admission import admit_request
+from app.services.sentiment_service import get_sentiment_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+_DONE = object()
+# Longest valid line: every character escaped as a \uXXXX surrogate pair, plus the JSON around it
+MAX_LINE_BYTES = MAX_TEXT_LENGTH * 12 + 1024
+
+
+class SentimentStreamResponse(Response):
+    """
+    Reads an NDJSON request body and streams results in completion order.
+    
+    At most settings.llm_max_concurrency lines are analyzed at once and the
+    outgoing queue is bounded by the same limit, so a slow consumer or a
+    saturated upstream stops the body from being read further and server
+    memory stays flat regardless of input size. A line longer than
+    MAX_LINE_BYTES is answered with an error record and the rest of it is
+    discarded unread, since the 200 status is already sent.
+    
+    Starlette's StreamingResponse listens for disconnects on the same
+    receive channel the body arrives on, so this response drives both.
+    """
+    
+    def __init__(self, request: Request, sse: bool):
+        """Initialize the stream for a request."""
+        super().__init__(
+            status_code=status.HTTP_200_OK,
+            media_type="text/event-stream" if sse else "application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        # The body is streamed, so drop the content-length of the empty initial body
+        self.raw_headers = [
+            (name, value) for name, value in self.raw_headers if name != b"content-length"
+        ]
+        self.request = request
+        self.sse = sse
+        self.limit = settings.llm_max_concurrency
+        self.body_consumed = False
+        self.disconnected = False
+    
+    def _encode(self, record: dict) -> bytes:
+        """Encode one result as an NDJSON line or SSE event."""
+        data = orjson.dumps(record)
+        if self.sse:
+            event = b"error" if "error" in record else b"result"
+            return b"event: " + event + b"\ndata: " + data + b"\n\n"
+        return data + b"\n"
+    
+    async def _read_body(self, results: asyncio.Queue) -> int:
+        """Parse body lines and analyze them with bounded concurrency."""
+        service = get_sentiment_service()
+        slots = asyncio.Semaphore(self.limit)
+        
+        async def analyze(index: int, text: str) -> None:
+            try:
+                result = await service.analyze_sentiment(text)
+                await results.put({"index": index, **result.model_dump(mode="json")})
+            finally:
+                slots.release()
+        
+        async def handle(index: int, line: bytes) -> None:
+            try:
+                text = SentimentRequest.model_validate_json(line).text
+            except ValidationError as e:
+                await results.put({"index": index, "error": e.errors()[0]["msg"]})
+                return
+            await slots.acquire()
+            group.create_task(analyze(index, text))
+        
+        index = 0
+        buffer = b""
+        # Inside an oversized line already answered with an error
+        discarding = False
+        async with asyncio.TaskGroup() as group:
+            async for chunk in self.request.stream():
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if discarding:
+                        discarding = False
+                    elif line.strip():
+                        await handle(index, line)
+                        index += 1
+                if len(buffer) > MAX_LINE_BYTES:
+                    if not discarding:
+                        error = f"Line exceeds {MAX_LINE_BYTES} bytes"
+                        await results.put({"index": index, "error": error})
+                        index += 1
+                        discarding = True
+                    buffer = b""
+            self.body_consumed = True
+            if buffer.strip() and not discarding:
+                await handle(index, buffer)
+                index += 1
+        return index
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the stream: read, analyze and send until all lines are done."""
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.limit)
+        count: Optional[int] = None
+        
+        async def produce() -> None:
+            nonlocal count
+            try:
+                count = await self._read_body(results)
+            except* ClientDisconnect:
+                self.disconnected = True
+            finally:
+                await results.put(_DONE)
+        
+        producer = asyncio.create_task(produce())
+        watcher: Optional[asyncio.Task] = None
+        try:
+            while True:
+                record = await results.get()
+                if record is _DONE:
+                    break
+                await send({
+                    "type": "http.response.body",
+                    "body": self._encode(record),
+                    "more_body": True,
+                })
+                # Once the body is consumed, watch for the client going away
+                if watcher is None and self.body_consumed:
+                    watcher = asyncio.create_task(self._cancel_on_disconnect(receive, producer))
+            await producer
+        except asyncio.CancelledError:
+            self.disconnected = True
+            producer.cancel()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+        
+        if self.disconnected:
+            logger.info("Client disconnected from sentiment stream")
+            return
+        
+        tail = b""
+        if self.sse:
+            tail = b"event: end\ndata: " + orjson.dumps({"count": count}) + b"\n\n"
+        await send({"type": "http.response.body", "body": tail, "more_body": False})
+    
+    @staticmethod
+    async def _cancel_on_disconnect(receive: Receive, task: asyncio.Task) -> None:
+        """Cancel the producer when the client disconnects."""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                task.cancel()
+                return
+
+
+@router.post(
+    "/analyze-sentiment/stream",
+    dependencies=[Depends(admit_request)],
+    status_code=status.HTTP_200_OK,
+    response_class=SentimentStreamResponse,
+    responses={
+        200: {
+            "description": "Results streamed in completion order",
+            "content": {"application/x-ndjson": {}, "text/event-stream": {}}
+        }
+    },
+    summary="Stream sentiment analysis",
+    description=(
+        "Accepts an NDJSON body of {\"text\": ...} objects and streams results "
+        "as they complete."
+    )
+)
+async def analyze_sentiment_stream(
+    request: Request,
+    format: Optional[str] = Query(
+        None,
+        pattern="^(ndjson|sse)$",
+        description="Output format; defaults to SSE when Accept is text/event-stream"
+    )
+) -> SentimentStreamResponse:
+    """
+    Analyze a stream of texts.
+    
+    **Input:** an `application/x-ndjson` body, one `{"text": "..."}` object per line.
+    
+    **Output:** one record per input line, in completion order, tagged with
+    the zero-based `index` of the line it answers. Invalid lines produce a
+    record with an `error` field instead of a sentiment.
+    """
+    if format is None:
+        sse = "text/event-stream" in request.headers.get("accept", "")
+    else:
+        sse = format == "sse"
+    return SentimentStreamResponse(request, sse=sse)
@@ -0,0 +1,89 @@
+"""
+WebSocket route for persistent, high-rate sentiment streams.
+"""
+import asyncio
+import logging
+from typing import Any
+
+import orjson
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from app.config import settings
+from app.models import clean_text
+from app.services.sentiment_service import get_sentiment_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def _reply(message_id: Any, body: bytes) -> bytes:
+    """Prefix a serialized result object with the message id."""
+    return b'{"id":' + orjson.dumps(message_id) + b"," + body[1:]
+
+
+def _error(message_id: Any, detail: str) -> bytes:
+    """Serialize an error reply."""
+    return orjson.dumps({"id": message_id, "error": detail})
+
+
+@router.websocket("/ws/analyze-sentiment")
+async def analyze_sentiment_ws(websocket: WebSocket) -> None:
+    """
+    Analyze a persistent stream of messages over one connection.
+    
+    Each client message is a JSON object `{"id": ..., "text": "..."}`; the
+    reply is a text frame carrying the same `id` with the sentiment fields,
+    or an `error`.
+    Replies are sent as soon as they complete, so they may arrive out of
+    order. Results use the same cache, request coalescing and fallback as
+    `/analyze-sentiment`.
+    
+    At most settings.ws_max_in_flight messages are processed per
+    connection; beyond that the server stops reading, which pushes back
+    on the client through the socket.
+    """
+    await websocket.accept()
+    service = get_sentiment_service()
+    slots = asyncio.Semaphore(settings.ws_max_in_flight)
+    outgoing: asyncio.Queue = asyncio.Queue(maxsize=settings.ws_max_in_flight)
+    
+    async def analyze(message_id: Any, text: str) -> None:
+        try:
+            body, _ = await service.analyze_sentiment_json(text)
+            await outgoing.put(_reply(message_id, body))
+        finally:
+            slots.release()
+    
+    async def send_replies() -> None:
+        while True:
+            # Text frames, so browsers receive a string they can JSON.parse
+            await websocket.send_text((await outgoing.get()).decode("utf-8"))
+    
+    async def receive_messages(group: asyncio.TaskGroup) -> None:
+        while True:
+            await slots.acquire()
+            raw = await websocket.receive()
+            if raw["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(raw.get("code", 1000))
+            data = raw.get("bytes") or raw.get("text") or ""
+            
+            message_id = None
+            try:
+                message = orjson.loads(data)
+                if not isinstance(message, dict):
+                    raise ValueError("Message must be a JSON object")
+                message_id = message.get("id")
+                text = clean_text(message.get("text"))
+            except ValueError as e:
+                slots.release()
+                await outgoing.put(_error(message_id, str(e)))
+                continue
+            
+            group.create_task(analyze(message_id, text))
+    
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(send_replies())
+            await receive_messages(group)
+    except* WebSocketDisconnect:
+        logger.info("WebSocket client disconnected")
@@ -0,0 +1,327 @@
+"""
+Offline bulk sentiment scoring for JSONL and CSV files.
+
+Streams the input, scores rows through SentimentAnalysisService with
+bounded concurrency and appends results to the output as they complete,
+so memory stays constant regardless of input size. A checkpoint written
+every few thousand rows lets a crashed job resume without re-scoring
+completed rows.
+
+Usage:
+    python -m app.cli.bulk_score reviews.jsonl scored.jsonl
+    python -m app.cli.bulk_score reviews.csv scored.jsonl --text-field body --id-field review_id
+"""
+import argparse
+import asyncio
+import csv
+import io
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+import orjson
+
+from app.models import clean_text
+from app.services.sentiment_service import get_sentiment_service
+from app.services.token_budget import set_usage_endpoint
+from app.utils.logger import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# (row index, record id, text or None, error or None)
+Row = Tuple[int, Any, Optional[str], Optional[str]]
+
+
+class _ByteCounter:
+    """Line iterator over a binary file that tracks bytes consumed."""
+    
+    def __init__(self, handle):
+        """Wrap an open binary file."""
+        self._handle = handle
+        self.position = handle.tell()
+    
+    def __iter__(self) -> Iterator[str]:
+        """Yield decoded lines."""
+        for line in self._handle:
+            self.position += len(line)
+            yield line.decode("utf-8")
+
+
+def _clean_text(value: Any) -> Tuple[Optional[str], Optional[str]]:
+    """Apply the same rules as SentimentRequest, returning (text, error)."""
+    try:
+        return clean_text(value), None
+    except ValueError as e:
+        return None, str(e)
+
+
+def read_jsonl(counter: _ByteCounter, text_field: str, id_field: Optional[str]) -> Iterator[Row]:
+    """Yield rows from a JSONL file; blank lines are skipped but keep their index."""
+    for index, line in enumerate(counter):
+        if not line.strip():
+            yield index, None, None, None
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield index, None, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield index, None, None, "record is not a JSON object"
+            continue
+        text, error = _clean_text(record.get(text_field))
+        yield index, record.get(id_field) if id_field else None, text, error
+
+
+def read_csv(counter: _ByteCounter, text_field: str, id_field: Optional[str]) -> Iterator[Row]:
+    """Yield rows from a CSV file with a header row."""
+    reader = csv.DictReader(counter)
+    if reader.fieldnames is None or text_field not in reader.fieldnames:
+        raise ValueError(f"CSV input has no column named {text_field!r}")
+    for index, record in enumerate(reader):
+        text, error = _clean_text(record.get(text_field))
+        yield index, record.get(id_field) if id_field else None, text, error
+
+
+class Checkpoint:
+    """
+    Tracks completed rows as a low watermark plus the set of rows completed
+    above it, together with the output size they correspond to.
+    """
+    
+    def __init__(self, path: str):
+        """Load an existing checkpoint or start a fresh one."""
+        self.path = path
+        self.watermark = 0
+        self.done: Set[int] = set()
+        self.output_bytes = 0
+        self.scored = 0
+        self.errors = 0
+        self.resumed = False
+        
+        if os.path.exists(path):
+            with open(path, "rb") as handle:
+                state = orjson.loads(handle.read())
+            self.watermark = state["watermark"]
+            self.done = set(state["done"])
+            self.output_bytes = state["output_bytes"]
+            self.scored = state.get("scored", 0)
+            self.errors = state.get("errors", 0)
+            self.resumed = True
+    
+    def is_done(self, index: int) -> bool:
+        """Whether a row was completed in a previous run."""
+        return index < self.watermark or index in self.done
+    
+    def complete(self, index: int) -> None:
+        """Mark a row complete and advance the watermark."""
+        self.done.add(index)
+        while self.watermark in self.done:
+            self.done.remove(self.watermark)
+            self.watermark += 1
+    
+    def save(self, output_bytes: int) -> None:
+        """Atomically persist the checkpoint."""
+        self.output_bytes = output_bytes
+        state = {
+            "watermark": self.watermark,
+            "done": sorted(self.done),
+            "output_bytes": output_bytes,
+            "scored": self.scored,
+            "errors": self.errors,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(orjson.dumps(state))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self.path)
+    
+    def remove(self) -> None:
+        """Delete the checkpoint after a successful run."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Progress:
+    """Prints throughput and ETA to stderr at a fixed interval."""
+    
+    def __init__(self, total_bytes: int, interval: float):
+        """Initialize with the input size used for the ETA."""
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.started = time.monotonic()
+        self.last_report = self.started
+        self.start_position: Optional[int] = None
+        self.rows = 0
+    
+    def update(self, position: int, force: bool = False) -> None:
+        """Record a completed row and report if the interval has elapsed."""
+        self.rows += 1
+        if self.start_position is None:
+            self.start_position = position
+        now = time.monotonic()
+        if not force and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        
+        elapsed = max(now - self.started, 1e-9)
+        rate = self.rows / elapsed
+        byte_rate = (position - self.start_position) / elapsed
+        percent = 100.0 * position / self.total_bytes if self.total_bytes else 100.0
+        if byte_rate > 0:
+            eta = f"{(self.total_bytes - position) / byte_rate:,.0f}s"
+        else:
+            eta = "unknown"
+        print(
+            f"{self.rows:,} rows | {rate:,.1f} rows/s | {percent:5.1f}% | ETA {eta}",
+            file=sys.stderr,
+            flush=True
+        )
+
+
+async def run_bulk(args: argparse.Namespace) -> Dict[str, Any]:
+    """Score every row of the input file and return a summary."""
+    service = get_sentiment_service()
+    set_usage_endpoint("bulk_score", wait_for_budget=True)
+    checkpoint = Checkpoint(args.checkpoint or f"{args.output}.checkpoint")
+    input_format = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    reader = read_csv if input_format == "csv" else read_jsonl
+    
+    if checkpoint.resumed and not os.path.exists(args.output):
+        logger.warning("Checkpoint found without its output file, starting over")
+        checkpoint.remove()
+        checkpoint = Checkpoint(checkpoint.path)
+    
+    # Drop output written after the last checkpoint; those rows are re-scored
+    if checkpoint.resumed:
+        output = open(args.output, "r+b")
+        output.truncate(checkpoint.output_bytes)
+        output.seek(0, io.SEEK_END)
+        logger.warning(
+            f"Resuming from checkpoint at row {checkpoint.watermark:,} "
+            f"({checkpoint.scored:,} rows already scored)"
+        )
+    else:
+        output = open(args.output, "wb")
+    
+    handle = open(args.input, "rb")
+    counter = _ByteCounter(handle)
+    progress = Progress(os.fstat(handle.fileno()).st_size, args.progress_interval)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    since_checkpoint = 0
+    
+    def write(record: Dict[str, Any], index: int) -> None:
+        nonlocal since_checkpoint
+        output.write(orjson.dumps(record) + b"\n")
+        checkpoint.complete(index)
+        progress.update(counter.position)
+        since_checkpoint += 1
+        if since_checkpoint >= args.checkpoint_every:
+            output.flush()
+            checkpoint.save(output.tell())
+            since_checkpoint = 0
+    
+    async def produce() -> None:
+        for index, record_id, text, error in reader(counter, args.text_field, args.id_field):
+            if checkpoint.is_done(index):
+                continue
+            if text is None and error is None:
+                # Blank line: nothing to score, but keep the watermark moving
+                checkpoint.complete(index)
+                continue
+            await queue.put((index, record_id, text, error))
+        for _ in range(args.concurrency):
+            await queue.put(None)
+    
+    async def consume() -> None:
+        while True:
+            row = await queue.get()
+            if row is None:
+                return
+            index, record_id, text, error = row
+            record: Dict[str, Any] = {"index": index}
+            if record_id is not None:
+                record["id"] = record_id
+            if args.include_text and text is not None:
+                record["text"] = text
+            
+            if error is not None:
+                record["error"] = error
+                checkpoint.errors += 1
+            else:
+                result = await service.analyze_sentiment(text, record=False)
+                record.update(result.model_dump(mode="json"))
+                checkpoint.scored += 1
+            write(record, index)
+    
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(produce())
+            for _ in range(args.concurrency):
+                group.create_task(consume())
+    finally:
+        output.flush()
+        checkpoint.save(output.tell())
+        output.close()
+        handle.close()
+    
+    progress.update(counter.position, force=True)
+    checkpoint.remove()
+    elapsed = time.monotonic() - progress.started
+    return {
+        "rows_scored": checkpoint.scored,
+        "rows_failed": checkpoint.errors,
+        "elapsed_seconds": round(elapsed, 2),
+        "rows_per_second": round(progress.rows / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the command line parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli.bulk_score",
+        description="Score a JSONL or CSV file of texts offline."
+    )
+    parser.add_argument("input", help="Input .jsonl or .csv file")
+    parser.add_argument("output", help="Output .jsonl file")
+    parser.add_argument(
+        "--format", choices=["jsonl", "csv"], help="Input format (default: by extension)"
+    )
+    parser.add_argument("--text-field", default="text", help="Field or column holding the text")
+    parser.add_argument(
+        "--id-field", default=None, help="Field or column copied to the output as id"
+    )
+    parser.add_argument("--include-text", action="store_true", help="Copy the text into the output")
+    parser.add_argument("--concurrency", type=int, default=16, help="Rows scored concurrently")
+    parser.add_argument(
+        "--checkpoint", default=None, help="Checkpoint path (default: OUTPUT.checkpoint)"
+    )
+    parser.add_argument(
+        "--checkpoint-every", type=int, default=1000, help="Rows between checkpoints"
+    )
+    parser.add_argument(
+        "--progress-interval", type=float, default=5.0, help="Seconds between progress lines"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Keep per-request service logging")
+    return parser
+
+
+def main(argv=None) -> None:
+    """Run the bulk scoring command."""
+    args = build_parser().parse_args(argv)
+    if args.concurrency < 1 or args.checkpoint_every < 1:
+        raise SystemExit("--concurrency and --checkpoint-every must be at least 1")
+    
+    setup_logging()
+    if not args.verbose:
+        logging.getLogger("app").setLevel(logging.WARNING)
+    
+    summary = asyncio.run(run_bulk(args))
+    print(orjson.dumps(summary).decode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Local stand-in for an OpenAI-compatible chat completions endpoint.
+
+Answers POST .../chat/completions with a sentiment JSON derived from the
+keyword lexicon after a configurable, jittered delay, so load tests and
+replays exercise the real upstream client, pool, retries and caching
+without calling or paying for a provider. Point the service at it with
+an upstream whose base_url is http://HOST:PORT/v1.
+
+Usage:
+    python -m app.cli.llm_stub --port 8901 --latency-ms 400 --jitter-ms 150
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+
+import orjson
+
+from app.services.lexicon import keyword_sentiment
+from app.utils.logger import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Prefix of the user message in the service's prompt
+_TEXT_MARKER = "Analyze the sentiment of this text: "
+# Rough characters per token for the reported usage
+_CHARS_PER_TOKEN = 4
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the stand-in's latency and counters."""
+    
+    daemon_threads = True
+    
+    def __init__(self, address: Tuple[str, int], latency: float, jitter: float):
+        """
+        Bind the server.
+        
+        Args:
+            address: Host and port; port 0 picks a free one
+            latency: Mean seconds before each response
+            jitter: Standard deviation of the delay in seconds
+        """
+        super().__init__(address, _StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def base_url(self) -> str:
+        """OpenAI base URL of this server."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+    
+    def count_request(self) -> None:
+        """Count one completion request."""
+        with self._lock:
+            self.requests += 1
+    
+    def delay(self) -> float:
+        """Seconds to wait before answering."""
+        return max(0.0, random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+    
+    def complete(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a chat completion for a request body.
+        
+        Subclasses override this to change what the stand-in answers.
+        """
+        messages = request.get("messages") or [{}]
+        prompt = "".join(str(message.get("content", "")) for message in messages)
+        text = str(messages[-1].get("content", "")).split(_TEXT_MARKER, 1)[-1]
+        sentiment, confidence, _ = keyword_sentiment(text)
+        content = orjson.dumps({
+            "sentiment": sentiment.value,
+            "confidence": confidence,
+            "explanation": "Stand-in analysis"
+        }).decode("utf-8")
+        return {
+            "id": f"chatcmpl-stub-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": len(prompt) // _CHARS_PER_TOKEN,
+                "completion_tokens": len(content) // _CHARS_PER_TOKEN,
+                "total_tokens": (len(prompt) + len(content)) // _CHARS_PER_TOKEN
+            }
+        }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Chat completions request handler."""
+    
+    server: StubServer
+    
+    def do_POST(self):
+        """Answer a chat completion after the configured delay."""
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.count_request()
+        time.sleep(self.server.delay())
+        self.send_json(200, self.server.complete(orjson.loads(body)))
+    
+    def send_json(self, code: int, payload: Dict[str, Any]) -> None:
+        """Write a JSON response."""
+        data = orjson.dumps(payload)
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        """Route access logs through logging at debug level."""
+        logger.debug(format % args)
+
+
+def start_stub(
+    host: str = "127.0.0.1", port: int = 0, latency: float = 0.3, jitter: float = 0.0
+) -> StubServer:
+    """
+    Start a stand-in server in a background thread.
+    
+    Returns:
+        The running server; call shutdown() and server_close() to stop it
+    """
+    server = StubServer((host, port), latency, jitter)
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    return server
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the command line parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli.llm_stub",
+        description="Serve a local OpenAI-compatible stand-in for load tests."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8901, help="Port to listen on")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mean response delay")
+    parser.add_argument(
+        "--jitter-ms", type=float, default=100.0, help="Standard deviation of the delay"
+    )
+    return parser
+
+
+def main(argv=None) -> None:
+    """Run the stand-in until interrupted."""
+    args = build_parser().parse_args(argv)
+    setup_logging()
+    server = StubServer((args.host, args.port), args.latency_ms / 1000, args.jitter_ms / 1000)
+    logger.info(f"LLM stand-in listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
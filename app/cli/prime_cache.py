@@ -0,0 +1,102 @@
+"""
+Prime the sentiment cache from a corpus of historical texts.
+
+Ranks the corpus by frequency under the cache key normalization, prints
+the plan (coverage and expected hit rate), scores the top N texts in
+throttled batches and writes the cache snapshot that the server loads at
+startup. With a shared cache attached, primed results also land there.
+The command takes the same run lock as POST /cache/prime, so it refuses
+to start while a server worker is priming, and the other way round.
+
+Usage:
+    python -m app.cli.prime_cache data/capture.jsonl --top-n 5000
+    python -m app.cli.prime_cache past_texts.txt --dry-run
+"""
+import argparse
+import asyncio
+import logging
+from typing import Any, Dict
+
+import orjson
+
+from app.config import settings
+from app.services.cache_priming import (
+    CachePrimer,
+    PrimingAlreadyRunningError,
+    PrimingPlan,
+    read_corpus,
+)
+from app.services.sentiment_service import get_sentiment_service
+from app.utils.logger import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+async def run_priming(args: argparse.Namespace) -> Dict[str, Any]:
+    """Plan, prime and snapshot; returns the plan report with priming counts."""
+    service = get_sentiment_service()
+    corpus = read_corpus(args.corpus, args.text_field)
+    plan = PrimingPlan(corpus, args.top_n, service._get_cache_key)
+    report = plan.get_report()
+    print(orjson.dumps(report).decode("utf-8"), flush=True)
+    if args.dry_run:
+        return report
+    if not plan.texts:
+        raise SystemExit("No usable texts to prime")
+    
+    primer = CachePrimer(settings.priming_progress_path)
+    try:
+        progress = await primer.prime(plan, args.batch_size, args.interval_ms / 1000)
+    except PrimingAlreadyRunningError as e:
+        raise SystemExit(str(e))
+    saved = await asyncio.to_thread(service.save_cache, settings.cache_snapshot_path)
+    logger.info(f"Saved {saved} cache entries to {settings.cache_snapshot_path}")
+    return {**progress, "snapshot_entries": saved}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the command line parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli.prime_cache",
+        description="Pre-score the most frequent texts of a corpus into the cache."
+    )
+    parser.add_argument(
+        "corpus", help="Corpus: .jsonl records (e.g. a raw-text capture) or one text per line"
+    )
+    parser.add_argument("--text-field", default="text", help="JSONL field holding the text")
+    parser.add_argument(
+        "--top-n", type=int, default=settings.priming_top_n, help="Texts to prime"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.priming_batch_size, help="Texts per batch"
+    )
+    parser.add_argument(
+        "--interval-ms",
+        type=float,
+        default=settings.priming_batch_interval_ms,
+        help="Pause between batches"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Print the plan without priming")
+    parser.add_argument("--verbose", action="store_true", help="Keep per-request service logging")
+    return parser
+
+
+def main(argv=None) -> None:
+    """Run the cache priming command."""
+    args = build_parser().parse_args(argv)
+    if args.top_n < 1 or args.batch_size < 1:
+        raise SystemExit("--top-n and --batch-size must be at least 1")
+    if not settings.enable_cache:
+        raise SystemExit("Caching is disabled (ENABLE_CACHE=false)")
+    
+    setup_logging()
+    if not args.verbose:
+        logging.getLogger("app").setLevel(logging.WARNING)
+    
+    summary = asyncio.run(run_priming(args))
+    if not args.dry_run:
+        print(orjson.dumps(summary).decode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Replay captured traffic against the app and a local LLM stand-in.
+
+Reads a capture written by settings.capture_enabled (see
+app.services.traffic_capture) and sends each request to
+/analyze-sentiment at its recorded arrival offset, divided by --speed,
+through the ASGI app in this process. Upstream calls go to a stand-in
+started here (app.cli.llm_stub) unless --upstream-url names another
+OpenAI-compatible endpoint, so a replay measures caching, coalescing and
+queueing without provider cost or variance.
+
+Hash-only records are replayed as synthetic texts of the recorded length,
+identical for identical hashes, so duplicates hit the cache as they did
+in production. Each synthetic text starts with the full hash, so texts
+shorter than a hash are replayed longer than recorded rather than made
+to collide. Latency is measured from each request's scheduled arrival,
+so time spent queued behind --max-in-flight counts. Prints a JSON report
+with cache hit and coalescing rates and latency percentiles.
+
+Usage:
+    python -m app.cli.replay data/capture.jsonl
+    python -m app.cli.replay data/capture.jsonl --speed 10 --latency-ms 400
+    python -m app.cli.replay data/capture.jsonl --speed 0 --limit 5000
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import orjson
+
+from app.cli.llm_stub import StubServer, start_stub
+from app.config import UpstreamConfig, settings
+from app.main import app
+from app.services.sentiment_service import get_sentiment_service
+from app.services.traffic_capture import read_capture
+from app.utils.logger import setup_logging
+
+logger = logging.getLogger(__name__)
+
+_FILLER = " lorem ipsum dolor sit amet"
+_STUB_API_KEY = "sk-stand-in-replay-0000000000"
+
+# (offset in seconds, text)
+Arrival = Tuple[float, str]
+# (HTTP status, X-Cache value, latency in seconds)
+Outcome = Tuple[int, str, float]
+
+
+def synthesize_text(record: Dict[str, Any]) -> str:
+    """Text to send for a captured record: the text itself or a stand-in of its length."""
+    if "text" in record:
+        return record["text"]
+    length = int(record.get("length", 1))
+    text = record["hash"]
+    while len(text) < length:
+        text += _FILLER
+    return text[:max(length, len(record["hash"]))]
+
+
+def load_arrivals(path: str, limit: Optional[int] = None) -> List[Arrival]:
+    """Captured requests as offsets from the first arrival, in order."""
+    records = sorted(read_capture(path), key=lambda record: record["t"])
+    if limit is not None:
+        records = records[:limit]
+    if not records:
+        return []
+    start = records[0]["t"]
+    return [(record["t"] - start, synthesize_text(record)) for record in records]
+
+
+async def replay(
+    client: httpx.AsyncClient, arrivals: List[Arrival], speed: float, max_in_flight: int
+) -> List[Outcome]:
+    """
+    Send every arrival on schedule.
+    
+    Args:
+        client: Client bound to the app
+        arrivals: Offsets and texts
+        speed: Time compression; 1 replays in real time, 0 as fast as possible
+        max_in_flight: Requests outstanding at once
+    
+    Returns:
+        One outcome per request, in arrival order
+    """
+    slots = asyncio.Semaphore(max_in_flight)
+    started = time.monotonic()
+    
+    async def send(text: str, scheduled: float) -> Outcome:
+        async with slots:
+            response = await client.post("/analyze-sentiment", json={"text": text})
+        latency = time.monotonic() - scheduled
+        return response.status_code, response.headers.get("x-cache", ""), latency
+    
+    tasks = []
+    for offset, text in arrivals:
+        scheduled = time.monotonic()
+        if speed:
+            scheduled = started + offset / speed
+            if scheduled > time.monotonic():
+                await asyncio.sleep(scheduled - time.monotonic())
+        tasks.append(asyncio.create_task(send(text, scheduled)))
+    return list(await asyncio.gather(*tasks))
+
+
+def summarize(outcomes: List[Outcome], distinct: int, elapsed: float) -> Dict[str, Any]:
+    """Report rates and latency percentiles for a replay."""
+    requests = len(outcomes)
+    statuses = Counter(cache for code, cache, _ in outcomes if code == 200)
+    latencies = np.array([latency for _, _, latency in outcomes]) * 1000
+    
+    def rate(*names: str) -> float:
+        return round(sum(statuses[name] for name in names) / requests, 4) if requests else 0.0
+    
+    return {
+        "requests": requests,
+        "errors": sum(1 for code, _, _ in outcomes if code != 200),
+        "distinct_texts": distinct,
+        "duplicate_rate": round(1 - distinct / requests, 4) if requests else 0.0,
+        "cache_hit_rate": rate("HIT"),
+        "coalesced_rate": rate("COALESCED"),
+        "local_rate": rate("LOCAL"),
+        "degraded_rate": rate("STALE", "FALLBACK"),
+        "latency_ms": {
+            name: round(float(np.percentile(latencies, q)), 2) if requests else 0.0
+            for name, q in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "elapsed_seconds": round(elapsed, 2),
+        "requests_per_second": round(requests / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+async def run_replay(args: argparse.Namespace) -> Dict[str, Any]:
+    """Replay a capture and return the report."""
+    arrivals = load_arrivals(args.capture, args.limit)
+    stub: Optional[StubServer] = None
+    if args.upstream_url is None:
+        stub = start_stub(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000)
+    # The service reads these when it is first built, on the first request
+    settings.upstreams = [UpstreamConfig(
+        name="replay",
+        base_url=args.upstream_url or stub.base_url,
+        api_key=_STUB_API_KEY if stub is not None else None,
+        max_concurrency=settings.llm_max_concurrency
+    )]
+    # Keep replayed traffic and stand-in labels out of production data,
+    # including the live workers' shared cache segment
+    settings.capture_enabled = False
+    settings.label_log_enabled = False
+    settings.aggregation_enabled = False
+    settings.results_store_enabled = False
+    settings.shared_cache_enabled = False
+    
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://replay", timeout=None
+        ) as client:
+            started = time.monotonic()
+            outcomes = await replay(client, arrivals, args.speed, args.max_in_flight)
+            elapsed = time.monotonic() - started
+    finally:
+        if stub is not None:
+            stub.shutdown()
+            stub.server_close()
+    
+    service = get_sentiment_service()
+    distinct = len({service._get_cache_key(text) for _, text in arrivals})
+    report = summarize(outcomes, distinct, elapsed)
+    report["speed"] = args.speed
+    if stub is not None:
+        report["upstream_calls"] = stub.requests
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the command line parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli.replay",
+        description="Replay captured traffic against the app and a local LLM stand-in."
+    )
+    parser.add_argument("capture", help="Capture .jsonl file")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="Time compression (1 = real time, 0 = no waiting)"
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N requests")
+    parser.add_argument(
+        "--max-in-flight", type=int, default=256, help="Requests outstanding at once"
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=300.0, help="Stand-in mean response delay"
+    )
+    parser.add_argument(
+        "--jitter-ms", type=float, default=100.0, help="Stand-in delay standard deviation"
+    )
+    parser.add_argument(
+        "--upstream-url", default=None, help="Use this OpenAI base URL instead of a stand-in"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Keep per-request service logging")
+    return parser
+
+
+def main(argv=None) -> None:
+    """Run the replay command."""
+    args = build_parser().parse_args(argv)
+    if args.speed < 0 or args.max_in_flight < 1:
+        raise SystemExit("--speed must be at least 0 and --max-in-flight at least 1")
+    
+    setup_logging()
+    if not args.verbose:
+        logging.getLogger("app").setLevel(logging.WARNING)
+    
+    report = asyncio.run(run_replay(args))
+    print(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
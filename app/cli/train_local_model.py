@@ -0,0 +1,111 @@
+"""
+Train the local sentiment model from the LLM label log.
+
+Reads the labels accumulated in settings.label_log_path, fits the hashed
+n-gram classifier, calibrates its confidence on a held-out split and
+writes it to settings.local_model_path. Running workers pick the new
+model up without a restart.
+
+Usage:
+    python -m app.cli.train_local_model
+    python -m app.cli.train_local_model --labels labels.jsonl --output model.npz --epochs 8
+"""
+import argparse
+import logging
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import orjson
+
+from app.config import settings
+from app.services.label_log import read_labels
+from app.services.local_model import LocalSentimentModel, evaluate
+from app.utils.logger import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def load_examples(path: str, min_confidence: float) -> List[Tuple[str, str, float]]:
+    """Load (text, sentiment, confidence) examples, keeping the latest label per text."""
+    examples: Dict[str, Tuple[str, str, float]] = {}
+    for record in read_labels(path):
+        confidence = float(record.get("confidence", 1.0))
+        if confidence < min_confidence:
+            continue
+        examples[record["text"].lower().strip()] = (record["text"], record["sentiment"], confidence)
+    return list(examples.values())
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the command line parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli.train_local_model",
+        description="Train the local sentiment model from logged LLM labels."
+    )
+    parser.add_argument("--labels", default=settings.label_log_path, help="Label log to train on")
+    parser.add_argument("--output", default=settings.local_model_path, help="Model file to write")
+    parser.add_argument("--dims", type=int, default=2 ** 18, help="Hashed feature buckets")
+    parser.add_argument("--epochs", type=int, default=5, help="Training passes")
+    parser.add_argument("--learning-rate", type=float, default=0.5, help="Gradient step size")
+    parser.add_argument(
+        "--holdout", type=float, default=0.1, help="Fraction held out for calibration"
+    )
+    parser.add_argument(
+        "--min-confidence", type=float, default=0.0, help="Skip labels below this LLM confidence"
+    )
+    parser.add_argument(
+        "--min-examples", type=int, default=200, help="Refuse to train on fewer labels"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Shuffling seed")
+    return parser
+
+
+def main(argv=None) -> None:
+    """Run the training command."""
+    args = build_parser().parse_args(argv)
+    if not 0.0 < args.holdout < 1.0:
+        raise SystemExit("--holdout must be between 0 and 1")
+    setup_logging()
+    
+    examples = load_examples(args.labels, args.min_confidence)
+    if len(examples) < args.min_examples:
+        raise SystemExit(
+            f"Only {len(examples)} labelled text(s) in {args.labels}; "
+            f"need at least {args.min_examples}"
+        )
+    
+    random.Random(args.seed).shuffle(examples)
+    split = max(1, int(len(examples) * args.holdout))
+    held_out, training = examples[:split], examples[split:]
+    texts, labels, weights = zip(*training)
+    
+    started = time.monotonic()
+    model = LocalSentimentModel.train(
+        texts,
+        labels,
+        sample_weights=weights,
+        dims=args.dims,
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        seed=args.seed
+    )
+    held_texts, held_labels, _ = zip(*held_out)
+    model.calibrate(held_texts, held_labels)
+    metrics = evaluate(model, held_texts, held_labels, settings.local_model_threshold)
+    model.save(args.output)
+    
+    print(f"Model written to {args.output}", file=sys.stderr)
+    print(orjson.dumps({
+        "examples": len(examples),
+        "held_out": len(held_out),
+        "temperature": model.temperature,
+        "threshold": settings.local_model_threshold,
+        **metrics,
+        "elapsed_seconds": round(time.monotonic() - started, 2),
+    }).decode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
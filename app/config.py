@@ -2,11 +2,21 @@
 Configuration management using Pydantic Settings.
 Supports environment variables and .env files.
 """
+import json
 from functools import lru_cache
-from typing import List
+from typing import Annotated, List, Optional
 
-from pydantic import Field, field_validator
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import BaseModel, Field, field_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
+
+
+class UpstreamConfig(BaseModel):
+    """One OpenAI-compatible endpoint and key in the upstream pool."""
+    name: str
+    base_url: Optional[str] = None
+    api_key: Optional[str] = None
+    weight: float = Field(default=1.0, gt=0.0)
+    max_concurrency: int = Field(default=32, ge=1)
 
 
 class Settings(BaseSettings):
@@ -24,11 +34,52 @@ class Settings(BaseSettings):
     model_temperature: float = Field(default=0.3, ge=0.0, le=2.0)
     max_tokens: int = Field(default=150, ge=50, le=500)
     
+    # Model Routing (models ordered cheapest to strongest; empty uses model_name)
+    # NoDecode hands the raw environment string to parse_model_routes
+    model_routes: Annotated[List[str], NoDecode] = Field(default=[])
+    router_long_text_chars: int = Field(default=1000, ge=1)
+    router_ambiguity_threshold: float = Field(default=0.5, ge=0.0, le=1.0)
+    router_latency_budget_ms: int = Field(default=5000, ge=1)
+    
     # API Settings
     max_retries: int = Field(default=3, ge=1, le=10)
     timeout: int = Field(default=30, ge=10, le=120)
     rate_limit_requests: int = Field(default=100, ge=1)
     rate_limit_period: int = Field(default=60, ge=1)
+    llm_max_concurrency: int = Field(default=32, ge=1)
+    ws_max_in_flight: int = Field(default=64, ge=1)
+    server_timing_enabled: bool = Field(default=True)
+    
+    # Upstream Pool Settings (JSON list of UpstreamConfig; empty uses openai_api_key)
+    upstreams: List[UpstreamConfig] = Field(default=[])
+    upstream_balancer: str = Field(
+        default="least_outstanding", pattern="^(least_outstanding|latency_ewma)$"
+    )
+    upstream_eject_failures: int = Field(default=5, ge=1)
+    upstream_eject_seconds: float = Field(default=30.0, gt=0.0)
+    
+    # Readiness and Load Shedding Settings (X-Priority: low requests are shed first)
+    ready_max_queue_wait_ms: int = Field(default=10000, ge=1)
+    ready_max_loop_lag_ms: int = Field(default=500, ge=1)
+    shed_low_priority_wait_ms: int = Field(default=1000, ge=0)
+    
+    # Retry Settings (max_retries is per call; retries share a budget per worker)
+    retry_base_delay_ms: int = Field(default=200, ge=1)
+    retry_max_delay_ms: int = Field(default=5000, ge=1)
+    retry_budget_ratio: float = Field(default=0.1, ge=0.0, le=1.0)
+    retry_budget_window: int = Field(default=10, ge=1)
+    retry_budget_min_retries: int = Field(default=3, ge=0)
+    
+    # Hedging Settings (backup LLM call when the first exceeds a latency percentile)
+    hedging_enabled: bool = Field(default=False)
+    hedge_percentile: float = Field(default=95.0, ge=50.0, le=99.9)
+    hedge_min_samples: int = Field(default=20, ge=1)
+    hedge_max_ratio: float = Field(default=0.05, ge=0.0, le=1.0)
+    
+    # Token Budget Settings (per-model tokens-per-minute limit across all workers; 0 disables)
+    llm_tokens_per_minute: int = Field(default=0, ge=0)
+    llm_tpm_burst_fraction: float = Field(default=0.1, ge=0.0, le=0.9)
+    llm_tpm_max_wait_ms: int = Field(default=2000, ge=0)
     
     # CORS Settings
     allowed_origins: List[str] = Field(
@@ -39,6 +90,103 @@ class Settings(BaseSettings):
     enable_cache: bool = Field(default=True)
     cache_ttl: int = Field(default=3600, ge=60)
     
+    # Cache Snapshot Settings (saved on shutdown, loaded on startup)
+    cache_snapshot_enabled: bool = Field(default=True)
+    cache_snapshot_path: str = Field(default="data/cache_snapshot.jsonl")
+    
+    # Results Store Settings (columnar segments of served results for analytics)
+    results_store_enabled: bool = Field(default=False)
+    results_store_dir: str = Field(default="data/results")
+    results_segment_rows: int = Field(default=65536, ge=1)
+    results_flush_interval: float = Field(default=10.0, gt=0.0)
+    results_buffer_size: int = Field(default=100000, ge=1)
+    
+    # Traffic Capture Settings (opt-in sampled arrivals for app.cli.replay)
+    capture_enabled: bool = Field(default=False)
+    capture_path: str = Field(default="data/capture.jsonl")
+    capture_sample_rate: float = Field(default=0.01, gt=0.0, le=1.0)
+    capture_raw_text: bool = Field(default=False)
+    
+    # Fault Injection Settings (scenario file for resilience benchmarks; ignored in production)
+    fault_scenario_path: Optional[str] = Field(default=None)
+    
+    # Aggregation Settings (per-minute and per-hour sentiment by X-Client-Tag)
+    aggregation_enabled: bool = Field(default=True)
+    aggregation_max_tags: int = Field(default=64, ge=2)
+    aggregation_snapshot_dir: str = Field(default="data/aggregates")
+    aggregation_snapshot_interval: float = Field(default=5.0, gt=0.0)
+    
+    # Cache Priming Settings (defaults for POST /cache/prime and app.cli.prime_cache)
+    priming_top_n: int = Field(default=1000, ge=1)
+    priming_batch_size: int = Field(default=16, ge=1)
+    priming_batch_interval_ms: float = Field(default=250.0, ge=0.0)
+    priming_progress_path: str = Field(default="data/cache_priming.json")
+    
+    # Shared Cache Settings (multi-worker launcher)
+    shared_cache_enabled: bool = Field(default=True)
+    shared_cache_name: str = Field(default="sentiment_cache", min_length=1)
+    shared_cache_slots: int = Field(default=65536, ge=64)
+    shared_cache_slot_size: int = Field(default=1024, ge=256, le=65536)
+    
+    # Document Settings
+    document_chunk_size: int = Field(default=2000, ge=200, le=5000)
+    document_min_chunk_size: int = Field(default=300, ge=0)
+    
+    # Local Model Settings (distilled from LLM labels; the opt-in label log stores raw texts)
+    label_log_enabled: bool = Field(default=False)
+    label_log_path: str = Field(default="data/labels.jsonl")
+    label_log_max_bytes: int = Field(default=100 * 1024 * 1024, ge=1024)
+    local_model_enabled: bool = Field(default=True)
+    local_model_path: str = Field(default="data/local_model.npz")
+    local_model_threshold: float = Field(default=0.9, ge=0.5, le=1.0)
+    local_model_check_interval: float = Field(default=5.0, gt=0)
+    
+    # Local Scoring Settings (executor for CPU-bound local scoring)
+    local_scoring_executor: str = Field(default="thread", pattern="^(inline|thread|process)$")
+    local_scoring_workers: int = Field(
+        default=2, ge=0, description="0 sizes the pool to the CPU count"
+    )
+    local_scoring_batch_size: int = Field(default=64, ge=1)
+    local_scoring_batch_wait_ms: float = Field(default=2.0, ge=0.0)
+    
+    # Admin Settings (debug, profiling and model reload endpoints)
+    admin_token: str = Field(default="", description="Empty disables admin endpoints")
+    profile_max_seconds: int = Field(default=60, ge=1, le=600)
+    
+    # Tracing Settings (spans written to local Chrome trace event files)
+    tracing_enabled: bool = Field(default=True)
+    trace_sample_rate: float = Field(default=0.01, ge=0.0, le=1.0)
+    trace_dir: str = Field(default="data/traces")
+    trace_max_bytes: int = Field(default=50 * 1024 * 1024, ge=1024)
+    trace_backup_count: int = Field(default=5, ge=0)
+    trace_max_total_bytes: int = Field(default=500 * 1024 * 1024, ge=0)
+    trace_flush_interval: float = Field(default=1.0, gt=0)
+    trace_buffer_size: int = Field(default=10000, ge=1)
+    
+    # Event Loop Monitor Settings
+    loop_monitor_interval_ms: float = Field(default=100.0, gt=0)
+    loop_slow_callback_ms: float = Field(default=100.0, gt=0)
+    loop_monitor_max_events: int = Field(default=50, ge=1)
+    
+    # Job Settings
+    job_storage_dir: str = Field(default="data/jobs")
+    job_workers: int = Field(default=2, ge=1)
+    job_concurrency: int = Field(default=8, ge=1)
+    
+    # Shutdown Settings (keep drain_timeout below worker_graceful_timeout)
+    drain_timeout: float = Field(default=20.0, ge=0.0)
+    
+    # Server Settings (production launcher)
+    host: str = Field(default="0.0.0.0")
+    port: int = Field(default=8000, ge=1, le=65535)
+    workers: int = Field(default=0, ge=0, description="0 sizes workers to the CPU count")
+    worker_max_requests: int = Field(default=10000, ge=0)
+    worker_max_requests_jitter: int = Field(default=1000, ge=0)
+    worker_graceful_timeout: int = Field(default=30, ge=1)
+    worker_processes: int = Field(
+        default=1, ge=1, description="Set by the launcher; per-worker limits are split by it"
+    )
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -54,6 +202,16 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in v.split(",")]
         return v
     
+    @field_validator("model_routes", mode="before")
+    @classmethod
+    def parse_model_routes(cls, v):
+        """Parse comma-separated model routes, or a JSON list."""
+        if isinstance(v, str):
+            if v.strip().startswith("["):
+                return json.loads(v)
+            return [model.strip() for model in v.split(",") if model.strip()]
+        return v
+    
     @property
     def is_production(self) -> bool:
         """Check if running in production."""
@@ -1,17 +1,32 @@
 """
 FastAPI application entry point.
 """
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request, status
+from fastapi import Depends, FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 
 from app.config import settings
 from app.api.routes import router
+from app.api.debug import router as debug_router
+from app.api.jobs import router as jobs_router
+from app.api.streaming import router as streaming_router
+from app.api.websocket import router as websocket_router
+from app.services.admission import get_admission_controller
+from app.services.aggregation import tag_client
+from app.services.job_service import get_job_manager
+from app.services.local_scoring import get_local_scoring_pool
+from app.services.sentiment_service import get_sentiment_service
+from app.services.shutdown import drain
+from app.services.token_budget import tag_endpoint
+from app.utils.loop_monitor import get_loop_monitor
 from app.utils.logger import setup_logging
+from app.utils.timing import PhaseTimingMiddleware
+from app.utils.tracing import TracingMiddleware, get_span_exporter
 
 # Setup logging
 setup_logging()
@@ -27,9 +42,37 @@ async def lifespan(app: FastAPI):
     logger.info(f"Model: {settings.model_name}")
     logger.info(f"Cache enabled: {settings.enable_cache}")
     
+    span_exporter = get_span_exporter()
+    span_exporter.start()
+    loop_monitor = get_loop_monitor()
+    loop_monitor.start()
+    job_manager = get_job_manager()
+    await job_manager.start()
+    
+    # Build the service and its upstream clients before reporting ready
+    service = get_sentiment_service()
+    if service.results_store is not None:
+        service.results_store.start()
+    if service.aggregates is not None:
+        service.aggregates.start()
+    if settings.enable_cache and settings.cache_snapshot_enabled:
+        loaded = await asyncio.to_thread(service.load_cache, settings.cache_snapshot_path)
+        logger.info(f"Loaded {loaded} cache entries from snapshot")
+    admission = get_admission_controller()
+    admission.draining = False
+    admission.warm = True
+    
     yield
     
-    # Shutdown
+    # Shutdown: finish work already paid for, then persist state
+    await drain(settings.drain_timeout)
+    if service.results_store is not None:
+        await asyncio.to_thread(service.results_store.stop)
+    if service.aggregates is not None:
+        await asyncio.to_thread(service.aggregates.stop)
+    await loop_monitor.stop()
+    get_local_scoring_pool().shutdown()
+    span_exporter.stop()
     logger.info(f"Shutting down {settings.app_name}")
 
 
@@ -49,6 +92,8 @@ app = FastAPI(
     - ⚡ Fast response times with caching
     """,
     lifespan=lifespan,
+    # Attribute upstream token usage to the route and results to the client tag
+    dependencies=[Depends(tag_endpoint), Depends(tag_client)],
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -62,6 +107,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing phases for requests sent with X-Profile: 1 and an admin token
+app.add_middleware(PhaseTimingMiddleware)
+
+# Root spans for sampled requests; added last so it wraps the other middleware
+app.add_middleware(TracingMiddleware)
+
 
 # Exception handlers
 @app.exception_handler(RequestValidationError)
@@ -115,6 +166,10 @@ async def general_exception_handler(request: Request, exc: Exception):
 
 # Include API routes
 app.include_router(router, tags=["Sentiment Analysis"])
+app.include_router(streaming_router, tags=["Sentiment Analysis"])
+app.include_router(websocket_router)
+app.include_router(jobs_router, tags=["Jobs"])
+app.include_router(debug_router, tags=["Debug"])
 
 
 # Root endpoint
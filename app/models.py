@@ -2,11 +2,33 @@
 Pydantic models for request/response validation.
 """
 from enum import Enum
-from typing import Optional
+from typing import Any, List, Optional
 
 from pydantic import BaseModel, Field, field_validator
 
 
+MAX_TEXT_LENGTH = 5000
+MAX_DOCUMENT_LENGTH = 200000
+
+
+def clean_text(value: Any) -> str:
+    """
+    Apply the SentimentRequest text rules without building a model.
+    Used on paths that validate many texts, such as streams and bulk input.
+    
+    Raises:
+        ValueError: If the text is missing, empty or too long
+    """
+    if not isinstance(value, str):
+        raise ValueError("Text must be a string")
+    value = value.strip()
+    if not value:
+        raise ValueError("Text cannot be empty or only whitespace")
+    if len(value) > MAX_TEXT_LENGTH:
+        raise ValueError(f"Text exceeds {MAX_TEXT_LENGTH} characters")
+    return value
+
+
 class SentimentLabel(str, Enum):
     """Enum for sentiment labels."""
     POSITIVE = "positive"
@@ -20,7 +42,7 @@ class SentimentRequest(BaseModel):
     text: str = Field(
         ...,
         min_length=1,
-        max_length=5000,
+        max_length=MAX_TEXT_LENGTH,
         description="Text to analyze for sentiment",
         examples=["I love this product! It's amazing!"]
     )
@@ -88,6 +110,136 @@ class SentimentResponse(BaseModel):
     }
 
 
+class DocumentRequest(BaseModel):
+    """Request model for long-document sentiment analysis."""
+    
+    text: str = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_DOCUMENT_LENGTH,
+        description="Document to analyze; split into chunks on paragraph and sentence boundaries"
+    )
+    
+    include_chunks: bool = Field(
+        default=False,
+        description="Include the per-chunk results in the response"
+    )
+    
+    @field_validator("text")
+    @classmethod
+    def validate_text(cls, v: str) -> str:
+        """Reject empty or whitespace-only documents."""
+        if not v.strip():
+            raise ValueError("Text cannot be empty or only whitespace")
+        return v
+
+
+class ChunkSentiment(SentimentResponse):
+    """Sentiment result for one chunk of a document."""
+    
+    index: int = Field(..., description="Position of the chunk in the document")
+    start: int = Field(..., description="Offset of the first character of the chunk")
+    end: int = Field(..., description="Offset just past the last character of the chunk")
+
+
+class DocumentSentimentResponse(SentimentResponse):
+    """Response model for long-document sentiment analysis."""
+    
+    chunk_count: int = Field(..., description="Number of chunks the document was split into")
+    chunks: Optional[List[ChunkSentiment]] = Field(
+        None,
+        description="Per-chunk results, when requested"
+    )
+
+
+class JobStatus(str, Enum):
+    """Enum for background job states."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobRequest(BaseModel):
+    """Request model for a batch sentiment analysis job."""
+    
+    texts: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=10000,
+        description="Texts to analyze (each 1-5000 characters)"
+    )
+    
+    @field_validator("texts")
+    @classmethod
+    def validate_texts(cls, v: List[str]) -> List[str]:
+        """Validate and clean every text with the SentimentRequest rules."""
+        cleaned = []
+        for index, text in enumerate(v):
+            try:
+                cleaned.append(clean_text(text))
+            except ValueError as e:
+                raise ValueError(f"Text at index {index}: {e}")
+        return cleaned
+    
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "texts": [
+                        "I love this product! It's amazing!",
+                        "This is terrible. I'm very disappointed."
+                    ]
+                }
+            ]
+        }
+    }
+
+
+class JobResponse(BaseModel):
+    """Response model for job status and progress."""
+    
+    job_id: str = Field(..., description="Job identifier")
+    status: JobStatus = Field(..., description="Current job state")
+    total: int = Field(..., description="Number of submitted texts")
+    completed: int = Field(..., description="Number of texts analyzed so far")
+    created_at: float = Field(..., description="Creation time (Unix timestamp)")
+    updated_at: float = Field(..., description="Last update time (Unix timestamp)")
+    error: Optional[str] = Field(None, description="Failure reason, if the job failed")
+
+
+class JobResultItem(SentimentResponse):
+    """Sentiment result for one text of a job."""
+    
+    index: int = Field(..., description="Position of the text in the submitted list")
+
+
+class JobResultsResponse(BaseModel):
+    """Response model for a page of job results."""
+    
+    job_id: str
+    status: JobStatus
+    offset: int
+    limit: int
+    total: int
+    results: List[JobResultItem]
+
+
+class CachePrimeRequest(BaseModel):
+    """Request model for priming the cache from historical texts."""
+    
+    texts: Optional[List[str]] = Field(
+        None,
+        max_length=100000,
+        description="Historical texts, repeats included; omit to use the raw-text traffic capture"
+    )
+    top_n: Optional[int] = Field(None, ge=1, le=100000, description="Most frequent texts to prime")
+    batch_size: Optional[int] = Field(None, ge=1, le=256, description="Texts scored concurrently")
+    batch_interval_ms: Optional[float] = Field(
+        None, ge=0, le=60000, description="Pause between batches"
+    )
+
+
 class HealthResponse(BaseModel):
     """Response model for health check."""
     
@@ -0,0 +1,108 @@
+"""
+Production server launcher.
+
+Runs the application under Gunicorn with Uvicorn workers: one worker per
+available CPU by default, the app preloaded in the master before forking,
+and workers recycled gracefully after a bounded number of requests. The
+master creates the shared cache segment that all workers attach to.
+
+Usage:
+    python -m app.server
+"""
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from gunicorn.app.base import BaseApplication
+
+from app.config import settings
+from app.services.shared_cache import SharedMemoryCache
+from app.utils.logger import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Segment owned by the master process
+_shared_cache: Optional[SharedMemoryCache] = None
+
+
+def get_worker_count() -> int:
+    """Number of workers: configured value, or one per available CPU."""
+    if settings.workers:
+        return settings.workers
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def on_starting(server) -> None:
+    """Create the shared cache segment before any worker is forked."""
+    global _shared_cache
+    if settings.enable_cache and settings.shared_cache_enabled:
+        _shared_cache = SharedMemoryCache.create(
+            settings.shared_cache_name,
+            settings.shared_cache_slots,
+            settings.shared_cache_slot_size,
+        )
+
+
+def on_exit(server) -> None:
+    """Remove the shared cache segment when the master exits."""
+    global _shared_cache
+    if _shared_cache is not None:
+        _shared_cache.close()
+        _shared_cache = None
+
+
+def get_gunicorn_options() -> Dict[str, Any]:
+    """Build Gunicorn options from application settings."""
+    return {
+        "bind": f"{settings.host}:{settings.port}",
+        "workers": get_worker_count(),
+        "worker_class": "uvicorn_worker.UvicornWorker",
+        "preload_app": True,
+        "max_requests": settings.worker_max_requests,
+        "max_requests_jitter": settings.worker_max_requests_jitter,
+        "graceful_timeout": settings.worker_graceful_timeout,
+        "timeout": settings.timeout + settings.worker_graceful_timeout,
+        "loglevel": settings.log_level.lower(),
+        "on_starting": on_starting,
+        "on_exit": on_exit,
+    }
+
+
+class SentimentServer(BaseApplication):
+    """Gunicorn application wrapping the FastAPI app."""
+    
+    def __init__(self, options: Dict[str, Any]):
+        """Initialize with Gunicorn options."""
+        self.options = options
+        super().__init__()
+    
+    def load_config(self) -> None:
+        """Apply options to the Gunicorn config."""
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+    
+    def load(self):
+        """Import the application (once, in the master, with preload)."""
+        from app.main import app
+        return app
+
+
+def main() -> None:
+    """Start the production server."""
+    setup_logging()
+    options = get_gunicorn_options()
+    # Inherited by the forked workers, which split per-worker limits by it
+    settings.worker_processes = options["workers"]
+    logger.info(
+        f"Starting {settings.app_name} with {options['workers']} worker(s) "
+        f"on {options['bind']}"
+    )
+    SentimentServer(options).run()
+
+
+if __name__ == "__main__":
+    main()
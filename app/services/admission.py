@@ -0,0 +1,131 @@
+"""
+Readiness checks and priority-based load shedding.
+
+A worker is ready when it has finished warming up, its oldest request
+has waited for an upstream call slot less than
+settings.ready_max_queue_wait_ms, at least one upstream pool member is
+not ejected, and event loop lag is under settings.ready_max_loop_lag_ms.
+Load balancers should probe /health/ready and stop routing to workers
+that fail it; /health/live only says whether the process responds.
+
+Requests carry an optional X-Priority header (low, normal or high).
+Once queue wait exceeds settings.shed_low_priority_wait_ms, low priority
+requests are rejected at once with 503 and Retry-After instead of joining
+the queue. While the worker drains for shutdown, every request is.
+"""
+import logging
+import math
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Header, HTTPException, status
+
+from app.config import settings
+from app.services.sentiment_service import get_sentiment_service
+from app.utils.loop_monitor import get_loop_monitor
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(str, Enum):
+    """Request priority from the X-Priority header."""
+    LOW = "low"
+    NORMAL = "normal"
+    HIGH = "high"
+
+
+class AdmissionController:
+    """Tracks warm-up and decides readiness and load shedding."""
+    
+    def __init__(self):
+        """Initialize as not yet warmed up."""
+        self.warm = False
+        self.draining = False
+        self.shed = 0
+    
+    def readiness(self) -> Tuple[bool, Dict[str, Dict[str, Any]]]:
+        """
+        Evaluate the readiness checks.
+        
+        Returns:
+            Whether every check passes, and each check's result and value
+        """
+        service = get_sentiment_service()
+        queue_wait_ms = service.queue_wait() * 1000
+        members = service.upstreams.members
+        available = sum(not member.ejected for member in members)
+        loop_lag_ms = get_loop_monitor().get_stats()["loop_lag_ewma_ms"]
+        
+        checks = {
+            "warm": {"ok": self.warm},
+            "queue": {
+                "ok": queue_wait_ms <= settings.ready_max_queue_wait_ms,
+                "queue_wait_ms": round(queue_wait_ms, 2),
+                "waiting": service.llm_waiting
+            },
+            "upstream": {
+                "ok": available > 0,
+                "available_members": available,
+                "ejected_members": len(members) - available
+            },
+            "event_loop": {
+                "ok": loop_lag_ms <= settings.ready_max_loop_lag_ms,
+                "loop_lag_ewma_ms": loop_lag_ms
+            },
+        }
+        return all(check["ok"] for check in checks.values()), checks
+    
+    def admit(self, priority: Priority) -> Optional[float]:
+        """
+        Decide whether to take a request.
+        
+        Returns:
+            None to admit it, otherwise the current queue wait in seconds
+        """
+        if self.draining:
+            self.shed += 1
+            return 0.0
+        if priority is not Priority.LOW or not settings.shed_low_priority_wait_ms:
+            return None
+        queue_wait = get_sentiment_service().queue_wait()
+        if queue_wait * 1000 <= settings.shed_low_priority_wait_ms:
+            return None
+        self.shed += 1
+        return queue_wait
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Warm-up and drain state and shed request count."""
+        return {"warm": self.warm, "draining": self.draining, "shed_requests": self.shed}
+
+
+# Global admission controller instance
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get or create the admission controller."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
+
+
+async def admit_request(x_priority: Optional[str] = Header(None)) -> None:
+    """
+    Dependency shedding low priority requests while the upstream queue is long.
+    
+    Raises:
+        HTTPException: 503 with Retry-After when the request is shed
+    """
+    try:
+        priority = Priority((x_priority or Priority.NORMAL.value).lower())
+    except ValueError:
+        priority = Priority.NORMAL
+    queue_wait = get_admission_controller().admit(priority)
+    if queue_wait is not None:
+        logger.warning(f"Shed low priority request, queue wait {queue_wait:.2f}s")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy or shutting down; retry shortly",
+            headers={"Retry-After": str(max(1, math.ceil(queue_wait)))}
+        )
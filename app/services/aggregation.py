@@ -0,0 +1,365 @@
+"""
+Windowed sentiment aggregates over live traffic.
+
+Every result served is counted per client tag (the X-Client-Tag header,
+set per request by the `tag_client` dependency) in two rings of time
+buckets: per minute over the last hour and per hour over the last day.
+Each bucket holds counts per label, the confidence sum and a histogram
+of confidences with CONFIDENCE_BINS bins, from which quantiles are
+estimated to within one bin. Updating a bucket is O(1) and the arrays
+are allocated up front for settings.aggregation_max_tags tags, so memory
+stays fixed; tags beyond that are counted under OTHER_TAG.
+
+Buckets are aligned to wall-clock time, so the aggregates of several
+workers add up bucket by bucket. Each worker writes its arrays to
+settings.aggregation_snapshot_dir every
+settings.aggregation_snapshot_interval seconds, and a query merges the
+live arrays of the worker answering it with the other workers' files.
+When a worker stops, its arrays are merged into RETIRED_SNAPSHOT and its
+own file is removed, so recycled workers do not leave a file per pid.
+Snapshots not written for MAX_SNAPSHOT_AGE hold no bucket a query could
+return and are deleted by the next query.
+"""
+import fcntl
+import glob
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import orjson
+from starlette.requests import HTTPConnection
+
+from app.models import SentimentLabel
+
+logger = logging.getLogger(__name__)
+
+LABELS = tuple(label.value for label in SentimentLabel)
+CONFIDENCE_BINS = 100
+QUANTILES = (0.5, 0.9, 0.99)
+# Window name, bucket width in seconds, buckets kept
+WINDOWS = {"minute": (60, 60), "hour": (3600, 24)}
+UNTAGGED = "untagged"
+OTHER_TAG = "other"
+MAX_TAG_LENGTH = 64
+# Aggregates of stopped workers, merged into one file
+RETIRED_SNAPSHOT = "aggregates-retired.npz"
+# Seconds covered by the longest window
+MAX_SNAPSHOT_AGE = max(width * size for width, size in WINDOWS.values())
+
+_LABEL_CODES = {label: code for code, label in enumerate(LABELS)}
+
+_client_tag: ContextVar[str] = ContextVar("client_tag", default=UNTAGGED)
+
+
+async def tag_client(connection: HTTPConnection) -> None:
+    """Dependency attributing results to the X-Client-Tag of the request."""
+    tag = connection.headers.get("x-client-tag", "").strip()
+    _client_tag.set(tag[:MAX_TAG_LENGTH] or UNTAGGED)
+
+
+class _Ring:
+    """Time buckets of one window for every tag, reused round-robin."""
+    
+    def __init__(self, width: int, size: int, max_tags: int):
+        """Allocate zeroed buckets."""
+        self.width = width
+        self.size = size
+        self.ids = np.full((max_tags, size), -1, dtype=np.int64)
+        self.counts = np.zeros((max_tags, size, len(LABELS)), dtype=np.int64)
+        self.confidence_sum = np.zeros((max_tags, size), dtype=np.float64)
+        self.histogram = np.zeros((max_tags, size, CONFIDENCE_BINS), dtype=np.int64)
+    
+    def add(self, tag: int, now: float, label: int, confidence: float) -> None:
+        """Count one result in the bucket covering now."""
+        bucket = int(now // self.width)
+        slot = bucket % self.size
+        if self.ids[tag, slot] != bucket:
+            # The slot still holds a bucket from a previous lap
+            self.ids[tag, slot] = bucket
+            self.counts[tag, slot] = 0
+            self.confidence_sum[tag, slot] = 0.0
+            self.histogram[tag, slot] = 0
+        self.counts[tag, slot, label] += 1
+        self.confidence_sum[tag, slot] += confidence
+        bin_index = min(int(confidence * CONFIDENCE_BINS), CONFIDENCE_BINS - 1)
+        self.histogram[tag, slot, bin_index] += 1
+    
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The ring's arrays by name."""
+        return {
+            "ids": self.ids,
+            "counts": self.counts,
+            "confidence_sum": self.confidence_sum,
+            "histogram": self.histogram,
+        }
+
+
+class SentimentAggregator:
+    """Per-tag minute and hour aggregates of served results."""
+    
+    def __init__(self, max_tags: int, snapshot_dir: str, snapshot_interval: float):
+        """
+        Initialize empty aggregates.
+        
+        Args:
+            max_tags: Tags tracked separately, including OTHER_TAG
+            snapshot_dir: Directory where workers share their aggregates
+            snapshot_interval: Seconds between snapshot writes
+        """
+        self.max_tags = max(2, max_tags)
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_interval = snapshot_interval
+        self.tags: List[str] = []
+        self._tag_index: Dict[str, int] = {}
+        self.rings = {
+            name: _Ring(width, size, self.max_tags) for name, (width, size) in WINDOWS.items()
+        }
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def record(self, body: bytes, tag: Optional[str] = None) -> None:
+        """
+        Count a served result.
+        
+        Args:
+            body: Serialized result with sentiment and confidence
+            tag: Client tag; defaults to the current request's X-Client-Tag
+        """
+        result = orjson.loads(body)
+        label = _LABEL_CODES.get(result.get("sentiment"))
+        if label is None:
+            return
+        confidence = min(max(float(result.get("confidence", 0.0)), 0.0), 1.0)
+        now = time.time()
+        with self._lock:
+            index = self._index(tag or _client_tag.get())
+            for ring in self.rings.values():
+                ring.add(index, now, label, confidence)
+            self.recorded += 1
+    
+    def _index(self, tag: str) -> int:
+        """Row of a tag, assigning one while rows remain."""
+        index = self._tag_index.get(tag)
+        if index is None:
+            if len(self.tags) < self.max_tags - 1 or tag == OTHER_TAG:
+                index = len(self.tags)
+            else:
+                return self._index(OTHER_TAG)
+            self.tags.append(tag)
+            self._tag_index[tag] = index
+        return index
+    
+    def _copy(self) -> Dict[str, np.ndarray]:
+        """Consistent copy of the tags and every ring's arrays."""
+        with self._lock:
+            arrays = {"tags": np.array(self.tags, dtype=str)}
+            for name, ring in self.rings.items():
+                for field, values in ring.arrays().items():
+                    arrays[f"{name}_{field}"] = values[:len(self.tags)].copy()
+        return arrays
+    
+    def _merge(self, snapshot: Dict[str, np.ndarray]) -> None:
+        """Add a snapshot's buckets, keeping the newer bucket where slots differ."""
+        with self._lock:
+            for row, tag in enumerate(snapshot["tags"].tolist()):
+                index = self._index(tag)
+                for name, ring in self.rings.items():
+                    ids = snapshot[f"{name}_ids"][row]
+                    newer = ids > ring.ids[index]
+                    same = (ids == ring.ids[index]) & (ids >= 0)
+                    ring.ids[index, newer] = ids[newer]
+                    for field, values in ring.arrays().items():
+                        if field == "ids":
+                            continue
+                        incoming = snapshot[f"{name}_{field}"][row]
+                        values[index, newer] = incoming[newer]
+                        values[index, same] += incoming[same]
+    
+    def _snapshot_path(self, pid: int) -> str:
+        """Snapshot file of a worker."""
+        return os.path.join(self.snapshot_dir, f"aggregates-{pid}.npz")
+    
+    def save_snapshot(self) -> None:
+        """Write this worker's aggregates for the other workers to merge."""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        self._write(self._snapshot_path(os.getpid()), self._copy())
+    
+    def _write(self, path: str, arrays: Dict[str, np.ndarray]) -> None:
+        """Atomically replace a snapshot file."""
+        # Outside the aggregates-*.npz pattern, so peers never read a partial file
+        tmp_path = os.path.join(self.snapshot_dir, f".aggregates-{os.getpid()}.tmp.npz")
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+    
+    def _load(self, path: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Load a snapshot, deleting it once it is older than every window.
+        
+        Returns:
+            The snapshot's arrays, or None if it is missing, expired or unreadable
+        """
+        try:
+            if time.time() - os.path.getmtime(path) > MAX_SNAPSHOT_AGE:
+                os.remove(path)
+                return None
+            with np.load(path) as snapshot:
+                return {name: snapshot[name] for name in snapshot.files}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping aggregate snapshot {path}: {str(e)}")
+            return None
+    
+    def _peer_snapshots(self) -> Iterable[Dict[str, np.ndarray]]:
+        """Load the other workers' snapshots, skipping unreadable files."""
+        own = self._snapshot_path(os.getpid())
+        for path in glob.glob(os.path.join(self.snapshot_dir, "aggregates-*.npz")):
+            if path == own:
+                continue
+            snapshot = self._load(path)
+            if snapshot is not None:
+                yield snapshot
+    
+    def hand_off(self, snapshot: Optional[Dict[str, np.ndarray]] = None) -> None:
+        """
+        Merge aggregates into RETIRED_SNAPSHOT and remove this worker's file.
+        
+        Args:
+            snapshot: Arrays to hand off; this worker's live aggregates when None
+        """
+        if snapshot is None:
+            snapshot = self._copy()
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        retired_path = os.path.join(self.snapshot_dir, RETIRED_SNAPSHOT)
+        with open(os.path.join(self.snapshot_dir, ".aggregates.lock"), "a") as lock:
+            # Serializes stopping workers, so none overwrites another's hand-off
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            merged = SentimentAggregator(self.max_tags, self.snapshot_dir, self.snapshot_interval)
+            retired = self._load(retired_path)
+            if retired is not None:
+                merged._merge(retired)
+            merged._merge(snapshot)
+            self._write(retired_path, merged._copy())
+            try:
+                os.remove(self._snapshot_path(os.getpid()))
+            except FileNotFoundError:
+                pass
+    
+    def query(self, window: str, tag: Optional[str] = None, merge: bool = True) -> Dict[str, Any]:
+        """
+        Aggregates per bucket over a window, newest bucket first.
+        
+        Args:
+            window: "minute" or "hour"
+            tag: Only count this client tag; all tags when None
+            merge: Include the other workers' snapshots
+        
+        Returns:
+            Buckets with counts per label, mean confidence and quantiles
+        """
+        width, size = WINDOWS[window]
+        current = int(time.time() // width)
+        counts = np.zeros((size, len(LABELS)), dtype=np.int64)
+        confidence_sum = np.zeros(size, dtype=np.float64)
+        histogram = np.zeros((size, CONFIDENCE_BINS), dtype=np.int64)
+        
+        sources = [self._copy()]
+        if merge:
+            sources.extend(self._peer_snapshots())
+        tags = set()
+        for source in sources:
+            tags.update(source["tags"].tolist())
+            if tag is None:
+                rows = np.arange(len(source["tags"]))
+            else:
+                rows = np.flatnonzero(source["tags"] == tag)
+            ages = current - source[f"{window}_ids"][rows]
+            valid = (ages >= 0) & (ages < size)
+            ages = ages[valid]
+            np.add.at(counts, ages, source[f"{window}_counts"][rows][valid])
+            np.add.at(confidence_sum, ages, source[f"{window}_confidence_sum"][rows][valid])
+            np.add.at(histogram, ages, source[f"{window}_histogram"][rows][valid])
+        
+        buckets = []
+        for age in range(size):
+            total = int(counts[age].sum())
+            if not total:
+                continue
+            buckets.append({
+                "start": (current - age) * width,
+                "total": total,
+                "counts": dict(zip(LABELS, counts[age].tolist())),
+                "mean_confidence": round(float(confidence_sum[age]) / total, 4),
+                "quantiles": _quantiles(histogram[age], total),
+            })
+        return {
+            "window": window,
+            "bucket_seconds": width,
+            "tag": tag,
+            "tags": sorted(tags),
+            "workers": len(sources),
+            "buckets": buckets,
+        }
+    
+    def start(self) -> None:
+        """Start writing snapshots in the background."""
+        if self._thread is None:
+            stale = self._load(self._snapshot_path(os.getpid()))
+            if stale is not None:
+                # Left by an earlier process with this pid that did not stop cleanly
+                self._hand_off_quietly(stale)
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="aggregate-snapshots", daemon=True
+            )
+            self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the snapshot thread and hand this worker's aggregates off."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+            self._hand_off_quietly()
+    
+    def _run(self) -> None:
+        """Save snapshots until stopped."""
+        while not self._stopping.wait(self.snapshot_interval):
+            self._save_quietly()
+    
+    def _save_quietly(self) -> None:
+        """Save a snapshot, logging failures."""
+        try:
+            self.save_snapshot()
+        except OSError as e:
+            logger.warning(f"Could not write aggregate snapshot: {str(e)}")
+    
+    def _hand_off_quietly(self, snapshot: Optional[Dict[str, np.ndarray]] = None) -> None:
+        """Hand aggregates off, falling back to a snapshot of our own on failure."""
+        try:
+            self.hand_off(snapshot)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not hand off aggregates: {str(e)}")
+            if snapshot is None:
+                self._save_quietly()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Recorded results and tracked tags."""
+        return {"recorded": self.recorded, "tags": len(self.tags)}
+
+
+def _quantiles(histogram: np.ndarray, total: int) -> Dict[str, float]:
+    """Confidence quantiles from a histogram, at bin midpoints."""
+    cumulative = np.cumsum(histogram)
+    return {
+        f"p{round(q * 100)}": round(
+            (int(np.searchsorted(cumulative, q * total)) + 0.5) / CONFIDENCE_BINS, 4
+        )
+        for q in QUANTILES
+    }
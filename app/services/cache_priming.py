@@ -0,0 +1,308 @@
+"""
+Cache priming from frequency-ranked historical texts.
+
+Much of the traffic is a long tail of recurring template texts. A
+PrimingPlan counts a corpus (past requests, or a raw-text traffic
+capture) under the cache key normalization, keeps the top N texts and
+estimates what priming them is worth: the share of the corpus's requests
+they cover, and the hit rate a replay of the corpus would see with and
+without them primed. Replayed, every request hits except the first
+occurrence of each text that was not primed; the estimate assumes future
+traffic follows the corpus and entries outlive settings.cache_ttl.
+
+The CachePrimer scores a plan into the cache in background batches of
+batch_size texts with a pause between batches. It waits for the token
+budget however long it takes, and holds back while live requests queue
+for upstream slots longer than settings.shed_low_priority_wait_ms.
+Results go to the shared cache as usual, so every worker benefits.
+
+A run holds a lock next to settings.priming_progress_path, so one
+worker, or the app.cli.prime_cache command, primes at a time, and writes
+its progress to that file after every batch for the other workers to
+report.
+"""
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import orjson
+
+from app.config import settings
+from app.models import clean_text
+from app.services.sentiment_service import get_sentiment_service
+from app.services.token_budget import set_usage_endpoint
+
+logger = logging.getLogger(__name__)
+
+
+class PrimingPlan:
+    """The most frequent texts of a corpus and the value of priming them."""
+    
+    def __init__(self, texts: Iterable[Optional[str]], top_n: int, key: Callable[[str], str]):
+        """
+        Rank a corpus.
+        
+        Args:
+            texts: Corpus texts; None or invalid texts are counted as unusable
+            top_n: Number of texts to prime
+            key: Cache key normalization
+        """
+        counts: Counter = Counter()
+        first_seen: Dict[str, str] = {}
+        self.unusable = 0
+        for text in texts:
+            try:
+                text = clean_text(text)
+            except ValueError:
+                self.unusable += 1
+                continue
+            cache_key = key(text)
+            counts[cache_key] += 1
+            first_seen.setdefault(cache_key, text)
+        
+        ranked = counts.most_common(top_n)
+        self.texts: List[str] = [first_seen[cache_key] for cache_key, _ in ranked]
+        self.requests = sum(counts.values())
+        self.distinct = len(counts)
+        self.covered = sum(count for _, count in ranked)
+    
+    def get_report(self) -> Dict[str, Any]:
+        """Corpus size, coverage and expected hit rates."""
+        requests = self.requests or 1
+        primed_hits = self.requests - self.distinct + len(self.texts)
+        return {
+            "corpus_requests": self.requests,
+            "distinct_texts": self.distinct,
+            "unusable_texts": self.unusable,
+            "texts_to_prime": len(self.texts),
+            "coverage": round(self.covered / requests, 4),
+            "expected_hit_rate": round(primed_hits / requests, 4),
+            "unprimed_hit_rate": round((self.requests - self.distinct) / requests, 4),
+        }
+
+
+def read_corpus(path: str, text_field: str = "text") -> Iterator[Optional[str]]:
+    """
+    Yield texts from a corpus file.
+    
+    JSONL files (including raw-text traffic captures) yield each record's
+    text_field, or None for records without one such as hash-only capture
+    lines; any other file yields one text per line.
+    """
+    jsonl = path.lower().endswith((".jsonl", ".ndjson"))
+    with open(path, "rb") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            if not jsonl:
+                yield line.decode("utf-8", errors="replace")
+                continue
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                yield None
+                continue
+            yield record.get(text_field) if isinstance(record, dict) else None
+
+
+class PrimingAlreadyRunningError(Exception):
+    """Raised when priming starts while another run is in progress."""
+
+
+class CachePrimer:
+    """Scores a priming plan into the cache in throttled batches."""
+    
+    def __init__(self, progress_path: Optional[str] = None):
+        """
+        Initialize with no run.
+        
+        Args:
+            progress_path: Progress file shared by every worker, locked
+                while a run is in progress; None keeps runs to this process
+        """
+        self.progress_path = progress_path
+        self._task: Optional[asyncio.Task] = None
+        self._lock_file = None
+        self.progress: Dict[str, Any] = {"status": "idle"}
+    
+    @property
+    def running(self) -> bool:
+        """Whether a run is in progress."""
+        return self._task is not None and not self._task.done()
+    
+    def start(self, plan: PrimingPlan, batch_size: int, batch_interval: float) -> None:
+        """
+        Start priming in the background.
+        
+        Raises:
+            PrimingAlreadyRunningError: If a run is in progress
+        """
+        if self.running:
+            raise PrimingAlreadyRunningError("Cache priming is already running")
+        self._lock()
+        self._reset(plan)
+        self._task = asyncio.create_task(self.prime(plan, batch_size, batch_interval))
+    
+    async def stop(self) -> bool:
+        """
+        Cancel a run in progress and wait for it to record how it ended.
+        
+        Returns:
+            True if a run was cancelled
+        """
+        if not self.running:
+            return False
+        self._task.cancel()
+        await asyncio.wait({self._task})
+        return True
+    
+    def _lock(self) -> None:
+        """
+        Take the run lock shared by every worker, if progress is shared.
+        
+        Raises:
+            PrimingAlreadyRunningError: If another worker or process holds it
+        """
+        if self.progress_path is None or self._lock_file is not None:
+            return
+        os.makedirs(os.path.dirname(self.progress_path) or ".", exist_ok=True)
+        lock_file = open(f"{self.progress_path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise PrimingAlreadyRunningError("Cache priming is already running in another worker")
+        self._lock_file = lock_file
+    
+    def _unlock(self) -> None:
+        """Release the run lock."""
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+    
+    def _write_progress(self) -> None:
+        """Atomically replace the shared progress file, logging failures."""
+        if self.progress_path is None:
+            return
+        tmp_path = f"{self.progress_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as handle:
+                handle.write(orjson.dumps(self.progress))
+            os.replace(tmp_path, self.progress_path)
+        except OSError as e:
+            logger.warning(f"Could not write priming progress: {str(e)}")
+    
+    def get_progress(self) -> Dict[str, Any]:
+        """
+        Progress of this worker's run, or else of the last run in any worker.
+        
+        A shared run still marked running whose lock is free ended without
+        recording it and is reported as interrupted.
+        """
+        if self.running or self.progress_path is None:
+            return self.progress
+        try:
+            with open(self.progress_path, "rb") as handle:
+                progress = orjson.loads(handle.read())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            return self.progress
+        if progress.get("status") == "running":
+            try:
+                self._lock()
+            except PrimingAlreadyRunningError:
+                return progress
+            self._unlock()
+            progress["status"] = "interrupted"
+        return progress
+    
+    def _reset(self, plan: PrimingPlan) -> None:
+        """Start the progress of a new run."""
+        self.progress = {
+            "status": "running",
+            "total": len(plan.texts),
+            "primed": 0,
+            "already_cached": 0,
+            "failed": 0,
+            **plan.get_report(),
+        }
+    
+    async def prime(
+        self,
+        plan: PrimingPlan,
+        batch_size: int,
+        batch_interval: float
+    ) -> Dict[str, Any]:
+        """
+        Score the plan's texts into the cache.
+        
+        Args:
+            plan: Texts to prime, most frequent first
+            batch_size: Texts scored concurrently
+            batch_interval: Seconds between batches
+        
+        Returns:
+            Counts of texts primed, already cached and failed
+        
+        Raises:
+            PrimingAlreadyRunningError: If another worker or process is priming
+        """
+        self._lock()
+        set_usage_endpoint("cache_priming", wait_for_budget=True)
+        service = get_sentiment_service()
+        started = time.monotonic()
+        self._reset(plan)
+        try:
+            for start in range(0, len(plan.texts), batch_size):
+                await self._yield_to_traffic(service, batch_interval)
+                batch = plan.texts[start:start + batch_size]
+                outcomes = await asyncio.gather(
+                    *(service.prime(text) for text in batch), return_exceptions=True
+                )
+                for outcome in outcomes:
+                    if isinstance(outcome, Exception):
+                        self.progress["failed"] += 1
+                    elif outcome:
+                        self.progress["primed"] += 1
+                    else:
+                        self.progress["already_cached"] += 1
+                await asyncio.to_thread(self._write_progress)
+                if start + batch_size < len(plan.texts):
+                    await asyncio.sleep(batch_interval)
+            self.progress["status"] = "completed"
+        except asyncio.CancelledError:
+            self.progress["status"] = "cancelled"
+            raise
+        finally:
+            self.progress["elapsed_seconds"] = round(time.monotonic() - started, 2)
+            logger.info(
+                f"Cache priming {self.progress['status']}: {self.progress['primed']} primed, "
+                f"{self.progress['already_cached']} already cached, "
+                f"{self.progress['failed']} failed"
+            )
+            # Written inline so a cancelled run still records how it ended
+            self._write_progress()
+            self._unlock()
+        return self.progress
+    
+    @staticmethod
+    async def _yield_to_traffic(service, batch_interval: float) -> None:
+        """Wait while live requests queue for upstream slots."""
+        limit = settings.shed_low_priority_wait_ms
+        while limit and service.queue_wait() * 1000 > limit:
+            await asyncio.sleep(max(batch_interval, 0.1))
+
+
+# Global cache primer instance
+_primer: Optional[CachePrimer] = None
+
+
+def get_cache_primer() -> CachePrimer:
+    """Get or create the cache primer."""
+    global _primer
+    if _primer is None:
+        _primer = CachePrimer(settings.priming_progress_path)
+    return _primer
@@ -0,0 +1,121 @@
+"""
+Splitting of long documents into analyzable chunks.
+
+Chunk boundaries are derived from the content itself. The document is cut
+into sentences (over-long ones split at whitespace), and a chunk closes
+after a sentence whose hash falls under a threshold, once the chunk has
+reached min_chars; sentences ending a paragraph are likelier boundaries.
+Whether a sentence is a boundary depends only on its own text, not on
+where the chunk started, so after an edit the chunks fall back into step
+at the next boundary and the unchanged chunks keep hitting the per-chunk
+cache. Chunks that would exceed max_chars are cut before the sentence
+that does not fit.
+"""
+import hashlib
+import re
+from typing import List, NamedTuple, Tuple
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Boundaries are expected every (max_chars - min_chars) / _BOUNDARY_SPACING
+# characters, so few chunks run into max_chars
+_BOUNDARY_SPACING = 3
+_PARAGRAPH_END_WEIGHT = 4
+
+
+class Chunk(NamedTuple):
+    """A chunk of a document with its character offsets."""
+    text: str
+    start: int
+    end: int
+
+
+def _spans(text: str, pattern: re.Pattern, offset: int = 0) -> List[Chunk]:
+    """Split text on a separator pattern, keeping offsets of non-blank parts."""
+    spans = []
+    position = 0
+    for match in pattern.finditer(text):
+        spans.append((position, match.start()))
+        position = match.end()
+    spans.append((position, len(text)))
+    
+    chunks = []
+    for start, end in spans:
+        part = text[start:end]
+        stripped = part.strip()
+        if stripped:
+            begin = offset + start + len(part) - len(part.lstrip())
+            chunks.append(Chunk(stripped, begin, begin + len(stripped)))
+    return chunks
+
+
+def _hard_split(chunk: Chunk, max_chars: int) -> List[Chunk]:
+    """Split an over-long sentence at the last whitespace before the limit."""
+    parts = []
+    text, start = chunk.text, chunk.start
+    while len(text) > max_chars:
+        cut = text.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        head = text[:cut].rstrip()
+        parts.append(Chunk(head, start, start + len(head)))
+        rest = text[cut:]
+        skipped = len(rest) - len(rest.lstrip())
+        start += cut + skipped
+        text = rest.lstrip()
+    if text:
+        parts.append(Chunk(text, start, start + len(text)))
+    return parts
+
+
+def _is_boundary(unit: Chunk, spacing: float, paragraph_end: bool) -> bool:
+    """Whether a chunk may close after this unit, decided by its text alone."""
+    digest = hashlib.blake2b(unit.text.encode("utf-8"), digest_size=8).digest()
+    weight = _PARAGRAPH_END_WEIGHT if paragraph_end else 1
+    return int.from_bytes(digest, "big") / 2**64 < weight * len(unit.text) / spacing
+
+
+def _pack(
+    units: List[Tuple[Chunk, bool]], source: str, min_chars: int, max_chars: int
+) -> List[Chunk]:
+    """Group consecutive units into chunks closed at content-defined boundaries."""
+    spacing = max(1.0, (max_chars - min_chars) / _BOUNDARY_SPACING)
+    chunks: List[Chunk] = []
+    start = end = None
+    for unit, paragraph_end in units:
+        if start is not None and unit.end - start > max_chars:
+            chunks.append(Chunk(source[start:end], start, end))
+            start = None
+        if start is None:
+            start = unit.start
+        end = unit.end
+        if end - start >= min_chars and _is_boundary(unit, spacing, paragraph_end):
+            chunks.append(Chunk(source[start:end], start, end))
+            start = None
+    if start is not None:
+        chunks.append(Chunk(source[start:end], start, end))
+    return chunks
+
+
+def split_into_chunks(text: str, max_chars: int, min_chars: int) -> List[Chunk]:
+    """
+    Split a document into chunks of at most max_chars characters.
+    
+    Args:
+        text: The document text
+        max_chars: Maximum chunk length
+        min_chars: Chunks are not closed before reaching this length
+    
+    Returns:
+        Chunks in document order with offsets into the original text
+    """
+    units: List[Tuple[Chunk, bool]] = []
+    for paragraph in _spans(text, _PARAGRAPH_BREAK):
+        sentences: List[Chunk] = []
+        for sentence in _spans(paragraph.text, _SENTENCE_END, paragraph.start):
+            sentences.extend(_hard_split(sentence, max_chars))
+        units.extend((sentence, False) for sentence in sentences[:-1])
+        units.append((sentences[-1], True))
+    
+    return _pack(units, text, min_chars, max_chars)
@@ -0,0 +1,196 @@
+"""
+Fault and latency injection between the service and the LLM backend.
+
+For resilience benchmarking only. A scenario file (JSON, see
+benchmarks/scenarios) describes phases that run one after another and,
+with "repeat", start over. Each phase sets the extra latency added to
+every upstream call and the fraction of calls that fail with an HTTP
+error, time out, or return output the parser cannot read:
+
+    {
+        "name": "rate-limit-storm",
+        "phases": [
+            {"name": "calm", "duration": 5, "latency_ms": 200},
+            {"name": "storm", "duration": 10, "error_rate": 0.6,
+             "error_statuses": [429], "retry_after": 1}
+        ]
+    }
+
+Injected errors are the OpenAI client's own exception types with a
+synthetic response, so retries, Retry-After, ejection and fallback
+behave as they would against a real provider. Enabled by pointing
+settings.fault_scenario_path at a scenario; refused in production.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional
+
+import httpx
+import openai
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+_STATUS_ERRORS = {
+    400: openai.BadRequestError,
+    401: openai.AuthenticationError,
+    403: openai.PermissionDeniedError,
+    404: openai.NotFoundError,
+    409: openai.ConflictError,
+    422: openai.UnprocessableEntityError,
+    429: openai.RateLimitError,
+}
+_REQUEST = httpx.Request("POST", "http://fault-injection/v1/chat/completions")
+MALFORMED_KINDS = ("truncated", "prose", "wrong_schema")
+
+
+class FaultPhase(BaseModel):
+    """Faults injected during one period of a scenario."""
+    name: str = ""
+    duration: float = Field(..., gt=0.0)
+    latency_ms: float = Field(default=0.0, ge=0.0)
+    latency_distribution: Literal["fixed", "exponential", "lognormal"] = "fixed"
+    latency_sigma: float = Field(default=1.0, gt=0.0)
+    error_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+    error_statuses: List[int] = Field(default=[503], min_length=1)
+    retry_after: Optional[float] = Field(default=None, ge=0.0)
+    timeout_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+    timeout_ms: float = Field(default=10000.0, ge=0.0)
+    malformed_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+
+
+class FaultScenario(BaseModel):
+    """A named schedule of fault phases."""
+    name: str
+    description: str = ""
+    repeat: bool = True
+    seed: Optional[int] = None
+    phases: List[FaultPhase] = Field(..., min_length=1)
+
+
+def status_error(status: int, retry_after: Optional[float] = None) -> openai.APIStatusError:
+    """The error the OpenAI client raises for an HTTP status."""
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    response = httpx.Response(status, request=_REQUEST, headers=headers)
+    error_type = _STATUS_ERRORS.get(status)
+    if error_type is None:
+        error_type = openai.InternalServerError if status >= 500 else openai.APIStatusError
+    return error_type(f"Injected HTTP {status}", response=response, body=None)
+
+
+def malformed(message: AIMessage, kind: str) -> AIMessage:
+    """Corrupt a model message so the output parser rejects it."""
+    if kind == "truncated":
+        content = str(message.content)[:max(1, len(str(message.content)) // 2)]
+    elif kind == "prose":
+        content = "The sentiment of this text is mostly positive, I would say."
+    else:
+        content = '{"label": "good", "score": "high"}'
+    return AIMessage(content=content, usage_metadata=message.usage_metadata)
+
+
+class FaultInjector:
+    """Applies a scenario's faults to upstream calls."""
+    
+    def __init__(self, scenario: FaultScenario, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the injector; the schedule starts with the first call.
+        
+        Args:
+            scenario: Phases to run
+            clock: Monotonic time source
+        """
+        self.scenario = scenario
+        self._clock = clock
+        self._random = random.Random(scenario.seed)
+        self._started: Optional[float] = None
+        self._cycle = sum(phase.duration for phase in scenario.phases)
+        self.calls = 0
+        self.injected: Dict[str, int] = {"latency": 0, "error": 0, "timeout": 0, "malformed": 0}
+    
+    def phase(self) -> Optional[FaultPhase]:
+        """The phase in effect now, or None once a non-repeating scenario ends."""
+        now = self._clock()
+        if self._started is None:
+            self._started = now
+        elapsed = now - self._started
+        if elapsed >= self._cycle:
+            if not self.scenario.repeat:
+                return None
+            elapsed %= self._cycle
+        for phase in self.scenario.phases:
+            if elapsed < phase.duration:
+                return phase
+            elapsed -= phase.duration
+        return self.scenario.phases[-1]
+    
+    def _latency(self, phase: FaultPhase) -> float:
+        """Sample the added latency in seconds."""
+        if not phase.latency_ms:
+            return 0.0
+        if phase.latency_distribution == "exponential":
+            return self._random.expovariate(1000 / phase.latency_ms)
+        if phase.latency_distribution == "lognormal":
+            # latency_ms is the median
+            return phase.latency_ms / 1000 * self._random.lognormvariate(0.0, phase.latency_sigma)
+        return phase.latency_ms / 1000
+    
+    async def call(self, func: Callable[[], Awaitable[AIMessage]]) -> AIMessage:
+        """
+        Make an upstream call with the current phase's faults.
+        
+        Raises:
+            openai.APIStatusError: Injected HTTP error
+            openai.APITimeoutError: Injected timeout
+        """
+        self.calls += 1
+        phase = self.phase()
+        if phase is None:
+            return await func()
+        
+        delay = self._latency(phase)
+        if delay:
+            self.injected["latency"] += 1
+            await asyncio.sleep(delay)
+        
+        roll = self._random.random()
+        if roll < phase.error_rate:
+            self.injected["error"] += 1
+            raise status_error(self._random.choice(phase.error_statuses), phase.retry_after)
+        roll -= phase.error_rate
+        if roll < phase.timeout_rate:
+            self.injected["timeout"] += 1
+            await asyncio.sleep(phase.timeout_ms / 1000)
+            raise openai.APITimeoutError(request=_REQUEST)
+        roll -= phase.timeout_rate
+        
+        message = await func()
+        if roll < phase.malformed_rate:
+            self.injected["malformed"] += 1
+            return malformed(message, self._random.choice(MALFORMED_KINDS))
+        return message
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Scenario, current phase and injected fault counts."""
+        phase = self.phase() if self._started is not None else self.scenario.phases[0]
+        return {
+            "scenario": self.scenario.name,
+            "phase": phase.name if phase is not None else None,
+            "calls": self.calls,
+            "injected": dict(self.injected),
+        }
+
+
+def load_scenario(path: str) -> FaultScenario:
+    """
+    Read a scenario file.
+    
+    Raises:
+        OSError: If the file cannot be read
+        pydantic.ValidationError: If the scenario is invalid
+    """
+    with open(path, "rb") as handle:
+        return FaultScenario.model_validate_json(handle.read())
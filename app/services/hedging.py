@@ -0,0 +1,110 @@
+"""
+Hedged upstream calls for tail latency.
+
+If a call has not finished after settings.hedge_percentile of the
+model's recent latency, a second identical call is started. The upstream
+pool sends it to the least loaded member, which is usually not the one
+holding the stalled call. The first successful result wins and the other
+call is cancelled. If one call fails, the other is still awaited.
+
+Hedges are paid for with a RetryBudget: they may not exceed
+settings.hedge_max_ratio of the calls in the budget window, so a general
+slowdown cannot double upstream load.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from app.services.retry_policy import RetryBudget
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_DELAY_REFRESH_SECONDS = 1.0
+
+
+class Hedger:
+    """Issues a backup call when the first one is slower than usual."""
+    
+    def __init__(self, percentile: float, min_samples: int, budget: RetryBudget):
+        """
+        Initialize the hedger.
+        
+        Args:
+            percentile: Latency percentile after which to hedge
+            min_samples: Latencies needed before hedging starts
+            budget: Budget capping hedges as a fraction of calls
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget = budget
+        self._delays: Dict[str, Tuple[float, Optional[float]]] = {}
+        self.hedges = 0
+        self.hedge_wins = 0
+    
+    def delay(self, key: str, latencies: Sequence[float]) -> Optional[float]:
+        """
+        Seconds to wait before hedging a call, refreshed once a second.
+        
+        Returns:
+            None while there are too few latencies to judge
+        """
+        now = time.monotonic()
+        cached = self._delays.get(key)
+        if cached is not None and now - cached[0] < _DELAY_REFRESH_SECONDS:
+            return cached[1]
+        delay = None
+        if len(latencies) >= self.min_samples:
+            delay = float(np.percentile(np.fromiter(latencies, dtype=float), self.percentile))
+        self._delays[key] = (now, delay)
+        return delay
+    
+    async def call(self, func: Callable[[], Awaitable[T]], delay: Optional[float]) -> T:
+        """
+        Call func, starting a second call if the first exceeds delay.
+        
+        Raises:
+            Exception: The last error if every call fails
+        """
+        if delay is None:
+            return await func()
+        self.budget.record_call()
+        first = asyncio.ensure_future(func())
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or not self.budget.try_retry():
+                return await first
+            
+            self.hedges += 1
+            pending.add(asyncio.ensure_future(func()))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hedge counters, current delays and budget."""
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "delays_ms": {
+                key: round(delay * 1000, 2)
+                for key, (_, delay) in self._delays.items()
+                if delay is not None
+            },
+            "budget": self.budget.get_stats(),
+        }
@@ -0,0 +1,349 @@
+"""
+Background job processing for large batch submissions.
+
+Jobs are persisted under settings.job_storage_dir, one directory per job:
+    meta.json       status and progress
+    inputs.jsonl    submitted texts, one JSON string per line
+    results.jsonl   results in input order, appended as they complete
+    claim.lock      flock held by the worker process that owns the job
+
+A bounded pool of worker tasks drains queued jobs through the sentiment
+service. Because progress is derived from results.jsonl, jobs that were
+queued or running when a worker stopped are resumed on the next start.
+
+Under the multi-worker launcher every worker process shares the storage
+directory. A worker owns a job while it holds the job's claim lock, from
+creation or recovery until the job finishes or the worker stops, so no
+job runs twice. Workers rescan the directory periodically to pick up jobs
+released by a stopped worker, and status requests for jobs owned by
+another worker are answered from meta.json.
+"""
+import asyncio
+import fcntl
+import logging
+import os
+import time
+import uuid
+from itertools import islice
+from typing import Any, Dict, List, Optional, Set
+
+import orjson
+
+from app.config import settings
+from app.models import JobStatus
+from app.services.sentiment_service import get_sentiment_service
+from app.services.token_budget import set_usage_endpoint
+
+logger = logging.getLogger(__name__)
+
+_RESCAN_INTERVAL = 30.0
+_FINISHED = (JobStatus.COMPLETED, JobStatus.FAILED)
+
+
+class JobNotFoundError(KeyError):
+    """Raised when a job id does not exist."""
+
+
+class JobManager:
+    """
+    Persists jobs to local storage and processes them with a bounded
+    pool of background workers.
+    """
+    
+    def __init__(self, storage_dir: str):
+        """Initialize the manager for a storage directory."""
+        self.storage_dir = storage_dir
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._claims: Dict[str, int] = {}
+        self._running: Set[str] = set()
+        self._draining = False
+    
+    def _job_dir(self, job_id: str) -> str:
+        """Directory holding a job's files."""
+        return os.path.join(self.storage_dir, job_id)
+    
+    def _write_meta(self, job_id: str, meta: Dict[str, Any]) -> None:
+        """Atomically persist job metadata."""
+        meta["updated_at"] = time.time()
+        path = os.path.join(self._job_dir(job_id), "meta.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(orjson.dumps(meta))
+        os.replace(tmp_path, path)
+        self._meta[job_id] = meta
+    
+    async def _save_meta(self, job_id: str, meta: Dict[str, Any]) -> None:
+        """Persist job metadata without blocking the event loop."""
+        await asyncio.to_thread(self._write_meta, job_id, meta)
+    
+    def _read_meta(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Read job metadata from disk, or None if the job does not exist."""
+        try:
+            with open(os.path.join(self._job_dir(job_id), "meta.json"), "rb") as handle:
+                return orjson.loads(handle.read())
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+    
+    def _claim(self, job_id: str) -> bool:
+        """Take the job's claim lock unless another worker holds it."""
+        if job_id in self._claims:
+            return True
+        path = os.path.join(self._job_dir(job_id), "claim.lock")
+        fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._claims[job_id] = fd
+        return True
+    
+    def _release(self, job_id: str) -> None:
+        """Give up the job's claim lock."""
+        fd = self._claims.pop(job_id, None)
+        if fd is not None:
+            os.close(fd)
+    
+    def _count_results(self, job_id: str) -> int:
+        """Count complete result lines, dropping a trailing partial line."""
+        path = os.path.join(self._job_dir(job_id), "results.jsonl")
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r+b") as handle:
+            data = handle.read()
+            complete = data.rfind(b"\n") + 1
+            if complete != len(data):
+                handle.truncate(complete)
+        return data.count(b"\n", 0, complete)
+    
+    async def start(self) -> None:
+        """Recover persisted jobs and start the worker pool."""
+        os.makedirs(self.storage_dir, exist_ok=True)
+        self._queue = asyncio.Queue()
+        self._draining = False
+        recovered = await asyncio.to_thread(self._recover)
+        for job_id in recovered:
+            self._queue.put_nowait(job_id)
+        
+        for index in range(settings.job_workers):
+            self._workers.append(
+                asyncio.create_task(self._worker(), name=f"job-worker-{index}")
+            )
+        self._workers.append(asyncio.create_task(self._rescan(), name="job-rescan"))
+        logger.info(
+            f"Job manager started with {settings.job_workers} worker(s), "
+            f"{len(recovered)} job(s) resumed"
+        )
+    
+    def _recover(self) -> List[str]:
+        """Claim unfinished jobs no other worker owns and return their ids."""
+        unfinished = []
+        for job_id in sorted(os.listdir(self.storage_dir)):
+            if job_id in self._claims or job_id in self._meta:
+                continue
+            meta = self._read_meta(job_id)
+            if meta is None:
+                continue
+            if meta["status"] in _FINISHED:
+                self._meta[job_id] = meta
+            elif self._claim(job_id):
+                meta["completed"] = self._count_results(job_id)
+                meta["status"] = JobStatus.QUEUED
+                self._write_meta(job_id, meta)
+                unfinished.append(job_id)
+        return unfinished
+    
+    async def _rescan(self) -> None:
+        """Periodically resume jobs released by workers that stopped."""
+        while True:
+            await asyncio.sleep(_RESCAN_INTERVAL)
+            if self._draining:
+                continue
+            for job_id in await asyncio.to_thread(self._recover):
+                logger.info(f"Job {job_id} resumed from another worker")
+                self._queue.put_nowait(job_id)
+    
+    async def stop(self) -> None:
+        """Stop the worker pool and release claims; unfinished jobs resume on the next start."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        for job_id in list(self._claims):
+            self._meta.pop(job_id, None)
+            self._release(job_id)
+        logger.info("Job manager stopped")
+    
+    async def drain(self, timeout: float) -> Dict[str, int]:
+        """
+        Let running jobs finish their current chunk, then stop the workers.
+        
+        Jobs pause between chunks with their progress saved and resume on
+        the next start. Jobs still mid-chunk at the deadline are cancelled
+        and redo that chunk on resume.
+        
+        Args:
+            timeout: Seconds to wait for running chunks
+        
+        Returns:
+            Jobs paused between chunks and jobs interrupted mid-chunk
+        """
+        self._draining = True
+        running = len(self._running)
+        deadline = time.monotonic() + timeout
+        while self._running and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        interrupted = len(self._running)
+        await self.stop()
+        return {"jobs_paused": running - interrupted, "jobs_interrupted": interrupted}
+    
+    async def create_job(self, texts: List[str]) -> Dict[str, Any]:
+        """Persist a new job and queue it for processing."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        meta = {
+            "job_id": job_id,
+            "status": JobStatus.QUEUED,
+            "total": len(texts),
+            "completed": 0,
+            "created_at": now,
+            "updated_at": now,
+            "error": None,
+        }
+        
+        def _persist() -> None:
+            os.makedirs(self._job_dir(job_id))
+            self._claim(job_id)
+            with open(os.path.join(self._job_dir(job_id), "inputs.jsonl"), "wb") as handle:
+                handle.writelines(orjson.dumps(text) + b"\n" for text in texts)
+            self._write_meta(job_id, meta)
+        
+        await asyncio.to_thread(_persist)
+        await self._queue.put(job_id)
+        logger.info(f"Job {job_id} queued with {len(texts)} text(s)")
+        return meta
+    
+    async def get_job(self, job_id: str) -> Dict[str, Any]:
+        """
+        Get job metadata, from memory for jobs this worker owns or that
+        have finished, and from disk for jobs owned by another worker.
+        
+        Raises:
+            JobNotFoundError: If the job does not exist
+        """
+        meta = self._meta.get(job_id)
+        if meta is not None and (job_id in self._claims or meta["status"] in _FINISHED):
+            return meta
+        meta = await asyncio.to_thread(self._read_meta, job_id)
+        if meta is None:
+            raise JobNotFoundError(job_id)
+        return meta
+    
+    async def get_results(self, job_id: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        """
+        Read a page of results in input order.
+        
+        Raises:
+            JobNotFoundError: If the job does not exist
+        """
+        await self.get_job(job_id)
+        path = os.path.join(self._job_dir(job_id), "results.jsonl")
+        
+        def _read() -> List[Dict[str, Any]]:
+            if not os.path.exists(path):
+                return []
+            with open(path, "rb") as handle:
+                return [orjson.loads(line) for line in islice(handle, offset, offset + limit)]
+        
+        return await asyncio.to_thread(_read)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Queue and job counts."""
+        stats = {
+            "jobs_pending": self._queue.qsize() if self._queue is not None else 0,
+            "job_workers": len(self._workers)
+        }
+        for status in JobStatus:
+            stats[f"jobs_{status.value}"] = sum(
+                1 for meta in self._meta.values() if meta["status"] == status
+            )
+        return stats
+    
+    async def _worker(self) -> None:
+        """Process queued jobs one at a time."""
+        set_usage_endpoint("jobs", wait_for_budget=True)
+        while True:
+            job_id = await self._queue.get()
+            self._running.add(job_id)
+            try:
+                await self._run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+                meta = self._meta[job_id]
+                meta["status"] = JobStatus.FAILED
+                meta["error"] = str(e)
+                await self._save_meta(job_id, meta)
+            finally:
+                self._running.discard(job_id)
+                if self._meta.get(job_id, {}).get("status") in _FINISHED:
+                    self._release(job_id)
+                self._queue.task_done()
+    
+    async def _run_job(self, job_id: str) -> None:
+        """Score a job's remaining texts in chunks, appending results in order."""
+        service = get_sentiment_service()
+        meta = self._meta[job_id]
+        meta["status"] = JobStatus.RUNNING
+        await self._save_meta(job_id, meta)
+        
+        job_dir = self._job_dir(job_id)
+        chunk_size = settings.job_concurrency
+        
+        with open(os.path.join(job_dir, "inputs.jsonl"), "rb") as inputs, \
+                open(os.path.join(job_dir, "results.jsonl"), "ab") as results:
+            lines = islice(inputs, meta["completed"], None)
+            index = meta["completed"]
+            while True:
+                if self._draining:
+                    logger.info(f"Job {job_id} paused for shutdown at {index}/{meta['total']}")
+                    return
+                chunk = [orjson.loads(line) for line in islice(lines, chunk_size)]
+                if not chunk:
+                    break
+                
+                outputs = await asyncio.gather(
+                    *(service.analyze_sentiment(text, record=False) for text in chunk)
+                )
+                results.write(b"".join(
+                    orjson.dumps({"index": index + offset, **output.model_dump(mode="json")})
+                    + b"\n"
+                    for offset, output in enumerate(outputs)
+                ))
+                results.flush()
+                
+                index += len(chunk)
+                meta["completed"] = index
+                await self._save_meta(job_id, meta)
+        
+        meta["status"] = JobStatus.COMPLETED
+        await self._save_meta(job_id, meta)
+        logger.info(f"Job {job_id} completed ({meta['total']} text(s))")
+
+
+# Global job manager instance
+_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """
+    Get or create the job manager.
+    Singleton pattern so routes and the lifespan share one worker pool.
+    """
+    global _manager
+    if _manager is None:
+        _manager = JobManager(settings.job_storage_dir)
+    return _manager
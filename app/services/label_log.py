@@ -0,0 +1,93 @@
+"""
+Append-only log of LLM-labelled texts used to train the local model.
+
+Each line is a JSON object with the raw request text as received, the
+LLM's sentiment and confidence, and the model that produced them; no
+client or request metadata is kept. Because it stores user text, the log
+is off unless settings.label_log_enabled is set. Lines are written with
+a single O_APPEND write so several worker processes can share one file.
+
+The file stops growing at max_bytes: further labels are dropped, with one
+warning, until it is moved aside or removed (for example after training),
+at which point a new file is started.
+"""
+import logging
+import os
+from typing import Any, Dict, Iterator
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class LabelLog:
+    """Appends labelled texts to a JSONL file."""
+    
+    def __init__(self, path: str, max_bytes: int):
+        """
+        Initialize the log; the file is opened on first write.
+        
+        Args:
+            path: Label log file
+            max_bytes: Size at which labels stop being appended
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._fd = None
+        self._full = False
+        self.written = 0
+        self.dropped = 0
+    
+    def append(self, text: str, sentiment: str, confidence: float, model: str) -> None:
+        """Append one labelled text; failures are logged and ignored."""
+        line = orjson.dumps({
+            "text": text,
+            "sentiment": sentiment,
+            "confidence": confidence,
+            "model": model
+        }) + b"\n"
+        try:
+            if self._fd is not None and not self._is_current():
+                # Moved aside or removed, for example after training: start a new file
+                self.close()
+            if self._fd is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            if os.fstat(self._fd).st_size + len(line) > self.max_bytes:
+                self.dropped += 1
+                if not self._full:
+                    logger.warning(
+                        f"Label log {self.path} reached {self.max_bytes} bytes, dropping labels"
+                    )
+                    self._full = True
+                return
+            self._full = False
+            os.write(self._fd, line)
+            self.written += 1
+        except OSError as e:
+            logger.warning(f"Could not write label log {self.path}: {str(e)}")
+    
+    def _is_current(self) -> bool:
+        """Whether the open file is still the one at the log's path."""
+        try:
+            return os.stat(self.path).st_ino == os.fstat(self._fd).st_ino
+        except FileNotFoundError:
+            return False
+    
+    def close(self) -> None:
+        """Close the underlying file."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def read_labels(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield labelled records, skipping malformed lines."""
+    with open(path, "rb") as handle:
+        for line in handle:
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and "text" in record and "sentiment" in record:
+                yield record
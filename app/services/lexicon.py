@@ -0,0 +1,63 @@
+"""
+Keyword lexicon shared by the fallback analysis and the model router.
+"""
+import re
+from typing import Tuple
+
+from app.models import SentimentLabel
+
+POSITIVE_WORDS = ["love", "great", "excellent", "amazing", "wonderful", "good", "best"]
+NEGATIVE_WORDS = ["hate", "terrible", "awful", "horrible", "worst", "bad", "disappointing"]
+
+_NEGATION = re.compile(r"\b(not|no|never|hardly|barely|without)\b|n't\b")
+_CONTRAST = re.compile(r"\b(but|however|although|though|yet|except|despite)\b")
+_IRONY = re.compile(r"\b(oh great|yeah right|just what i needed|thanks a lot)\b|!\?|\?!|\.\.\.")
+
+
+def keyword_counts(text_lower: str) -> Tuple[int, int]:
+    """Count positive and negative keywords in lowercased text."""
+    positive = sum(1 for word in POSITIVE_WORDS if word in text_lower)
+    negative = sum(1 for word in NEGATIVE_WORDS if word in text_lower)
+    return positive, negative
+
+
+def keyword_sentiment(text: str) -> Tuple[SentimentLabel, float, str]:
+    """Keyword-based sentiment, confidence and explanation for the fallback analysis."""
+    positive_count, negative_count = keyword_counts(text.lower())
+    
+    if positive_count > negative_count:
+        sentiment = SentimentLabel.POSITIVE
+        confidence = min(0.6, 0.4 + (positive_count * 0.1))
+        explanation = f"Text contains {positive_count} positive keyword(s). (Fallback analysis)"
+    elif negative_count > positive_count:
+        sentiment = SentimentLabel.NEGATIVE
+        confidence = min(0.6, 0.4 + (negative_count * 0.1))
+        explanation = f"Text contains {negative_count} negative keyword(s). (Fallback analysis)"
+    else:
+        sentiment = SentimentLabel.NEUTRAL
+        confidence = 0.5
+        explanation = "No strong sentiment indicators detected. (Fallback analysis)"
+    
+    return sentiment, confidence, explanation
+
+
+def estimate_ambiguity(text: str) -> float:
+    """
+    Cheap local estimate (0-1) of how hard a text is to classify.
+    
+    Mixed positive and negative cues, negation, contrast and irony markers
+    each raise the estimate; plain one-sided text stays near zero.
+    """
+    text_lower = text.lower()
+    positive, negative = keyword_counts(text_lower)
+    
+    score = 0.0
+    if positive and negative:
+        score += 0.5 * min(positive, negative) / max(positive, negative) + 0.1
+    if _NEGATION.search(text_lower):
+        score += 0.25
+    if _CONTRAST.search(text_lower):
+        score += 0.25
+    if _IRONY.search(text_lower):
+        score += 0.25
+    return min(score, 1.0)
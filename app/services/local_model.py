@@ -0,0 +1,204 @@
+"""
+Lightweight local sentiment classifier distilled from LLM labels.
+
+Texts are represented as hashed word unigrams and bigrams and classified
+with multinomial logistic regression in NumPy. Probabilities are
+calibrated with a single temperature fitted on held-out labels, so the
+serving threshold can be read as an expected accuracy.
+"""
+import logging
+import os
+import re
+import zlib
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models import SentimentLabel
+
+logger = logging.getLogger(__name__)
+
+LABELS: List[SentimentLabel] = list(SentimentLabel)
+_TOKEN = re.compile(r"[a-z0-9']+|[!?]")
+_TEMPERATURES = np.linspace(0.25, 4.0, 76)
+
+
+def hash_features(text: str, dims: int) -> np.ndarray:
+    """Hashed unigram and bigram feature indices for a text."""
+    tokens = _TOKEN.findall(text.lower())
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not grams:
+        return np.zeros(0, dtype=np.int64)
+    return np.fromiter(
+        (zlib.crc32(gram.encode("utf-8")) % dims for gram in grams),
+        dtype=np.int64,
+        count=len(grams)
+    )
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    """Row-wise softmax."""
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class _Batch:
+    """Hashed features for a set of texts in compressed row form."""
+    
+    def __init__(self, rows: Sequence[np.ndarray]):
+        """Concatenate per-text feature indices."""
+        lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+        self.indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        self.row_ids = np.repeat(np.arange(len(rows)), lengths)
+        # Scale by 1/sqrt(length) so long and short texts have similar magnitude
+        self.scale = 1.0 / np.sqrt(np.maximum(lengths, 1))
+        self.size = len(rows)
+    
+    def logits(self, weights: np.ndarray, bias: np.ndarray) -> np.ndarray:
+        """Compute class logits for every row."""
+        sums = np.zeros((self.size, weights.shape[1]))
+        np.add.at(sums, self.row_ids, weights[self.indices])
+        return sums * self.scale[:, None] + bias
+
+
+class LocalSentimentModel:
+    """Multinomial logistic regression over hashed n-gram features."""
+    
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, temperature: float = 1.0):
+        """Initialize from trained parameters."""
+        self.weights = weights
+        self.bias = bias
+        self.temperature = temperature
+        self.dims = weights.shape[0]
+    
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[SentimentLabel],
+        sample_weights: Optional[Sequence[float]] = None,
+        dims: int = 2 ** 18,
+        epochs: int = 5,
+        learning_rate: float = 0.5,
+        l2: float = 1e-6,
+        batch_size: int = 256,
+        seed: int = 0
+    ) -> "LocalSentimentModel":
+        """
+        Fit the classifier with mini-batch gradient descent.
+        
+        Args:
+            texts: Training texts
+            labels: Label for each text
+            sample_weights: Optional per-text weights, such as LLM confidence
+            dims: Number of hashed feature buckets
+            epochs: Passes over the training data
+            learning_rate: Step size
+            l2: L2 regularization strength
+            batch_size: Texts per gradient step
+            seed: Shuffling seed
+        
+        Returns:
+            The trained model, with temperature 1.0
+        """
+        rows = [hash_features(text, dims) for text in texts]
+        targets = np.array([LABELS.index(SentimentLabel(label)) for label in labels])
+        if sample_weights is None:
+            sample_weights = np.ones(len(rows))
+        sample_weights = np.asarray(sample_weights, dtype=float)
+        
+        weights = np.zeros((dims, len(LABELS)))
+        bias = np.zeros(len(LABELS))
+        rng = np.random.default_rng(seed)
+        
+        for _ in range(epochs):
+            order = rng.permutation(len(rows))
+            for start in range(0, len(order), batch_size):
+                picked = order[start:start + batch_size]
+                batch = _Batch([rows[i] for i in picked])
+                probs = _softmax(batch.logits(weights, bias))
+                probs[np.arange(batch.size), targets[picked]] -= 1.0
+                errors = probs * (sample_weights[picked] / batch.size)[:, None]
+                
+                # Sparse update: only buckets present in the batch change
+                touched, inverse = np.unique(batch.indices, return_inverse=True)
+                grad = np.zeros((len(touched), len(LABELS)))
+                np.add.at(grad, inverse, (errors * batch.scale[:, None])[batch.row_ids])
+                weights[touched] -= learning_rate * (grad + l2 * weights[touched])
+                bias -= learning_rate * errors.sum(axis=0)
+        
+        return cls(weights, bias)
+    
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Calibrated class probabilities for each text."""
+        batch = _Batch([hash_features(text, self.dims) for text in texts])
+        return _softmax(batch.logits(self.weights, self.bias) / self.temperature)
+    
+    def predict(self, text: str) -> Tuple[SentimentLabel, float]:
+        """Predict the label and calibrated confidence for one text."""
+        probs = self.predict_proba([text])[0]
+        best = int(probs.argmax())
+        return LABELS[best], float(probs[best])
+    
+    def calibrate(self, texts: Sequence[str], labels: Sequence[SentimentLabel]) -> float:
+        """
+        Fit the softmax temperature on held-out labels by minimizing
+        negative log-likelihood over a grid.
+        
+        Returns:
+            The chosen temperature
+        """
+        batch = _Batch([hash_features(text, self.dims) for text in texts])
+        logits = batch.logits(self.weights, self.bias)
+        targets = np.array([LABELS.index(SentimentLabel(label)) for label in labels])
+        
+        def nll(temperature: float) -> float:
+            probs = _softmax(logits / temperature)
+            return float(-np.log(probs[np.arange(len(targets)), targets] + 1e-12).mean())
+        
+        self.temperature = float(min(_TEMPERATURES, key=nll))
+        return self.temperature
+    
+    def save(self, path: str) -> None:
+        """Atomically write the model so a serving process never reads a partial file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as handle:
+            np.savez_compressed(
+                handle,
+                weights=self.weights.astype(np.float32),
+                bias=self.bias,
+                temperature=np.array(self.temperature)
+            )
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> "LocalSentimentModel":
+        """Load a model written by save."""
+        with np.load(path) as data:
+            return cls(data["weights"], data["bias"], float(data["temperature"]))
+
+
+def evaluate(
+    model: LocalSentimentModel,
+    texts: Sequence[str],
+    labels: Iterable[SentimentLabel],
+    threshold: float
+) -> dict:
+    """
+    Accuracy overall and on the texts the model would serve at a threshold.
+    
+    Returns:
+        Dictionary with accuracy, coverage and served_accuracy
+    """
+    probs = model.predict_proba(texts)
+    predicted = probs.argmax(axis=1)
+    targets = np.array([LABELS.index(SentimentLabel(label)) for label in labels])
+    correct = predicted == targets
+    served = probs.max(axis=1) >= threshold
+    return {
+        "accuracy": round(float(correct.mean()), 4) if len(targets) else 0.0,
+        "coverage": round(float(served.mean()), 4) if len(targets) else 0.0,
+        "served_accuracy": round(float(correct[served].mean()), 4) if served.any() else 0.0,
+    }
@@ -0,0 +1,220 @@
+"""
+Executor offload for CPU-bound local scoring.
+
+The keyword fallback and the distilled local model run off the event loop
+in a thread or process pool (settings.local_scoring_executor). Concurrent
+calls are collected into batches of up to settings.local_scoring_batch_size
+items, waiting at most settings.local_scoring_batch_wait_ms for a batch to
+fill, so one executor round trip (and, for processes, one pickle) is paid
+per batch rather than per text.
+
+Batch functions run in worker processes, so they are module-level and
+take only picklable arguments.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.models import SentimentLabel
+from app.services.lexicon import keyword_sentiment
+from app.services.local_model import LocalSentimentModel
+
+logger = logging.getLogger(__name__)
+
+_UTILIZATION_WINDOW = 60.0
+
+# Models loaded in this process, keyed by (path, mtime)
+_loaded_models: Dict[Tuple[str, float], LocalSentimentModel] = {}
+
+
+def fallback_batch(texts: Sequence[str]) -> List[Tuple[SentimentLabel, float, str]]:
+    """Keyword fallback for a batch of texts."""
+    return [keyword_sentiment(text) for text in texts]
+
+
+def predict_batch(model: Any, texts: Sequence[str]) -> List[Tuple[SentimentLabel, float]]:
+    """
+    Local model predictions for a batch of texts.
+    
+    Args:
+        model: A LocalSentimentModel, or a (path, mtime) pair that worker
+            processes load once and keep
+        texts: Texts to score
+    """
+    if not isinstance(model, LocalSentimentModel):
+        if model not in _loaded_models:
+            _loaded_models.clear()
+            _loaded_models[model] = LocalSentimentModel.load(model[0])
+        model = _loaded_models[model]
+    probs = model.predict_proba(texts)
+    best = probs.argmax(axis=1)
+    labels = list(SentimentLabel)
+    return [(labels[int(i)], float(probs[row, i])) for row, i in enumerate(best)]
+
+
+def _timed(func: Callable, args: Tuple, items: List[Any]) -> Tuple[List[Any], float]:
+    """Run a batch function and measure its busy time in the worker."""
+    started = time.perf_counter()
+    results = func(*args, items)
+    return results, time.perf_counter() - started
+
+
+class LocalScoringPool:
+    """Batches local scoring calls and runs them on an executor."""
+    
+    def __init__(self, mode: str, workers: int, batch_size: int, batch_wait: float):
+        """
+        Initialize the pool.
+        
+        Args:
+            mode: "thread", "process" or "inline" (run on the event loop)
+            workers: Executor size; 0 sizes it to the CPU count
+            batch_size: Maximum items per batch
+            batch_wait: Seconds to wait for a batch to fill
+        """
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._executor: Optional[Executor] = None
+        self._pending: Dict[Tuple, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Tuple, asyncio.TimerHandle] = {}
+        self._busy: Deque[Tuple[float, float]] = deque()
+        self._started = time.monotonic()
+        self.queued_items = 0
+        self.running_batches = 0
+        self.batches = 0
+        self.items = 0
+    
+    def _get_executor(self) -> Executor:
+        """Create the executor on first use."""
+        if self._executor is None:
+            if self.mode == "process":
+                # Spawned workers do not inherit the parent's threads or locks
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="local-scoring"
+                )
+            logger.info(f"Local scoring {self.mode} pool started with {self.workers} worker(s)")
+        return self._executor
+    
+    async def submit(self, func: Callable, args: Tuple, item: Any) -> Any:
+        """
+        Score one item with a batch function, batched with concurrent calls.
+        
+        Args:
+            func: Module-level function called as func(*args, items)
+            args: Arguments shared by the batch; calls with different
+                arguments are batched separately
+            item: The item to score
+        
+        Returns:
+            The batch function's result for this item
+        """
+        if self.mode == "inline":
+            return func(*args, [item])[0]
+        
+        loop = asyncio.get_running_loop()
+        key = (func, args)
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+        self.queued_items += 1
+        
+        if len(batch) >= self.batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.batch_wait, self._flush, key)
+        return await future
+    
+    def _flush(self, key: Tuple) -> None:
+        """Send the pending batch for a key to the executor."""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(key, batch))
+    
+    async def _run_batch(self, key: Tuple, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Run one batch and resolve its futures."""
+        func, args = key
+        items = [item for item, _ in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            self.running_batches += 1
+            results, busy = await loop.run_in_executor(
+                self._get_executor(), _timed, func, args, items
+            )
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.running_batches -= 1
+            self.queued_items -= len(batch)
+        
+        self._busy.append((time.monotonic(), busy))
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, batching and utilization over the last minute."""
+        now = time.monotonic()
+        while self._busy and now - self._busy[0][0] > _UTILIZATION_WINDOW:
+            self._busy.popleft()
+        window = min(_UTILIZATION_WINDOW, max(now - self._started, 1e-9))
+        busy = sum(seconds for _, seconds in self._busy)
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "queue_depth": self.queued_items,
+            "running_batches": self.running_batches,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "utilization": round(min(busy / (self.workers * window), 1.0), 4),
+        }
+    
+    def shutdown(self) -> None:
+        """Shut the executor down; it is recreated on next use."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global pool instance
+_pool: Optional[LocalScoringPool] = None
+
+
+def get_local_scoring_pool() -> LocalScoringPool:
+    """
+    Get or create the local scoring pool.
+    Singleton pattern so all requests in a worker share one executor.
+    """
+    global _pool
+    if _pool is None:
+        _pool = LocalScoringPool(
+            settings.local_scoring_executor,
+            settings.local_scoring_workers,
+            settings.local_scoring_batch_size,
+            settings.local_scoring_batch_wait_ms / 1000
+        )
+    return _pool
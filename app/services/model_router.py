@@ -0,0 +1,144 @@
+"""
+Cost- and latency-aware routing between configured models.
+"""
+import logging
+import math
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.lexicon import estimate_ambiguity
+
+logger = logging.getLogger(__name__)
+
+_EWMA_ALPHA = 0.2
+_LATENCY_WINDOW = 512
+# One in this many requests still goes to a model over the latency budget,
+# so its latency keeps being measured and it can return once it recovers
+_PROBE_EVERY = 20
+
+
+class ModelStats:
+    """Latency, error and token counters for one model."""
+    
+    def __init__(self):
+        """Initialize empty counters."""
+        self.routed = 0
+        self.diverted = 0
+        self.calls = 0
+        self.errors = 0
+        self.latency_ewma: Optional[float] = None
+        self.latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        # Single upstream attempts, without retry backoff or slot waits
+        self.attempt_latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+    
+    def record(self, latency: float, usage: Optional[Dict[str, Any]]) -> None:
+        """Record a successful call."""
+        self.calls += 1
+        self.latencies.append(latency)
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += _EWMA_ALPHA * (latency - self.latency_ewma)
+        if usage:
+            self.prompt_tokens += usage.get("input_tokens", 0)
+            self.completion_tokens += usage.get("output_tokens", 0)
+    
+    def to_dict(self) -> Dict[str, float]:
+        """Summarize counters, with latencies in milliseconds."""
+        stats = {
+            "routed": self.routed,
+            "diverted": self.diverted,
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 2) if self.latency_ewma else 0.0,
+            "latency_p50_ms": 0.0,
+            "latency_p95_ms": 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+        if self.latencies:
+            p50, p95 = np.percentile(np.fromiter(self.latencies, dtype=float), [50, 95])
+            stats["latency_p50_ms"] = round(float(p50) * 1000, 2)
+            stats["latency_p95_ms"] = round(float(p95) * 1000, 2)
+        return stats
+
+
+class ModelRouter:
+    """
+    Chooses a model per request from a list ordered cheapest to strongest.
+    
+    Long texts and texts that look ambiguous to a local estimate move up the
+    list. That preferred model depends on the text alone and names the
+    cache namespace. On a cache miss, a model whose recent latency exceeds
+    the budget is swapped for the fastest model observed instead, except
+    for a share of probe requests that keep its latency up to date.
+    """
+    
+    def __init__(self, models: List[str]):
+        """Initialize with models ordered from cheapest to strongest."""
+        if not models:
+            raise ValueError("At least one model must be configured")
+        self.models = list(dict.fromkeys(models))
+        self.stats: Dict[str, ModelStats] = {model: ModelStats() for model in self.models}
+        logger.info(f"Model routes: {', '.join(self.models)}")
+    
+    def preferred(self, text: str) -> str:
+        """The model a text's length and ambiguity call for, ignoring latency."""
+        if len(self.models) == 1:
+            return self.models[0]
+        difficulty = int(len(text) > settings.router_long_text_chars)
+        difficulty += int(estimate_ambiguity(text) >= settings.router_ambiguity_threshold)
+        return self.models[math.ceil(difficulty * (len(self.models) - 1) / 2)]
+    
+    def route(self, model: str) -> str:
+        """Pick the model to call instead of the preferred one, and count the call."""
+        model = self._within_latency_budget(model)
+        self.stats[model].routed += 1
+        return model
+    
+    def choose(self, text: str) -> str:
+        """Pick the model to call for a text."""
+        return self.route(self.preferred(text))
+    
+    def _within_latency_budget(self, model: str) -> str:
+        """Swap a model that is over the latency budget for the fastest one."""
+        budget = settings.router_latency_budget_ms / 1000
+        stats = self.stats[model]
+        if stats.latency_ewma is None or stats.latency_ewma <= budget:
+            return model
+        
+        observed = {
+            name: other.latency_ewma
+            for name, other in self.stats.items()
+            if other.latency_ewma is not None
+        }
+        fastest = min(observed, key=observed.get)
+        if fastest == model:
+            return model
+        stats.diverted += 1
+        if stats.diverted % _PROBE_EVERY == 0:
+            logger.info(f"Probing slow model {model}")
+            return model
+        logger.info(f"Routing around slow model {model} to {fastest}")
+        return fastest
+    
+    def record(self, model: str, latency: float, usage: Optional[Dict[str, Any]]) -> None:
+        """Record a successful call to a model."""
+        self.stats[model].record(latency, usage)
+    
+    def record_attempt(self, model: str, latency: float) -> None:
+        """Record the latency of one successful upstream attempt."""
+        self.stats[model].attempt_latencies.append(latency)
+    
+    def record_error(self, model: str) -> None:
+        """Record a failed call to a model."""
+        self.stats[model].errors += 1
+    
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-model routing, latency and token metrics."""
+        return {model: stats.to_dict() for model, stats in self.stats.items()}
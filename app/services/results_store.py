@@ -0,0 +1,215 @@
+"""
+Append-only columnar store of analysis results for analytics.
+
+Each analysis served is recorded as one row. Recording only appends the
+raw values to an in-memory buffer. A background thread then hashes texts,
+decodes result bodies and writes the rows as immutable segments under
+settings.results_store_dir. A segment is a directory with one NumPy
+.npy file per column:
+
+    timestamp.npy   float64  seconds since the epoch
+    label.npy       uint8    index into LABELS (255 if unknown)
+    confidence.npy  float32
+    text_hash.npy   uint64   first 8 bytes of BLAKE2b over the UTF-8 text
+    latency_ms.npy  float32  time spent in the service
+    status.npy      uint8    index into STATUSES (how the result was produced)
+
+Segments are written under a temporary name and renamed into place, so
+readers only ever see complete segments. Segment names sort by time.
+Readers open columns with numpy.load(mmap_mode="r") through
+iter_segments, which pages data in on demand without copying it.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+
+from app.config import settings
+from app.models import SentimentLabel
+
+logger = logging.getLogger(__name__)
+
+LABELS = tuple(label.value for label in SentimentLabel)
+# Codes are stored on disk: only ever append to this tuple
+STATUSES = ("HIT", "MISS", "COALESCED", "LOCAL", "STALE", "FALLBACK")
+COLUMNS = {
+    "timestamp": np.float64,
+    "label": np.uint8,
+    "confidence": np.float32,
+    "text_hash": np.uint64,
+    "latency_ms": np.float32,
+    "status": np.uint8,
+}
+
+_LABEL_CODES = {label: code for code, label in enumerate(LABELS)}
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+_UNKNOWN = 255
+
+
+def text_hash(text: str) -> int:
+    """64-bit hash identifying a text without storing it."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class ResultsStore:
+    """Buffers result rows and writes them as columnar segments from a thread."""
+    
+    def __init__(self, directory: str, segment_rows: int, flush_interval: float, buffer_size: int):
+        """
+        Initialize the store; call start() to begin writing.
+        
+        Args:
+            directory: Directory holding the segments
+            segment_rows: Maximum rows per segment
+            flush_interval: Seconds between writes of buffered rows
+            buffer_size: Rows buffered before new rows are dropped
+        """
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self.flush_interval = flush_interval
+        self._buffer: Deque[Tuple[float, str, bytes, str, float]] = deque()
+        self._buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sequence = 0
+        self.rows_written = 0
+        self.segments_written = 0
+        self.dropped = 0
+    
+    def record(self, text: str, body: bytes, status: str, latency: float) -> None:
+        """Queue a result row; cheap enough for the request path."""
+        if len(self._buffer) >= self._buffer_size:
+            self.dropped += 1
+            return
+        self._buffer.append((time.time(), text, body, status, latency))
+    
+    def start(self) -> None:
+        """Start the background writer thread."""
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="results-store", daemon=True)
+            self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the writer thread and write remaining rows."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.flush()
+    
+    def _run(self) -> None:
+        """Flush periodically until stopped."""
+        while not self._stopping.wait(self.flush_interval):
+            self.flush()
+    
+    def flush(self) -> None:
+        """Write buffered rows as one or more segments."""
+        with self._lock:
+            while self._buffer:
+                count = min(len(self._buffer), self.segment_rows)
+                rows = [self._buffer.popleft() for _ in range(count)]
+                try:
+                    self._write_segment(self._to_columns(rows))
+                except OSError as e:
+                    self.dropped += len(rows)
+                    logger.warning(f"Could not write results segment: {str(e)}")
+    
+    def _to_columns(
+        self,
+        rows: Sequence[Tuple[float, str, bytes, str, float]]
+    ) -> Dict[str, np.ndarray]:
+        """Convert raw rows to column arrays."""
+        columns = {name: np.empty(len(rows), dtype=dtype) for name, dtype in COLUMNS.items()}
+        for index, (timestamp, text, body, status, latency) in enumerate(rows):
+            result = orjson.loads(body)
+            columns["timestamp"][index] = timestamp
+            columns["label"][index] = _LABEL_CODES.get(result.get("sentiment"), _UNKNOWN)
+            columns["confidence"][index] = result.get("confidence", np.nan)
+            columns["text_hash"][index] = text_hash(text)
+            columns["latency_ms"][index] = latency * 1000
+            columns["status"][index] = _STATUS_CODES.get(status, _UNKNOWN)
+        return columns
+    
+    def _write_segment(self, columns: Dict[str, np.ndarray]) -> None:
+        """Write columns to a new segment directory and publish it atomically."""
+        first = float(columns["timestamp"][0])
+        name = f"{int(first * 1000):013d}-{os.getpid()}-{self._sequence:06d}"
+        self._sequence += 1
+        tmp_path = os.path.join(self.directory, f".tmp-{name}")
+        os.makedirs(tmp_path)
+        for column, values in columns.items():
+            np.save(os.path.join(tmp_path, f"{column}.npy"), values)
+        os.rename(tmp_path, os.path.join(self.directory, name))
+        self.rows_written += len(columns["timestamp"])
+        self.segments_written += 1
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Write counters."""
+        return {
+            "rows_buffered": len(self._buffer),
+            "rows_written": self.rows_written,
+            "segments_written": self.segments_written,
+            "rows_dropped": self.dropped,
+        }
+
+
+def iter_segments(
+    directory: str,
+    columns: Sequence[str] = tuple(COLUMNS)
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yield the segments in time order as memory-mapped column arrays.
+    
+    Args:
+        directory: Results store directory
+        columns: Columns to open
+    
+    Yields:
+        Column name to read-only array, one dict per segment
+    """
+    if not os.path.isdir(directory):
+        return
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.startswith(".") or not os.path.isdir(path):
+            continue
+        yield {
+            column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r")
+            for column in columns
+        }
+
+
+def read_results(directory: str, columns: Sequence[str] = tuple(COLUMNS)) -> Dict[str, Any]:
+    """Concatenate every segment into in-memory column arrays."""
+    segments = list(iter_segments(directory, columns))
+    return {
+        column: np.concatenate([segment[column] for segment in segments])
+        if segments else np.empty(0, dtype=COLUMNS[column])
+        for column in columns
+    }
+
+
+# Global results store instance
+_store: Optional[ResultsStore] = None
+
+
+def get_results_store() -> ResultsStore:
+    """Get or create the results store."""
+    global _store
+    if _store is None:
+        os.makedirs(settings.results_store_dir, exist_ok=True)
+        _store = ResultsStore(
+            settings.results_store_dir,
+            settings.results_segment_rows,
+            settings.results_flush_interval,
+            settings.results_buffer_size
+        )
+    return _store
@@ -0,0 +1,198 @@
+"""
+Retry policy for upstream LLM calls.
+
+The OpenAI client's own retries are disabled so that every retry goes
+through one place. A failed call is retried only if the error is
+transient (rate limit, timeout, connection or 5xx error), attempts remain,
+and the process-wide RetryBudget allows it: retries within the sliding
+window may not exceed settings.retry_budget_ratio of the calls made in
+it. During an incident the extra load is therefore capped at that ratio
+instead of multiplying by the number of attempts.
+
+Backoff is exponential with full jitter, unless the provider sent
+Retry-After, which is honoured as long as it is within the maximum delay.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_RETRYABLE_STATUS = {408, 409, 429}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an upstream error is transient and worth retrying."""
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in _RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from Retry-After(-Ms) headers."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    
+    milliseconds = headers.get("retry-after-ms")
+    if milliseconds is not None:
+        try:
+            return max(0.0, float(milliseconds) / 1000)
+        except ValueError:
+            pass
+    
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """Caps retries at a fraction of the calls made in a sliding window."""
+    
+    def __init__(self, ratio: float, window: int, min_retries: int):
+        """
+        Initialize the budget.
+        
+        Args:
+            ratio: Retries allowed per call in the window
+            window: Window length in seconds
+            min_retries: Retries always allowed per window, so a quiet
+                worker can still retry
+        """
+        self.ratio = ratio
+        self.window = window
+        self.min_retries = min_retries
+        # [second, calls, retries] per second with activity
+        self._buckets: Deque[List[int]] = deque()
+        self.exhausted = 0
+    
+    def _bucket(self) -> List[int]:
+        """Bucket for the current second, dropping those outside the window."""
+        now = int(time.monotonic())
+        while self._buckets and self._buckets[0][0] <= now - self.window:
+            self._buckets.popleft()
+        if not self._buckets or self._buckets[-1][0] != now:
+            self._buckets.append([now, 0, 0])
+        return self._buckets[-1]
+    
+    def _totals(self) -> List[int]:
+        """Calls and retries within the window."""
+        self._bucket()
+        return [
+            sum(bucket[1] for bucket in self._buckets),
+            sum(bucket[2] for bucket in self._buckets),
+        ]
+    
+    def record_call(self) -> None:
+        """Count a first attempt."""
+        self._bucket()[1] += 1
+    
+    def try_retry(self) -> bool:
+        """Spend budget on a retry; False if the budget is exhausted."""
+        calls, retries = self._totals()
+        if retries >= max(self.min_retries, self.ratio * calls):
+            self.exhausted += 1
+            return False
+        self._bucket()[2] += 1
+        return True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Calls, retries and the allowance within the window."""
+        calls, retries = self._totals()
+        return {
+            "window_calls": calls,
+            "window_retries": retries,
+            "window_allowance": max(self.min_retries, int(self.ratio * calls)),
+            "exhausted": self.exhausted,
+        }
+
+
+class RetryPolicy:
+    """Retries transient upstream failures with backoff, within a RetryBudget."""
+    
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float, budget: RetryBudget):
+        """
+        Initialize the policy.
+        
+        Args:
+            max_retries: Retries per call after the first attempt
+            base_delay: Backoff ceiling for the first retry, in seconds
+            max_delay: Longest backoff or Retry-After honoured, in seconds
+            budget: Shared retry budget
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.attempts = 0
+        self.retries = 0
+        self.retry_after_honoured = 0
+        self.retry_after_too_long = 0
+    
+    def backoff(self, retry: int) -> float:
+        """Full-jitter exponential backoff for the given retry (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+    
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Call func, retrying transient failures.
+        
+        Raises:
+            Exception: The last error once retrying stops
+        """
+        self.budget.record_call()
+        retry = 0
+        while True:
+            self.attempts += 1
+            try:
+                return await func()
+            except Exception as e:
+                if not is_retryable(e) or retry >= self.max_retries:
+                    raise
+                delay = retry_after(e)
+                if delay is not None and delay > self.max_delay:
+                    self.retry_after_too_long += 1
+                    raise
+                if not self.budget.try_retry():
+                    logger.warning("Retry budget exhausted, not retrying upstream call")
+                    raise
+                if delay is None:
+                    delay = self.backoff(retry)
+                else:
+                    self.retry_after_honoured += 1
+                retry += 1
+                self.retries += 1
+                logger.warning(
+                    f"Upstream call failed ({type(e).__name__}), "
+                    f"retry {retry}/{self.max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Attempt, retry and budget counters."""
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "retry_after_honoured": self.retry_after_honoured,
+            "retry_after_too_long": self.retry_after_too_long,
+            "budget": self.budget.get_stats(),
+        }
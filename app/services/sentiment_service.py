@@ -1,17 +1,42 @@
 """
 Sentiment analysis service using LangChain.
 """
-import json
+import asyncio
+import fcntl
 import logging
-from typing import Dict, Optional
+import os
+import time
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, NamedTuple, Optional, Tuple
 
+import orjson
+from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 
-from app.config import settings
-from app.models import SentimentLabel
+from app.config import UpstreamConfig, settings
+from app.models import ChunkSentiment, DocumentSentimentResponse, SentimentLabel
+from app.services.aggregation import SentimentAggregator
+from app.services.chunking import split_into_chunks
+from app.services.fault_injection import FaultInjector, load_scenario
+from app.services.hedging import Hedger
+from app.services.label_log import LabelLog
+from app.services.local_model import LocalSentimentModel
+from app.services.local_scoring import fallback_batch, get_local_scoring_pool, predict_batch
+from app.services.model_router import ModelRouter
+from app.services.results_store import get_results_store
+from app.services.retry_policy import RetryBudget, RetryPolicy
+from app.services.shared_cache import SharedMemoryCache
+from app.services.token_budget import TokenAccountant, TokenBudget
+from app.services.traffic_capture import TrafficCapture
+from app.services.upstream_pool import UpstreamPool
+from app.utils.loop_monitor import get_loop_monitor
+from app.utils.serialization import model_to_json
+from app.utils.timing import phase
+from app.utils.tracing import get_span_exporter, span
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +48,44 @@ class SentimentOutput(BaseModel):
     explanation: str = Field(description="Brief explanation of the sentiment")
 
 
+class _CacheEntry(NamedTuple):
+    """Cached analysis result with its pre-serialized JSON body."""
+    result: SentimentOutput
+    body: bytes
+    expires: float = float("inf")
+    
+    @property
+    def fresh(self) -> bool:
+        """Whether the entry is within its TTL."""
+        return time.time() < self.expires
+
+
+class _AttemptCharge:
+    """Charges a request's token estimate for each upstream attempt after the first."""
+    
+    def __init__(self, budget: TokenBudget, tokens: int):
+        """Initialize for a call whose first attempt is already reserved."""
+        self.budget = budget
+        self.tokens = tokens
+        self.attempts = 0
+    
+    def __call__(self) -> None:
+        """Count an attempt, charging it unless it is the first."""
+        self.attempts += 1
+        if self.attempts > 1:
+            self.budget.charge(self.tokens)
+
+
+class CacheStatus(str, Enum):
+    """How a result was produced, reported in the X-Cache header."""
+    HIT = "HIT"
+    MISS = "MISS"
+    COALESCED = "COALESCED"
+    LOCAL = "LOCAL"
+    STALE = "STALE"
+    FALLBACK = "FALLBACK"
+
+
 class SentimentAnalysisService:
     """
     Service for analyzing sentiment using LangChain and OpenAI.
@@ -31,25 +94,177 @@ class SentimentAnalysisService:
     
     def __init__(self):
         """Initialize the sentiment analysis service."""
-        self.llm = self._initialize_llm()
+        self.router = ModelRouter(settings.model_routes or [settings.model_name])
         self.parser = PydanticOutputParser(pydantic_object=SentimentOutput)
-        self.chain = self._create_chain()
-        self._cache: Dict[str, SentimentOutput] = {}
+        self.upstreams = UpstreamPool(
+            settings.upstreams or [
+                UpstreamConfig(name="default", max_concurrency=settings.llm_max_concurrency)
+            ],
+            settings.upstream_balancer,
+            settings.upstream_eject_failures,
+            settings.upstream_eject_seconds
+        )
+        self.prompt = self._create_prompt()
+        self.chains = {
+            member.name: {
+                model: self._create_chain(self._initialize_llm(model, member.config))
+                for model in self.router.models
+            }
+            for member in self.upstreams.members
+        }
+        prompt_overhead_chars = len(self.prompt.format(text=""))
+        # Each worker paces its share of the limit
+        tokens_per_minute = settings.llm_tokens_per_minute // settings.worker_processes
+        if settings.llm_tokens_per_minute:
+            tokens_per_minute = max(1, tokens_per_minute)
+        self.token_budgets = {
+            model: TokenBudget(
+                tokens_per_minute,
+                settings.llm_tpm_burst_fraction,
+                settings.llm_tpm_max_wait_ms / 1000,
+                settings.max_tokens,
+                prompt_overhead_chars
+            )
+            for model in self.router.models
+        }
+        self.token_usage = TokenAccountant()
+        self.retry_policy = RetryPolicy(
+            settings.max_retries,
+            settings.retry_base_delay_ms / 1000,
+            settings.retry_max_delay_ms / 1000,
+            RetryBudget(
+                settings.retry_budget_ratio,
+                settings.retry_budget_window,
+                settings.retry_budget_min_retries
+            )
+        )
+        self.hedger = Hedger(
+            settings.hedge_percentile,
+            settings.hedge_min_samples,
+            RetryBudget(settings.hedge_max_ratio, settings.retry_budget_window, 0)
+        )
+        self._cache: Dict[str, _CacheEntry] = {}
+        self._shared_cache = self._attach_shared_cache()
+        self._llm_slots = asyncio.Semaphore(settings.llm_max_concurrency)
+        self._llm_waiters: Dict[object, float] = {}
+        self.llm_in_flight = 0
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.coalesced_requests = 0
+        self._label_log = LabelLog(
+            settings.label_log_path, settings.label_log_max_bytes
+        ) if settings.label_log_enabled else None
+        self.results_store = get_results_store() if settings.results_store_enabled else None
+        self.aggregates = SentimentAggregator(
+            settings.aggregation_max_tags,
+            settings.aggregation_snapshot_dir,
+            settings.aggregation_snapshot_interval
+        ) if settings.aggregation_enabled else None
+        self.traffic_capture = TrafficCapture(
+            settings.capture_path,
+            settings.capture_sample_rate,
+            settings.capture_raw_text
+        ) if settings.capture_enabled else None
+        self.faults = self._create_fault_injector()
+        self.local_model: Optional[LocalSentimentModel] = None
+        self._local_model_mtime: Optional[float] = None
+        self._local_model_checked = 0.0
+        self.local_hits = 0
+        self._local_pool = get_local_scoring_pool()
+        if settings.local_model_enabled:
+            self.reload_local_model()
         logger.info("Sentiment analysis service initialized")
     
-    def _initialize_llm(self) -> ChatOpenAI:
-        """Initialize the language model with configuration."""
+    def _attach_shared_cache(self) -> Optional[SharedMemoryCache]:
+        """Attach to the launcher's shared cache segment if one exists."""
+        if not (settings.enable_cache and settings.shared_cache_enabled):
+            return None
+        try:
+            shared_cache = SharedMemoryCache.attach(settings.shared_cache_name)
+        except FileNotFoundError:
+            logger.info("No shared cache segment found, using process-local cache only")
+            return None
+        logger.info(f"Attached to shared cache segment: {shared_cache.name}")
+        return shared_cache
+    
+    def _create_fault_injector(self) -> Optional[FaultInjector]:
+        """Load the configured fault scenario, outside production only."""
+        if not settings.fault_scenario_path:
+            return None
+        if settings.is_production:
+            logger.error("Ignoring fault_scenario_path: fault injection is disabled in production")
+            return None
+        scenario = load_scenario(settings.fault_scenario_path)
+        logger.warning(f"Injecting faults from scenario '{scenario.name}' into upstream calls")
+        return FaultInjector(scenario)
+    
+    def reload_local_model(self) -> bool:
+        """
+        Load the local model if its file changed since the last load.
+        
+        The new model replaces the old one in a single assignment, so
+        requests in progress finish with whichever model they started with.
+        
+        Returns:
+            Whether a local model is loaded
+        """
+        self._local_model_checked = time.monotonic()
+        try:
+            mtime = os.stat(settings.local_model_path).st_mtime
+        except FileNotFoundError:
+            if self.local_model is not None:
+                logger.info("Local model file removed, serving from the LLM only")
+            self.local_model = None
+            self._local_model_mtime = None
+            return False
+        
+        if mtime != self._local_model_mtime:
+            try:
+                self.local_model = LocalSentimentModel.load(settings.local_model_path)
+                self._local_model_mtime = mtime
+                logger.info(f"Loaded local model from {settings.local_model_path}")
+            except Exception as e:
+                logger.error(f"Could not load local model: {str(e)}")
+        return self.local_model is not None
+    
+    async def _local_prediction(self, text: str) -> Optional[SentimentOutput]:
+        """Answer from the local model when its calibrated confidence is high enough."""
+        if not settings.local_model_enabled:
+            return None
+        if time.monotonic() - self._local_model_checked >= settings.local_model_check_interval:
+            self.reload_local_model()
+        if self.local_model is None:
+            return None
+        
+        # Process workers load the model themselves rather than receive it per batch
+        if self._local_pool.mode == "process":
+            model = (settings.local_model_path, self._local_model_mtime)
+        else:
+            model = self.local_model
+        sentiment, confidence = await self._local_pool.submit(predict_batch, (model,), text)
+        if confidence < settings.local_model_threshold:
+            return None
+        self.local_hits += 1
+        return SentimentOutput(
+            sentiment=sentiment,
+            confidence=confidence,
+            explanation=f"Local model prediction (calibrated confidence {confidence:.2f})."
+        )
+    
+    def _initialize_llm(self, model_name: str, upstream: UpstreamConfig) -> ChatOpenAI:
+        """Initialize a language model on an upstream endpoint with configuration."""
         return ChatOpenAI(
-            model=settings.model_name,
+            model=model_name,
             temperature=settings.model_temperature,
             max_tokens=settings.max_tokens,
-            api_key=settings.openai_api_key,
-            max_retries=settings.max_retries,
+            api_key=upstream.api_key or settings.openai_api_key,
+            base_url=upstream.base_url,
+            # Retries go through self.retry_policy and its budget
+            max_retries=0,
             timeout=settings.timeout,
         )
     
-    def _create_chain(self):
-        """Create the LangChain sentiment analysis chain."""
+    def _create_prompt(self) -> ChatPromptTemplate:
+        """Create the sentiment analysis prompt shared by all chains."""
         # Create the prompt template
         prompt = ChatPromptTemplate.from_messages([
             ("system", """You are an expert sentiment analyzer. Analyze the sentiment of the given text 
@@ -68,22 +283,105 @@ class SentimentAnalysisService:
         ])
         
         # Format the prompt with parser instructions
-        formatted_prompt = prompt.partial(
+        return prompt.partial(
             format_instructions=self.parser.get_format_instructions()
         )
+    
+    def _create_chain(self, llm: ChatOpenAI):
+        """
+        Create the LangChain sentiment analysis chain for a model.
+        The chain returns the raw message so token usage can be recorded;
+        the output is parsed separately.
+        """
+        return self.prompt | llm
+    
+    @asynccontextmanager
+    async def _llm_slot(self) -> AsyncIterator[None]:
+        """Hold one of the settings.llm_max_concurrency upstream call slots."""
+        waiter = object()
+        self._llm_waiters[waiter] = time.monotonic()
+        try:
+            with phase("llm_wait"):
+                await self._llm_slots.acquire()
+        finally:
+            del self._llm_waiters[waiter]
+        self.llm_in_flight += 1
+        try:
+            yield
+        finally:
+            self.llm_in_flight -= 1
+            self._llm_slots.release()
+    
+    async def _call_upstream(self, model: str, text: str, charge: _AttemptCharge) -> AIMessage:
+        """Make one attempt for the retry policy, hedged if hedging is enabled."""
+        delay = None
+        if settings.hedging_enabled:
+            delay = self.hedger.delay(model, self.router.stats[model].attempt_latencies)
+        return await self.hedger.call(lambda: self._invoke(model, text, charge), delay)
+    
+    async def _invoke(self, model: str, text: str, charge: _AttemptCharge) -> AIMessage:
+        """
+        Make one upstream call on the pool member chosen for it.
         
-        # Create the chain
-        chain = formatted_prompt | self.llm | self.parser
-        return chain
+        Each attempt, hedge or retry holds its own call slot, so slots are
+        not held through retry backoff and a hedge counts against the limit.
+        Attempts after the first are charged to the model's token budget.
+        """
+        async with self._llm_slot(), self.upstreams.acquire() as member:
+            with span("llm.attempt", upstream=member.name):
+                chain = self.chains[member.name][model]
+                charge()
+                started = time.perf_counter()
+                if self.faults is not None:
+                    message = await self.faults.call(lambda: chain.ainvoke({"text": text}))
+                else:
+                    message = await chain.ainvoke({"text": text})
+                self.router.record_attempt(model, time.perf_counter() - started)
+                return message
+    
+    @property
+    def llm_waiting(self) -> int:
+        """Requests waiting for an upstream call slot."""
+        return len(self._llm_waiters)
+    
+    def queue_wait(self) -> float:
+        """Seconds the longest-waiting request has been queued for a call slot."""
+        if not self._llm_waiters:
+            return 0.0
+        return time.monotonic() - next(iter(self._llm_waiters.values()))
     
     def _get_cache_key(self, text: str) -> str:
         """Generate cache key from text."""
         return text.lower().strip()
     
+    def _namespaced_key(self, model: str, text: str) -> str:
+        """Cache key within a model's namespace."""
+        return f"{model}:{self._get_cache_key(text)}"
+    
+    def _get_cached(self, cache_key: str) -> Optional[_CacheEntry]:
+        """Look up a fresh cache entry locally, then in the shared segment."""
+        entry = self._cache.get(cache_key)
+        if entry is not None and entry.fresh:
+            return entry
+        
+        if self._shared_cache is not None:
+            body = self._shared_cache.get(cache_key)
+            if body is not None:
+                entry = _CacheEntry(
+                    SentimentOutput.model_validate_json(body),
+                    body,
+                    time.time() + settings.cache_ttl
+                )
+                self._cache[cache_key] = entry
+                return entry
+        
+        return None
+    
     async def analyze_sentiment(
         self, 
         text: str, 
-        use_cache: bool = True
+        use_cache: bool = True,
+        record: bool = True
     ) -> SentimentOutput:
         """
         Analyze the sentiment of the given text.
@@ -91,6 +389,8 @@ class SentimentAnalysisService:
         Args:
             text: The text to analyze
             use_cache: Whether to use cached results
+            record: Whether to count the result as served traffic; callers
+                scoring on behalf of a document, job or bulk run pass False
             
         Returns:
             SentimentOutput with sentiment, confidence, and explanation
@@ -98,63 +398,293 @@ class SentimentAnalysisService:
         Raises:
             Exception: If analysis fails
         """
+        started = time.perf_counter()
+        model = self.router.preferred(text)
+        cache_key = self._namespaced_key(model, text)
+        
         # Check cache
         if use_cache and settings.enable_cache:
-            cache_key = self._get_cache_key(text)
-            if cache_key in self._cache:
+            entry = self._get_cached(cache_key)
+            if entry is not None:
                 logger.info(f"Cache hit for text: {text[:50]}...")
-                return self._cache[cache_key]
+                if record:
+                    self._record_result(text, entry.body, CacheStatus.HIT, started)
+                return entry.result
         
+        if use_cache and settings.enable_cache:
+            entry, cache_status = await self._analyze_coalesced(text, model, cache_key)
+        else:
+            entry, cache_status = await self._analyze_uncached(text, model, cache_key)
+        if record:
+            self._record_result(text, entry.body, cache_status, started)
+        return entry.result
+    
+    async def prime(self, text: str) -> bool:
+        """
+        Analyze a text into the cache without counting it as served traffic.
+        
+        Args:
+            text: The text to analyze
+        
+        Returns:
+            True if the text was analyzed and cached, False if it was
+            already cached
+        
+        Raises:
+            RuntimeError: If the analysis degraded and nothing was cached
+        """
+        model = self.router.preferred(text)
+        cache_key = self._namespaced_key(model, text)
+        if self._get_cached(cache_key) is not None:
+            return False
+        _, cache_status = await self._analyze_coalesced(text, model, cache_key)
+        if self._get_cached(cache_key) is None:
+            raise RuntimeError(f"Analysis was not cached ({cache_status.value})")
+        return True
+    
+    async def analyze_sentiment_json(self, text: str) -> Tuple[bytes, CacheStatus]:
+        """
+        Analyze sentiment and return the serialized JSON response body.
+        
+        Cache hits return the bytes stored alongside the result, so no
+        model construction or serialization happens on the hot path.
+        
+        Args:
+            text: The text to analyze
+        
+        Returns:
+            JSON bytes with sentiment, confidence, and explanation, and how
+            the result was produced
+        """
+        started = time.perf_counter()
+        with span("service.analyze_sentiment") as current:
+            body, cache_status = await self._analyze_json(text)
+            if current is not None:
+                current.set("cache_status", cache_status.value)
+            self._record_result(text, body, cache_status, started)
+            return body, cache_status
+    
+    def _record_result(
+        self,
+        text: str,
+        body: bytes,
+        cache_status: CacheStatus,
+        started: float
+    ) -> None:
+        """Append a served result to the results store, aggregates and capture, if enabled."""
+        elapsed = time.perf_counter() - started
+        if self.results_store is not None:
+            self.results_store.record(text, body, cache_status.value, elapsed)
+        if self.aggregates is not None:
+            self.aggregates.record(body)
+        if self.traffic_capture is not None:
+            self.traffic_capture.record(text, self._get_cache_key(text), time.time() - elapsed)
+    
+    async def _analyze_json(self, text: str) -> Tuple[bytes, CacheStatus]:
+        """Route, look up and analyze a text for analyze_sentiment_json."""
+        model = self.router.preferred(text)
+        cache_key = self._namespaced_key(model, text)
+        
+        if settings.enable_cache:
+            with phase("cache"):
+                entry = self._cache.get(cache_key)
+                body = entry.body if entry is not None and entry.fresh else None
+                if body is None and self._shared_cache is not None:
+                    body = self._shared_cache.get(cache_key)
+            if body is not None:
+                return body, CacheStatus.HIT
+            entry, cache_status = await self._analyze_coalesced(text, model, cache_key)
+        else:
+            entry, cache_status = await self._analyze_uncached(text, model, cache_key)
+        return entry.body, cache_status
+    
+    async def _analyze_coalesced(
+        self,
+        text: str,
+        model: str,
+        cache_key: str
+    ) -> Tuple[_CacheEntry, CacheStatus]:
+        """
+        Share one upstream call between concurrent misses for the same key.
+        
+        The call runs as its own task, so a caller that is cancelled (for
+        example a disconnected client) does not cancel it for the others.
+        """
+        task = self._pending.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(self._analyze_uncached(text, model, cache_key))
+            self._pending[cache_key] = task
+            task.add_done_callback(lambda _: self._pending.pop(cache_key, None))
+            return await asyncio.shield(task)
+        
+        self.coalesced_requests += 1
+        logger.info(f"Coalesced request for text: {text[:50]}...")
+        entry, cache_status = await asyncio.shield(task)
+        if cache_status in (CacheStatus.MISS, CacheStatus.LOCAL):
+            cache_status = CacheStatus.COALESCED
+        return entry, cache_status
+    
+    async def _analyze_uncached(
+        self,
+        text: str,
+        model: str,
+        cache_key: str
+    ) -> Tuple[_CacheEntry, CacheStatus]:
+        """
+        Run the model's chain for a cache miss and store the result.
+        Confident local model predictions are returned without an upstream
+        call and are not cached, so a retrained model takes effect at once.
+        Calls wait for the model's token budget; if it stays exhausted, or
+        the upstream call fails, an expired cache entry is preferred over
+        the keyword fallback.
+        """
+        with phase("local_model"):
+            local = await self._local_prediction(text)
+        if local is not None:
+            return _CacheEntry(local, model_to_json(local)), CacheStatus.LOCAL
+        
+        # Cached under the preferred model's namespace whichever model answers
+        model = self.router.route(model)
+        budget = self.token_budgets[model]
+        reserved = budget.estimate(text)
+        with phase("token_wait"):
+            admitted = await budget.acquire(reserved)
+        if not admitted:
+            logger.warning(f"Token budget for {model} exhausted")
+            return await self._degraded(text, cache_key, "token budget exhausted")
+        
+        message = None
         try:
-            logger.info(f"Analyzing sentiment for text: {text[:50]}...")
+            logger.info(f"Analyzing sentiment with {model} for text: {text[:50]}...")
+            
+            # Each attempt takes an upstream call slot in _invoke
+            with phase("llm") as llm_span:
+                started = time.perf_counter()
+                charge = _AttemptCharge(budget, reserved)
+                message = await self.retry_policy.call(
+                    lambda: self._call_upstream(model, text, charge)
+                )
+                latency = time.perf_counter() - started
+                self.token_usage.record(model, message.usage_metadata)
+                budget.reconcile(text, reserved, message.usage_metadata)
+                if llm_span is not None:
+                    llm_span.set("model", model)
+                    llm_span.set("usage", message.usage_metadata)
             
-            # Invoke the chain
-            result = await self.chain.ainvoke({"text": text})
+            with phase("parse"):
+                result = self.parser.parse(message.content)
+            self.router.record(model, latency, message.usage_metadata)
+            with phase("serialization"):
+                entry = _CacheEntry(result, model_to_json(result), time.time() + settings.cache_ttl)
+            if self._label_log is not None:
+                self._label_log.append(text, result.sentiment.value, result.confidence, model)
             
             # Cache the result
             if settings.enable_cache:
-                self._cache[cache_key] = result
+                self._cache[cache_key] = entry
+                if self._shared_cache is not None:
+                    self._shared_cache.set(cache_key, entry.body, settings.cache_ttl)
             
             logger.info(
                 f"Sentiment analysis complete: {result.sentiment} "
                 f"(confidence: {result.confidence:.2f})"
             )
             
-            return result
+            return entry, CacheStatus.MISS
             
         except Exception as e:
             logger.error(f"Error analyzing sentiment: {str(e)}", exc_info=True)
-            # Fallback to basic sentiment
-            return await self._fallback_analysis(text, str(e))
+            self.router.record_error(model)
+            if message is None:
+                budget.release(reserved)
+            return await self._degraded(text, cache_key, str(e))
     
-    async def _fallback_analysis(self, text: str, error: str) -> SentimentOutput:
+    async def _degraded(
+        self,
+        text: str,
+        cache_key: str,
+        error: str
+    ) -> Tuple[_CacheEntry, CacheStatus]:
+        """Answer without the LLM: an expired result if cached, else the keyword fallback."""
+        # Serve an expired result for this text rather than a guess
+        stale = self._cache.get(cache_key) if settings.enable_cache else None
+        if stale is not None:
+            logger.warning(f"Serving stale result for text: {text[:50]}...")
+            return stale, CacheStatus.STALE
+        
+        # Fallback to basic sentiment
+        result = await self._fallback_analysis(text, error)
+        return _CacheEntry(result, model_to_json(result)), CacheStatus.FALLBACK
+    
+    async def analyze_document(
+        self,
+        text: str,
+        include_chunks: bool = False
+    ) -> DocumentSentimentResponse:
         """
-        Provide a fallback sentiment analysis if LLM fails.
-        Uses simple keyword matching.
+        Analyze a long document chunk by chunk.
+        
+        Chunks are analyzed concurrently through analyze_sentiment, so each
+        chunk is cached on its own and an edited document only re-scores
+        the chunks that changed. Chunk results are combined by weighting
+        each chunk's confidence with its length. Chunks are not recorded as
+        served results.
+        
+        Args:
+            text: The document to analyze
+            include_chunks: Whether to return the per-chunk results
+            
+        Returns:
+            DocumentSentimentResponse with the document verdict
         """
-        logger.warning(f"Using fallback analysis due to error: {error}")
+        chunks = split_into_chunks(
+            text, settings.document_chunk_size, settings.document_min_chunk_size
+        )
+        results = await asyncio.gather(
+            *(self.analyze_sentiment(chunk.text, record=False) for chunk in chunks)
+        )
         
-        text_lower = text.lower()
+        scores = {label: 0.0 for label in SentimentLabel}
+        total_weight = 0
+        for chunk, result in zip(chunks, results):
+            weight = len(chunk.text)
+            scores[result.sentiment] += weight * result.confidence
+            total_weight += weight
         
-        # Simple keyword-based analysis
-        positive_words = ["love", "great", "excellent", "amazing", "wonderful", "good", "best"]
-        negative_words = ["hate", "terrible", "awful", "horrible", "worst", "bad", "disappointing"]
+        sentiment = max(scores, key=scores.get)
+        shares = ", ".join(
+            f"{scores[label] / total_weight:.0%} {label.value}" for label in SentimentLabel
+        )
+        logger.info(f"Document analysis complete: {sentiment} over {len(chunks)} chunk(s)")
         
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        return DocumentSentimentResponse(
+            sentiment=sentiment,
+            confidence=scores[sentiment] / total_weight,
+            explanation=(
+                f"Weighted verdict over {len(chunks)} chunk(s) by length and "
+                f"confidence: {shares}."
+            ),
+            chunk_count=len(chunks),
+            chunks=[
+                ChunkSentiment(
+                    index=index,
+                    start=chunk.start,
+                    end=chunk.end,
+                    **result.model_dump()
+                )
+                for index, (chunk, result) in enumerate(zip(chunks, results))
+            ] if include_chunks else None
+        )
+    
+    async def _fallback_analysis(self, text: str, error: str) -> SentimentOutput:
+        """
+        Provide a fallback sentiment analysis if LLM fails.
+        Uses simple keyword matching, run on the local scoring pool so
+        fallback storms do not block the event loop.
+        """
+        logger.warning(f"Using fallback analysis due to error: {error}")
         
-        if positive_count > negative_count:
-            sentiment = SentimentLabel.POSITIVE
-            confidence = min(0.6, 0.4 + (positive_count * 0.1))
-            explanation = f"Text contains {positive_count} positive keyword(s). (Fallback analysis)"
-        elif negative_count > positive_count:
-            sentiment = SentimentLabel.NEGATIVE
-            confidence = min(0.6, 0.4 + (negative_count * 0.1))
-            explanation = f"Text contains {negative_count} negative keyword(s). (Fallback analysis)"
-        else:
-            sentiment = SentimentLabel.NEUTRAL
-            confidence = 0.5
-            explanation = "No strong sentiment indicators detected. (Fallback analysis)"
+        sentiment, confidence, explanation = await self._local_pool.submit(fallback_batch, (), text)
         
         return SentimentOutput(
             sentiment=sentiment,
@@ -162,16 +692,153 @@ class SentimentAnalysisService:
             explanation=explanation
         )
     
+    def save_cache(self, path: str) -> int:
+        """
+        Merge fresh cache entries into the JSONL snapshot, replacing it atomically.
+        
+        Workers share one snapshot and save it one after another as they
+        shut down or are recycled, so each merges its entries with those
+        already saved, keeping the later expiry, under an exclusive lock.
+        
+        Returns:
+            Number of entries in the snapshot
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.lock", "ab") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            lines: Dict[str, Tuple[float, bytes]] = {}
+            if os.path.exists(path):
+                now = time.time()
+                with open(path, "rb") as handle:
+                    for line in handle:
+                        try:
+                            key, expires, _ = orjson.loads(line)
+                        except (orjson.JSONDecodeError, ValueError):
+                            continue
+                        if expires > now:
+                            lines[key] = (expires, line)
+            for key, entry in list(self._cache.items()):
+                if entry.fresh and (key not in lines or lines[key][0] < entry.expires):
+                    line = orjson.dumps([key, entry.expires, orjson.Fragment(entry.body)]) + b"\n"
+                    lines[key] = (entry.expires, line)
+            
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as handle:
+                handle.writelines(line for _, line in lines.values())
+            os.replace(tmp_path, path)
+        return len(lines)
+    
+    def load_cache(self, path: str) -> int:
+        """
+        Load unexpired entries from a snapshot written by save_cache.
+        
+        Returns:
+            Number of entries loaded
+        """
+        if not os.path.exists(path):
+            return 0
+        now = time.time()
+        loaded = 0
+        with open(path, "rb") as handle:
+            for line in handle:
+                try:
+                    key, expires, data = orjson.loads(line)
+                    if expires <= now:
+                        continue
+                    result = SentimentOutput.model_validate(data)
+                except (orjson.JSONDecodeError, ValueError) as e:
+                    logger.warning(f"Skipping invalid cache snapshot line: {str(e)}")
+                    continue
+                self._cache[key] = _CacheEntry(result, model_to_json(result), expires)
+                loaded += 1
+        return loaded
+    
+    async def drain(self, timeout: float) -> Dict[str, int]:
+        """
+        Wait for upstream calls already under way to finish and be cached.
+        
+        Calls run as their own tasks, so they outlive requests whose
+        clients went away; calls still running at the deadline are cancelled.
+        
+        Args:
+            timeout: Seconds to wait
+        
+        Returns:
+            Calls completed and calls dropped during the drain
+        """
+        tasks = list(self._pending.values())
+        if not tasks:
+            return {"calls_completed": 0, "calls_dropped": 0}
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        return {"calls_completed": len(done), "calls_dropped": len(pending)}
+    
     def clear_cache(self):
         """Clear the sentiment analysis cache."""
         self._cache.clear()
+        if self._shared_cache is not None:
+            self._shared_cache.clear()
         logger.info("Cache cleared")
     
     def get_cache_stats(self) -> Dict[str, int]:
         """Get cache statistics."""
-        return {
+        stats = {
             "cache_size": len(self._cache),
-            "cache_enabled": settings.enable_cache
+            "cache_enabled": settings.enable_cache,
+            "coalesced_requests": self.coalesced_requests
+        }
+        if self._shared_cache is not None:
+            stats.update(self._shared_cache.get_stats())
+        return stats
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get cache, routing, retry, hedging, upstream pool, token, local
+        scoring, event loop and upstream metrics.
+        """
+        return {
+            "cache": self.get_cache_stats(),
+            "routes": self.router.get_stats(),
+            "retries": self.retry_policy.get_stats(),
+            "hedging": {"enabled": settings.hedging_enabled, **self.hedger.get_stats()},
+            "upstream_pool": self.upstreams.get_stats(),
+            "tokens": {
+                **self.token_usage.get_stats(),
+                "budgets": {
+                    model: budget.get_stats() for model, budget in self.token_budgets.items()
+                }
+            },
+            "local_model": {
+                "loaded": self.local_model is not None,
+                "hits": self.local_hits,
+                "threshold": settings.local_model_threshold,
+                "labels_logged": self._label_log.written if self._label_log is not None else 0,
+                "labels_dropped": self._label_log.dropped if self._label_log is not None else 0
+            },
+            "local_scoring": self._local_pool.get_stats(),
+            "event_loop": get_loop_monitor().get_stats(),
+            "tracing": get_span_exporter().get_stats(),
+            "aggregates": {
+                "enabled": self.aggregates is not None,
+                **(self.aggregates.get_stats() if self.aggregates is not None else {})
+            },
+            "fault_injection": self.faults.get_stats() if self.faults is not None else None,
+            "traffic_capture": {
+                "enabled": self.traffic_capture is not None,
+                "captured": self.traffic_capture.captured if self.traffic_capture is not None else 0
+            },
+            "results_store": {
+                "enabled": self.results_store is not None,
+                **(self.results_store.get_stats() if self.results_store is not None else {})
+            },
+            "upstream": {
+                "in_flight": self.llm_in_flight,
+                "waiting": self.llm_waiting,
+                "queue_wait_ms": round(self.queue_wait() * 1000, 2),
+                "max_concurrency": settings.llm_max_concurrency
+            }
         }
 
 
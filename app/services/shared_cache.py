@@ -0,0 +1,233 @@
+"""
+Cross-process result cache backed by a shared memory segment.
+
+The segment is a fixed-size, two-way set-associative hash table of
+serialized response bodies. It is created once by the launcher before
+workers are forked, and every worker attaches to it by name, so a result
+computed by one worker is a cache hit for the others.
+
+Slots are written under a per-slot sequence counter (odd while a write is
+in progress) and carry a CRC of the key hash, expiry, length and payload,
+so readers never return a torn or mixed entry; a concurrent write simply
+reads as a miss. Writers in different processes are serialized per slot
+by an fcntl byte-range lock on a lock file named after the segment, so
+two writes to one slot never interleave.
+"""
+import fcntl
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+import time
+import zlib
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Segment header: magic, version, slot count, slot size
+_SEGMENT_HEADER = struct.Struct("<4sIII")
+_SEGMENT_HEADER_SIZE = 64
+_MAGIC = b"SNTC"
+_VERSION = 2
+
+# Slot header: sequence, key hash, expiry timestamp, payload length, entry CRC
+_SLOT_HEADER = struct.Struct("<IQdII")
+# Header fields covered by the entry CRC along with the payload
+_CRC_FIELDS = struct.Struct("<QdI")
+
+_SEQ_MASK = 0xFFFFFFFF
+_WAYS = 2
+
+
+def _hash_key(key: str) -> int:
+    """Hash a cache key to a non-zero 64-bit integer."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def _entry_crc(key_hash: int, expires_at: float, payload: bytes) -> int:
+    """CRC binding a payload to the key and expiry stored with it."""
+    return zlib.crc32(payload, zlib.crc32(_CRC_FIELDS.pack(key_hash, expires_at, len(payload))))
+
+
+def _lock_path(name: str) -> str:
+    """Lock file serializing writers of a segment."""
+    return os.path.join(tempfile.gettempdir(), f"{name.lstrip('/')}.lock")
+
+
+class SharedMemoryCache:
+    """
+    Fixed-size result cache stored in a named shared memory segment.
+    Use create() in the parent process and attach() in workers.
+    """
+    
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        """Wrap an already created or attached shared memory segment."""
+        magic, version, slots, slot_size = _SEGMENT_HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Shared memory segment {shm.name!r} is not a sentiment cache")
+        
+        self._shm = shm
+        self._buf = shm.buf
+        self._owner = owner
+        self.slots = slots
+        self.slot_size = slot_size
+        self.max_payload = slot_size - _SLOT_HEADER.size
+        self._lock_fd = os.open(_lock_path(shm.name), os.O_RDWR | os.O_CREAT, 0o600)
+        self.hits = 0
+        self.misses = 0
+    
+    @classmethod
+    def create(cls, name: str, slots: int, slot_size: int) -> "SharedMemoryCache":
+        """Create a new segment, replacing any stale one left with the same name."""
+        size = _SEGMENT_HEADER_SIZE + slots * slot_size
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            logger.warning(f"Removed stale shared cache segment: {name}")
+        except FileNotFoundError:
+            pass
+        
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        _SEGMENT_HEADER.pack_into(shm.buf, 0, _MAGIC, _VERSION, slots, slot_size)
+        logger.info(
+            f"Created shared cache segment {name}: {slots} slots x {slot_size} bytes"
+        )
+        return cls(shm, owner=True)
+    
+    @classmethod
+    def attach(cls, name: str) -> "SharedMemoryCache":
+        """
+        Attach to an existing segment.
+        
+        Raises:
+            FileNotFoundError: If no segment with this name exists
+        """
+        return cls(shared_memory.SharedMemory(name=name))
+    
+    def _slot_offset(self, index: int) -> int:
+        """Byte offset of a slot in the segment."""
+        return _SEGMENT_HEADER_SIZE + index * self.slot_size
+    
+    def _candidates(self, key_hash: int):
+        """Slot offsets a key may live in."""
+        base = key_hash % self.slots
+        return [self._slot_offset((base + way) % self.slots) for way in range(_WAYS)]
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached body for a key, or None on a miss."""
+        key_hash = _hash_key(key)
+        now = time.time()
+        
+        for offset in self._candidates(key_hash):
+            seq, slot_hash, expires_at, length, crc = _SLOT_HEADER.unpack_from(
+                self._buf, offset
+            )
+            if seq & 1 or slot_hash != key_hash or expires_at < now:
+                continue
+            if length > self.max_payload:
+                continue
+            
+            start = offset + _SLOT_HEADER.size
+            payload = bytes(self._buf[start:start + length])
+            
+            # Discard entries that changed while being copied
+            if struct.unpack_from("<I", self._buf, offset)[0] != seq:
+                continue
+            if _entry_crc(slot_hash, expires_at, payload) != crc:
+                continue
+            
+            self.hits += 1
+            return payload
+        
+        self.misses += 1
+        return None
+    
+    def set(self, key: str, body: bytes, ttl: float) -> bool:
+        """
+        Store a body for a key.
+        
+        Returns:
+            False if the body does not fit in a slot
+        """
+        if len(body) > self.max_payload:
+            return False
+        
+        key_hash = _hash_key(key)
+        now = time.time()
+        
+        # Prefer the slot holding this key, then an empty or expired one,
+        # then the entry closest to expiry
+        target = None
+        oldest_expiry = None
+        for offset in self._candidates(key_hash):
+            _, slot_hash, expires_at, _, _ = _SLOT_HEADER.unpack_from(self._buf, offset)
+            if slot_hash == key_hash or slot_hash == 0 or expires_at < now:
+                target = offset
+                break
+            if oldest_expiry is None or expires_at < oldest_expiry:
+                target, oldest_expiry = offset, expires_at
+        
+        expires_at = now + ttl
+        fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, self.slot_size, target)
+        try:
+            # Mark the slot as being written (odd sequence) until the header lands
+            seq = struct.unpack_from("<I", self._buf, target)[0]
+            writing = (seq + 1) | 1
+            struct.pack_into("<I", self._buf, target, writing)
+            
+            start = target + _SLOT_HEADER.size
+            self._buf[start:start + len(body)] = body
+            _SLOT_HEADER.pack_into(
+                self._buf, target,
+                (writing + 1) & _SEQ_MASK, key_hash, expires_at, len(body),
+                _entry_crc(key_hash, expires_at, body)
+            )
+        finally:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, self.slot_size, target)
+        return True
+    
+    def clear(self) -> None:
+        """Invalidate every slot in the segment."""
+        # A length of 0 locks every slot from the first to the end
+        fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 0, _SEGMENT_HEADER_SIZE)
+        try:
+            for index in range(self.slots):
+                offset = self._slot_offset(index)
+                seq = struct.unpack_from("<I", self._buf, offset)[0]
+                _SLOT_HEADER.pack_into(
+                    self._buf, offset, ((seq + 1) | 1) + 1 & _SEQ_MASK, 0, 0.0, 0, 0
+                )
+        finally:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 0, _SEGMENT_HEADER_SIZE)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Per-process hit/miss counters and segment geometry."""
+        return {
+            "shared_cache_slots": self.slots,
+            "shared_cache_slot_size": self.slot_size,
+            "shared_cache_hits": self.hits,
+            "shared_cache_misses": self.misses,
+        }
+    
+    @property
+    def name(self) -> str:
+        """Name of the underlying segment."""
+        return self._shm.name
+    
+    def close(self) -> None:
+        """Detach from the segment, unlinking it if this process created it."""
+        self._buf = None
+        self._shm.close()
+        os.close(self._lock_fd)
+        if self._owner:
+            self._shm.unlink()
+            try:
+                os.remove(_lock_path(self._shm.name))
+            except FileNotFoundError:
+                pass
+            logger.info(f"Removed shared cache segment: {self._shm.name}")
@@ -0,0 +1,70 @@
+"""
+Graceful shutdown: drain in-flight work and persist state.
+
+The drain runs in the lifespan shutdown, after the server has stopped
+accepting connections and finished the requests it could. It stops the
+worker from taking new work, cancels a cache priming run, gives job chunks and detached upstream
+calls until settings.drain_timeout to finish, so results already paid
+for reach the cache, and then merges the cache into the snapshot shared
+by all workers. Job progress is
+saved after every chunk, so interrupted jobs resume on the next start.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+from app.config import settings
+from app.services.admission import get_admission_controller
+from app.services.cache_priming import get_cache_primer
+from app.services.job_service import get_job_manager
+from app.services.sentiment_service import get_sentiment_service
+
+logger = logging.getLogger(__name__)
+
+
+async def drain(timeout: float) -> Dict[str, Any]:
+    """
+    Drain the worker for shutdown.
+    
+    Args:
+        timeout: Seconds allowed for jobs and upstream calls to finish
+    
+    Returns:
+        Report with the drain duration and what completed or was dropped
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    admission = get_admission_controller()
+    admission.warm = False
+    admission.draining = True
+    service = get_sentiment_service()
+    
+    # Priming would keep starting batches whose calls the service drain waits for
+    priming_cancelled = await get_cache_primer().stop()
+    
+    # Jobs first: their chunks start upstream calls the service drain waits for
+    report: Dict[str, Any] = await get_job_manager().drain(max(0.0, deadline - time.monotonic()))
+    report.update(await service.drain(max(0.0, deadline - time.monotonic())))
+    report["requests_in_flight"] = service.llm_in_flight + service.llm_waiting
+    report["priming_cancelled"] = priming_cancelled
+    
+    report["cache_entries_saved"] = 0
+    if settings.enable_cache and settings.cache_snapshot_enabled:
+        try:
+            report["cache_entries_saved"] = await asyncio.to_thread(
+                service.save_cache, settings.cache_snapshot_path
+            )
+        except OSError as e:
+            logger.error(f"Could not save cache snapshot: {str(e)}")
+    
+    report["drain_seconds"] = round(time.monotonic() - started, 3)
+    logger.info(
+        f"Drained in {report['drain_seconds']:.2f}s: "
+        f"{report['calls_completed']} upstream call(s) completed, "
+        f"{report['calls_dropped']} dropped, "
+        f"{report['jobs_paused']} job(s) paused, "
+        f"{report['jobs_interrupted']} interrupted, "
+        f"{report['cache_entries_saved']} cache entries saved"
+    )
+    return report
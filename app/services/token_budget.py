@@ -0,0 +1,202 @@
+"""
+LLM token accounting and tokens-per-minute admission control.
+
+Every upstream call is attributed to the endpoint that caused it through a
+context variable set by the `tag_endpoint` dependency, and its reported
+prompt and completion tokens are totalled per endpoint and per model.
+
+Each model has a TokenBudget: a token bucket refilled at the configured
+tokens per minute. A request reserves its estimated tokens before the
+call (prompt estimated from its length, completion at max_tokens) and
+the reservation is corrected with the reported usage afterwards. Retries
+and hedged backups of a call are charged the same estimate again without
+waiting, since the provider counts their tokens too. When the
+bucket is empty, requests wait in FIFO order while the expected wait is
+under settings.llm_tpm_max_wait_ms; beyond that they are rejected so the
+caller can fall back instead of collecting a 429. Background callers such
+as the job workers opt to wait as long as it takes instead. A request
+estimated above the burst capacity is admitted alone once the bucket is
+full and leaves it in debt, so it is delayed rather than refused forever.
+"""
+import asyncio
+import logging
+import math
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from starlette.requests import HTTPConnection
+
+logger = logging.getLogger(__name__)
+
+_RATIO_ALPHA = 0.1
+
+_endpoint: ContextVar[str] = ContextVar("usage_endpoint", default="background")
+_wait_for_budget: ContextVar[bool] = ContextVar("wait_for_budget", default=False)
+
+
+async def tag_endpoint(connection: HTTPConnection) -> None:
+    """Dependency attributing upstream token usage to the matched route."""
+    route = connection.scope.get("route")
+    _endpoint.set(getattr(route, "path", connection.url.path))
+
+
+def set_usage_endpoint(name: str, wait_for_budget: bool = False) -> None:
+    """
+    Attribute token usage in the current context to a named caller.
+    
+    Args:
+        name: Caller reported in the per-endpoint totals
+        wait_for_budget: Queue for the token budget however long it takes
+            instead of being rejected after the maximum wait
+    """
+    _endpoint.set(name)
+    _wait_for_budget.set(wait_for_budget)
+
+
+class TokenAccountant:
+    """Totals upstream calls and tokens per endpoint and per model."""
+    
+    def __init__(self):
+        """Initialize empty totals."""
+        self._totals: Dict[str, Dict[str, Dict[str, int]]] = {"by_endpoint": {}, "by_model": {}}
+    
+    def record(self, model: str, usage: Optional[Dict[str, Any]]) -> None:
+        """Record one upstream call for the current endpoint."""
+        usage = usage or {}
+        for group, key in (("by_endpoint", _endpoint.get()), ("by_model", model)):
+            totals = self._totals[group].setdefault(
+                key, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            )
+            totals["calls"] += 1
+            totals["prompt_tokens"] += usage.get("input_tokens", 0)
+            totals["completion_tokens"] += usage.get("output_tokens", 0)
+    
+    def get_stats(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Totals per endpoint and per model."""
+        return self._totals
+
+
+class TokenBudget:
+    """Token bucket pacing one model's calls to a tokens-per-minute limit."""
+    
+    def __init__(
+        self,
+        tokens_per_minute: int,
+        burst_fraction: float,
+        max_wait: float,
+        completion_tokens: int,
+        prompt_overhead_chars: int
+    ):
+        """
+        Initialize the budget.
+        
+        Args:
+            tokens_per_minute: Limit to stay under; 0 disables pacing
+            burst_fraction: Share of the limit available as an instant burst;
+                the rest refills evenly, so no 60 second window exceeds the limit
+            max_wait: Longest expected wait in seconds before a request is rejected
+            completion_tokens: Completion tokens reserved per call
+            prompt_overhead_chars: Characters of prompt sent besides the text
+        """
+        self.tokens_per_minute = tokens_per_minute
+        self.capacity = tokens_per_minute * burst_fraction
+        self.rate = tokens_per_minute * (1.0 - burst_fraction) / 60.0
+        self.max_wait = max_wait
+        self.completion_tokens = completion_tokens
+        self.prompt_overhead_chars = prompt_overhead_chars
+        self.tokens_per_char = 0.25
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._queued_tokens = 0
+        self.waiting = 0
+        self.paced = 0
+        self.rejected = 0
+    
+    def estimate(self, text: str) -> int:
+        """Estimate a call's total tokens from the text length."""
+        prompt_chars = self.prompt_overhead_chars + len(text)
+        return math.ceil(prompt_chars * self.tokens_per_char) + self.completion_tokens
+    
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last update."""
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self, tokens: int) -> bool:
+        """
+        Reserve tokens for a call, waiting in line if the bucket is empty.
+        
+        Returns:
+            False if the expected wait exceeds max_wait and the caller
+            does not wait for budget
+        """
+        if not self.tokens_per_minute:
+            return True
+        # The bucket never holds more than capacity; a larger request needs a full one
+        needed = min(tokens, self.capacity)
+        self._refill()
+        if not self._queued_tokens and self._available >= needed:
+            self._available -= tokens
+            return True
+        
+        deficit = self._queued_tokens + needed - self._available
+        if deficit / self.rate > self.max_wait and not _wait_for_budget.get():
+            self.rejected += 1
+            return False
+        
+        self._queued_tokens += needed
+        self.waiting += 1
+        try:
+            async with self._lock:
+                self._refill()
+                while self._available < needed:
+                    await asyncio.sleep((needed - self._available) / self.rate)
+                    self._refill()
+                self._available -= tokens
+        finally:
+            self._queued_tokens -= needed
+            self.waiting -= 1
+        self.paced += 1
+        return True
+    
+    def reconcile(self, text: str, reserved: int, usage: Optional[Dict[str, Any]]) -> None:
+        """
+        Correct a reservation with the usage reported for the call, and
+        refine the tokens-per-character estimate.
+        """
+        if not usage:
+            return
+        prompt_tokens = usage.get("input_tokens", 0)
+        if prompt_tokens:
+            observed = prompt_tokens / (self.prompt_overhead_chars + len(text))
+            self.tokens_per_char += _RATIO_ALPHA * (observed - self.tokens_per_char)
+        if self.tokens_per_minute:
+            actual = usage.get("total_tokens") or prompt_tokens + usage.get("output_tokens", 0)
+            self._available = min(self.capacity, self._available + reserved - actual)
+    
+    def charge(self, tokens: int) -> None:
+        """Spend tokens at once, possibly into debt, for an extra attempt of an admitted call."""
+        if self.tokens_per_minute:
+            self._refill()
+            self._available -= tokens
+    
+    def release(self, reserved: int) -> None:
+        """Return a reservation for a call that failed before using tokens."""
+        if self.tokens_per_minute:
+            self._available = min(self.capacity, self._available + reserved)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Budget configuration and pacing counters."""
+        if self.tokens_per_minute:
+            self._refill()
+        return {
+            "tokens_per_minute": self.tokens_per_minute,
+            "available": round(self._available),
+            "waiting": self.waiting,
+            "paced": self.paced,
+            "rejected": self.rejected,
+            "tokens_per_char": round(self.tokens_per_char, 4),
+        }
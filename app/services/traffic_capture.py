@@ -0,0 +1,131 @@
+"""
+Sampled capture of request traffic for realistic replays.
+
+Each captured request is one JSON line with its arrival time and, by
+default, only the hash (of its cache key) and length of its text:
+
+    {"t": 1760000000.123, "hash": "9f2c...", "length": 182}
+
+The hash is keyed with a random secret kept next to the capture in
+<path>.key (created by the first worker, read by the others), so short
+texts cannot be recovered from the capture by hashing guesses; keep the
+key file off any copy that is shared. With settings.capture_raw_text
+the text itself is stored instead of the hash.
+
+Sampling keeps a fixed fraction of distinct texts, chosen by hash, rather
+than a fraction of requests: every repeat of a sampled text is captured
+too, so the sample keeps the traffic's duplicate rate and text length
+distribution. Lines are written with a single O_APPEND write so
+several worker processes can share one file.
+"""
+import hashlib
+import logging
+import os
+import secrets
+from typing import Any, Dict, Iterator
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+_HASH_SPACE = 2 ** 64
+_KEY_BYTES = 32
+
+
+def load_hash_key(path: str) -> bytes:
+    """
+    Read the capture's hash key, creating it if no worker has yet.
+    
+    The key is written to a private temporary file and linked into place,
+    so concurrent workers agree on one key and never read a partial file.
+    """
+    key_path = f"{path}.key"
+    if not os.path.exists(key_path):
+        os.makedirs(os.path.dirname(key_path) or ".", exist_ok=True)
+        tmp_path = f"{key_path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.write(fd, secrets.token_bytes(_KEY_BYTES))
+        finally:
+            os.close(fd)
+        try:
+            os.link(tmp_path, key_path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+    with open(key_path, "rb") as handle:
+        return handle.read()
+
+
+class TrafficCapture:
+    """Appends sampled request arrivals to a JSONL file."""
+    
+    def __init__(self, path: str, sample_rate: float, raw_text: bool):
+        """
+        Initialize the capture; the file is opened on first write.
+        
+        Args:
+            path: Capture file
+            sample_rate: Fraction of distinct texts captured
+            raw_text: Store texts instead of their hash and length
+        """
+        self.path = path
+        self.raw_text = raw_text
+        try:
+            self._key = load_hash_key(path)
+        except OSError as e:
+            logger.warning(f"Could not read capture hash key, using a per-process key: {str(e)}")
+            self._key = secrets.token_bytes(_KEY_BYTES)
+        self._threshold = int(sample_rate * _HASH_SPACE)
+        self._fd = None
+        self.captured = 0
+    
+    def record(self, text: str, cache_key: str, arrived: float) -> None:
+        """
+        Capture a request if its text is sampled; failures are logged and ignored.
+        
+        Args:
+            text: Request text
+            cache_key: The text's cache key, so repeats hash alike
+            arrived: Wall-clock arrival time
+        """
+        digest = int.from_bytes(
+            hashlib.blake2b(cache_key.encode("utf-8"), digest_size=8, key=self._key).digest(), "big"
+        )
+        if digest >= self._threshold:
+            return
+        record: Dict[str, Any] = {"t": round(arrived, 6)}
+        if self.raw_text:
+            record["text"] = text
+        else:
+            record["hash"] = f"{digest:016x}"
+            record["length"] = len(text)
+        try:
+            if self._fd is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, orjson.dumps(record) + b"\n")
+            self.captured += 1
+        except OSError as e:
+            logger.warning(f"Could not write traffic capture {self.path}: {str(e)}")
+    
+    def close(self) -> None:
+        """Close the underlying file."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def read_capture(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield captured requests, skipping malformed lines."""
+    with open(path, "rb") as handle:
+        for line in handle:
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue
+            if not isinstance(record, dict) or "t" not in record:
+                continue
+            if "text" in record or "hash" in record:
+                yield record
@@ -0,0 +1,157 @@
+"""
+Load balancing across a pool of upstream endpoints and API keys.
+
+Each call is sent to the member with the lowest weighted load. With the
+least_outstanding balancer, load is (outstanding + 1) / weight. With
+latency_ewma it is also multiplied by the member's latency EWMA, so a
+member that slows down sheds traffic before it starts failing. Members
+that have no latency yet score zero and are tried first.
+
+A member with settings.upstream_eject_failures consecutive transient
+failures is ejected for settings.upstream_eject_seconds. When it returns
+it is on probation: its first failure ejects it again. If every member
+is ejected, the pool keeps using them rather than failing outright.
+"""
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.config import UpstreamConfig
+from app.services.retry_policy import is_retryable
+
+logger = logging.getLogger(__name__)
+
+_EWMA_ALPHA = 0.2
+
+
+class UpstreamMember:
+    """Load, latency and health of one upstream endpoint."""
+    
+    def __init__(self, config: UpstreamConfig):
+        """Initialize an idle, healthy member."""
+        self.config = config
+        self.name = config.name
+        self.weight = config.weight
+        self._slots = asyncio.Semaphore(config.max_concurrency)
+        self.outstanding = 0
+        self.calls = 0
+        self.errors = 0
+        self.latency_ewma: Optional[float] = None
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self._probation = False
+    
+    @property
+    def ejected(self) -> bool:
+        """Whether the member is currently ejected."""
+        return time.monotonic() < self.ejected_until
+    
+    @property
+    def saturated(self) -> bool:
+        """Whether all of the member's concurrency slots are taken."""
+        return self.outstanding >= self.config.max_concurrency
+    
+    def load(self, balancer: str) -> float:
+        """Weighted load used to pick the next member; lower is better."""
+        load = (self.outstanding + 1) / self.weight
+        if balancer == "latency_ewma":
+            load *= self.latency_ewma or 0.0
+        return load
+    
+    def record_success(self, latency: float) -> None:
+        """Update latency and clear failures after a successful call."""
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += _EWMA_ALPHA * (latency - self.latency_ewma)
+        self.consecutive_failures = 0
+        self._probation = False
+    
+    def record_failure(self, eject_failures: int, eject_seconds: float) -> None:
+        """Count a transient failure, ejecting the member if it keeps failing."""
+        self.errors += 1
+        self.consecutive_failures += 1
+        if self._probation or self.consecutive_failures >= eject_failures:
+            self.ejected_until = time.monotonic() + eject_seconds
+            self.ejections += 1
+            self.consecutive_failures = 0
+            self._probation = True
+            logger.warning(f"Ejected upstream {self.name} for {eject_seconds:.0f}s")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-member metrics; the API key is never included."""
+        return {
+            "name": self.name,
+            "base_url": self.config.base_url,
+            "weight": self.weight,
+            "max_concurrency": self.config.max_concurrency,
+            "outstanding": self.outstanding,
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_ewma_ms": (
+                round(self.latency_ewma * 1000, 2) if self.latency_ewma is not None else None
+            ),
+            "ejected": self.ejected,
+            "ejections": self.ejections,
+        }
+
+
+class UpstreamPool:
+    """Picks an upstream member per call and tracks its outcome."""
+    
+    def __init__(
+        self,
+        configs: List[UpstreamConfig],
+        balancer: str,
+        eject_failures: int,
+        eject_seconds: float
+    ):
+        """
+        Initialize the pool.
+        
+        Args:
+            configs: Pool members; names must be unique
+            balancer: "least_outstanding" or "latency_ewma"
+            eject_failures: Consecutive transient failures before ejection
+            eject_seconds: How long an ejected member is left out
+        """
+        self.members = [UpstreamMember(config) for config in configs]
+        self.balancer = balancer
+        self.eject_failures = eject_failures
+        self.eject_seconds = eject_seconds
+    
+    def choose(self) -> UpstreamMember:
+        """Pick the least loaded healthy member with a free slot, if any."""
+        candidates = [member for member in self.members if not member.ejected] or self.members
+        candidates = [member for member in candidates if not member.saturated] or candidates
+        return min(candidates, key=lambda member: (member.load(self.balancer), random.random()))
+    
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[UpstreamMember]:
+        """Hold a slot on the chosen member for one call and record its outcome."""
+        member = self.choose()
+        member.outstanding += 1
+        try:
+            async with member._slots:
+                member.calls += 1
+                started = time.perf_counter()
+                try:
+                    yield member
+                except Exception as e:
+                    if is_retryable(e):
+                        member.record_failure(self.eject_failures, self.eject_seconds)
+                    raise
+                member.record_success(time.perf_counter() - started)
+        finally:
+            member.outstanding -= 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Balancer and per-member metrics."""
+        return {
+            "balancer": self.balancer,
+            "members": [member.get_stats() for member in self.members],
+        }
@@ -0,0 +1,149 @@
+"""
+Event loop lag and slow callback monitoring.
+
+A task on the loop sleeps for a fixed interval and records how late it
+wakes up; sustained lag means something is blocking the loop. A watchdog
+thread watches the task's heartbeat and, once the loop has been stuck for
+longer than the slow callback threshold, captures the loop thread's stack
+so the blocking call can be identified. Asyncio debug mode would give the
+same information at a much higher cost per callback.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_EWMA_ALPHA = 0.1
+_STACK_LIMIT = 30
+
+
+class LoopLagMonitor:
+    """Measures event loop lag and records slow callbacks with their stacks."""
+    
+    def __init__(
+        self,
+        interval: float = 0.1,
+        slow_threshold: float = 0.1,
+        max_events: int = 50
+    ):
+        """
+        Initialize the monitor.
+        
+        Args:
+            interval: Sampling interval in seconds
+            slow_threshold: Lag in seconds at which a slow callback is recorded
+            max_events: Number of recent slow callbacks kept
+        """
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.lag_ewma = 0.0
+        self.lag_max = 0.0
+        self.samples = 0
+        self.slow_callbacks = 0
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._stall_heartbeat: Optional[float] = None
+        self._stall_stack: Optional[List[str]] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+    
+    def start(self) -> None:
+        """Start sampling on the running loop and the watchdog thread."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+        self._stopping.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+    
+    async def stop(self) -> None:
+        """Stop sampling and the watchdog."""
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+    
+    async def _run(self) -> None:
+        """Sample lag until cancelled."""
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - expected))
+    
+    def _watch(self) -> None:
+        """Capture the loop thread's stack while the loop is stalled."""
+        while not self._stopping.wait(self.interval / 2):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            if stalled < self.slow_threshold or self._stall_heartbeat == heartbeat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._stall_stack = traceback.format_stack(frame, limit=_STACK_LIMIT)
+                self._stall_heartbeat = heartbeat
+    
+    def record(self, lag: float) -> None:
+        """Record one lag sample in seconds."""
+        previous = self._heartbeat
+        self._heartbeat = time.monotonic()
+        self.samples += 1
+        self.lag_ewma += _EWMA_ALPHA * (lag - self.lag_ewma)
+        self.lag_max = max(self.lag_max, lag)
+        if lag < self.slow_threshold:
+            return
+        
+        stack = self._stall_stack if self._stall_heartbeat == previous else None
+        self._stall_stack = None
+        self.slow_callbacks += 1
+        self.events.append({
+            "at": time.time(),
+            "lag_ms": round(lag * 1000, 2),
+            "stack": [line.rstrip() for line in stack] if stack else None,
+        })
+        where = stack[-1].strip().splitlines()[0] if stack else "unknown location"
+        logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms at {where}")
+    
+    def get_stats(self) -> Dict[str, float]:
+        """Lag statistics in milliseconds."""
+        return {
+            "loop_lag_ewma_ms": round(self.lag_ewma * 1000, 2),
+            "loop_lag_max_ms": round(self.lag_max * 1000, 2),
+            "loop_lag_samples": self.samples,
+            "slow_callbacks": self.slow_callbacks,
+        }
+    
+    def get_events(self) -> List[Dict[str, Any]]:
+        """Recent slow callbacks, newest first."""
+        return list(reversed(self.events))
+
+
+# Global monitor instance
+_monitor: Optional[LoopLagMonitor] = None
+
+
+def get_loop_monitor() -> LoopLagMonitor:
+    """Get or create the event loop monitor."""
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopLagMonitor(
+            settings.loop_monitor_interval_ms / 1000,
+            settings.loop_slow_callback_ms / 1000,
+            settings.loop_monitor_max_events
+        )
+    return _monitor
@@ -0,0 +1,128 @@
+"""
+Sampling CPU profiler and tracemalloc snapshots for a running worker.
+
+The CPU profiler samples the stacks of every thread with
+sys._current_frames at a fixed interval and aggregates them as folded
+stacks ("outer;inner count" lines), the input format of flame graph
+tools. It needs no tracing hooks, so request handling runs at full speed
+while it is active.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List
+
+_MAX_DEPTH = 64
+
+
+def _frame_label(frame) -> str:
+    """Short label for a stack frame: function (package/module.py:line)."""
+    code = frame.f_code
+    path = os.path.normpath(code.co_filename).split(os.sep)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+def sample_cpu(seconds: float, interval: float) -> Counter:
+    """
+    Sample all thread stacks for a duration.
+    
+    Args:
+        seconds: How long to sample
+        interval: Seconds between samples
+    
+    Returns:
+        Counter of folded stacks (root first, ';'-separated) to sample counts
+    """
+    own_thread = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            labels = []
+            while frame is not None and len(labels) < _MAX_DEPTH:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, f"thread-{thread_id}"))
+            stacks[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def folded_report(stacks: Counter) -> str:
+    """Render folded stacks, most frequent first."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def top_functions(stacks: Counter, limit: int) -> List[Dict[str, Any]]:
+    """
+    Functions ranked by samples where they were on the stack (total) and
+    at the top of the stack (self).
+    """
+    total: Counter = Counter()
+    own: Counter = Counter()
+    samples = sum(stacks.values())
+    for stack, count in stacks.items():
+        frames = stack.split(";")[1:]
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for label in set(frames):
+            total[label] += count
+    return [
+        {
+            "function": label,
+            "self_percent": round(100.0 * own[label] / samples, 2),
+            "total_percent": round(100.0 * count / samples, 2),
+        }
+        for label, count in total.most_common(limit)
+    ]
+
+
+async def sample_memory(seconds: float, limit: int, frames: int = 10) -> List[Dict[str, Any]]:
+    """
+    Trace allocations for a duration and return the largest allocation sites.
+    
+    Only memory allocated during the window and still alive at its end is
+    reported. If tracemalloc was already running it is left running.
+    
+    Args:
+        seconds: How long to trace
+        limit: Number of allocation sites to return
+        frames: Traceback depth kept per allocation
+    
+    Returns:
+        Allocation sites with size and block counts, largest first
+    """
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(frames)
+    try:
+        baseline = tracemalloc.take_snapshot()
+        await asyncio.sleep(seconds)
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+    
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ]
+    diff = snapshot.filter_traces(filters).compare_to(baseline.filter_traces(filters), "traceback")
+    return [
+        {
+            "size_kb": round(stat.size_diff / 1024, 2),
+            "blocks": stat.count_diff,
+            "traceback": stat.traceback.format()[-2 * frames:],
+        }
+        for stat in diff[:limit]
+        if stat.size_diff > 0
+    ]
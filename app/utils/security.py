@@ -0,0 +1,35 @@
+"""
+Admin token checks for operational endpoints.
+"""
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+from app.config import settings
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Check a token against settings.admin_token; always false when none is configured."""
+    if not settings.admin_token or token is None:
+        return False
+    return secrets.compare_digest(token.encode("utf-8"), settings.admin_token.encode("utf-8"))
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Dependency guarding admin endpoints with the X-Admin-Token header.
+    
+    Raises:
+        HTTPException: 403 if admin endpoints are disabled or the token is wrong
+    """
+    if not settings.admin_token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them"
+        )
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin token"
+        )
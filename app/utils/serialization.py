@@ -0,0 +1,26 @@
+"""
+Fast JSON serialization helpers.
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def model_to_json(model: BaseModel) -> bytes:
+    """Serialize a Pydantic model to JSON bytes."""
+    return orjson.dumps(model.model_dump(mode="json"))
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+    Pre-serialized bytes are sent as-is without re-encoding.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        """Render content to JSON bytes."""
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content)
@@ -0,0 +1,134 @@
+"""
+Per-request phase timing reported as a Server-Timing header.
+
+Code on the request path wraps its phases in `phase(name)`. A PhaseTimer
+in a context variable collects them and the route or middleware returns
+them in the response's Server-Timing header, which browser dev tools and
+proxies read directly. Each phase is also recorded as a tracing span.
+When the request is neither timed nor traced, `phase` only performs two
+context variable lookups.
+
+Timers come from `request_timer()` in routes that always report timing
+(settings.server_timing_enabled), or from PhaseTimingMiddleware for any
+request carrying `X-Profile: 1` and a valid `X-Admin-Token`.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.utils.security import is_admin_token
+from app.utils.tracing import Span, span
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+
+class PhaseTimer:
+    """Accumulates time per named phase of one request."""
+    
+    def __init__(self):
+        """Start timing the request."""
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+    
+    def add(self, name: str, seconds: float) -> None:
+        """Add time to a phase."""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+    
+    def server_timing(self) -> str:
+        """Render phases and the total as a Server-Timing header value."""
+        total = time.perf_counter() - self.started
+        entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.phases.items()]
+        entries.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(entries)
+
+
+_timer: ContextVar[Optional[PhaseTimer]] = ContextVar("phase_timer", default=None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[Optional[Span]]:
+    """
+    Time a block as a phase of the current request, if it is being timed,
+    and record it as a span, if the request is traced.
+    
+    Yields the span, or None when the request is not traced.
+    """
+    timer = _timer.get()
+    with span(name) as current:
+        if timer is None:
+            yield current
+            return
+        started = time.perf_counter()
+        try:
+            yield current
+        finally:
+            timer.add(name, time.perf_counter() - started)
+
+
+@contextmanager
+def request_timer() -> Iterator[Optional[PhaseTimer]]:
+    """
+    Time the phases of the enclosed block for a route's Server-Timing header.
+    
+    Yields None when timing is disabled, or when the profiling middleware
+    already times the request and will add the header itself.
+    """
+    if not settings.server_timing_enabled or _timer.get() is not None:
+        yield None
+        return
+    timer = PhaseTimer()
+    token = _timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _timer.reset(token)
+
+
+def mark_since_start(name: str) -> None:
+    """Record the time from the start of the request until now as a phase."""
+    timer = _timer.get()
+    if timer is not None:
+        timer.add(name, time.perf_counter() - timer.started)
+
+
+class PhaseTimingMiddleware:
+    """ASGI middleware that enables phase timing for authorized requests."""
+    
+    def __init__(self, app: ASGIApp):
+        """Wrap an ASGI application."""
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Install a timer and add the Server-Timing header to the response."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if headers.get(PROFILE_HEADER) != "1" or not is_admin_token(headers.get("x-admin-token")):
+            await self.app(scope, receive, send)
+            return
+        
+        timer = PhaseTimer()
+        token = _timer.set(timer)
+        
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                value = timer.server_timing()
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", value.encode("latin-1"))
+                ]
+                logger.info(f"Profiled {scope['path']}: {value}")
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timer.reset(token)
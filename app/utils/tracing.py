@@ -0,0 +1,340 @@
+"""
+Lightweight request tracing with spans written to local files.
+
+Spans nest through a context variable, so they follow a request across
+await points and into tasks it creates. The root span comes from
+TracingMiddleware, which continues an incoming W3C `traceparent` or
+`X-Trace-Id` header or samples new requests at settings.trace_sample_rate.
+Unsampled requests only pay for a context variable lookup per span.
+
+Finished spans are buffered in memory and a background thread appends
+them to settings.trace_dir/trace-<pid>.json, rotating by size. Recycled
+workers start new files under new pids, so on start and after each
+rotation the oldest trace files of any process are removed until the
+directory fits settings.trace_max_total_bytes. Files use
+the Chrome trace event format with one event per line: the opening "["
+is written once and the closing bracket is optional, so files load
+directly in Perfetto (ui.perfetto.dev) or chrome://tracing while being
+written. Each trace is drawn on its own track.
+"""
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+import orjson
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRACE_ID_HEADER = "x-trace-id"
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_TRACE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class Span:
+    """A timed operation within a trace."""
+    
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "attributes")
+    
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any]
+    ):
+        """Start a span."""
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.attributes = attributes
+    
+    def set(self, key: str, value: Any) -> None:
+        """Set an attribute on the span."""
+        self.attributes[key] = value
+    
+    def to_event(self, end_ns: int) -> Dict[str, Any]:
+        """Convert the finished span to a Chrome trace "complete" event."""
+        return {
+            "name": self.name,
+            "cat": "sentiment",
+            "ph": "X",
+            "ts": self.start_ns / 1000,
+            "dur": (end_ns - self.start_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": int(self.trace_id[:8], 16),
+            "args": {
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent_id,
+                **self.attributes
+            }
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class SpanExporter:
+    """Buffers finished spans and appends them to a rotating file from a thread."""
+    
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        backup_count: int,
+        flush_interval: float,
+        buffer_size: int,
+        max_total_bytes: int = 0
+    ):
+        """
+        Initialize the exporter; call start() to begin flushing.
+        
+        Args:
+            directory: Directory shared by every process's trace files
+            max_bytes: Size at which this process's file is rotated
+            backup_count: Rotated files kept per process
+            flush_interval: Seconds between writes
+            buffer_size: Spans held before the oldest are dropped
+            max_total_bytes: Limit for all trace files in the directory; 0 disables it
+        """
+        self.path = os.path.join(directory, f"trace-{os.getpid()}.json")
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.max_total_bytes = max_total_bytes
+        self.flush_interval = flush_interval
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self._buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.exported = 0
+        self.dropped = 0
+    
+    def export(self, event: Dict[str, Any]) -> None:
+        """Queue a finished span; the oldest is dropped when the buffer is full."""
+        if len(self._buffer) >= self._buffer_size:
+            self.dropped += 1
+        self._buffer.append(event)
+    
+    def start(self) -> None:
+        """Start the background flush thread."""
+        if self._thread is None:
+            try:
+                self._prune()
+            except OSError as e:
+                logger.warning(f"Could not prune trace files: {str(e)}")
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the flush thread and write remaining spans."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.flush()
+    
+    def _run(self) -> None:
+        """Flush periodically until stopped."""
+        while not self._stopping.wait(self.flush_interval):
+            self.flush()
+    
+    def flush(self) -> None:
+        """Append buffered spans to the current file."""
+        with self._lock:
+            events = []
+            while self._buffer:
+                events.append(self._buffer.popleft())
+            if not events:
+                return
+            try:
+                self._write(b"".join(orjson.dumps(event) + b",\n" for event in events))
+                self.exported += len(events)
+            except OSError as e:
+                self.dropped += len(events)
+                logger.warning(f"Could not write trace file {self.path}: {str(e)}")
+    
+    def _write(self, data: bytes) -> None:
+        """Write to the trace file, rotating it first if it is full."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size and size + len(data) > self.max_bytes:
+            self._rotate()
+            size = 0
+        with open(self.path, "ab") as handle:
+            if size == 0:
+                handle.write(b"[\n")
+            handle.write(data)
+    
+    def _rotate(self) -> None:
+        """Shift trace.json -> trace.json.1 -> ... dropping the oldest."""
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._prune()
+    
+    def _prune(self) -> None:
+        """Remove the oldest trace files, of any process, beyond max_total_bytes."""
+        directory = os.path.dirname(self.path) or "."
+        if not self.max_total_bytes or not os.path.isdir(directory):
+            return
+        files = []
+        for entry in os.scandir(directory):
+            if not entry.name.startswith("trace-") or not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((entry.path == self.path, stat.st_mtime, stat.st_size, entry.path))
+        
+        total = sum(size for _, _, size, _ in files)
+        # Oldest first, and this process's current file last
+        for _, _, size, path in sorted(files):
+            if total <= self.max_total_bytes or path == self.path:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Export counters."""
+        return {
+            "spans_buffered": len(self._buffer),
+            "spans_exported": self.exported,
+            "spans_dropped": self.dropped,
+        }
+
+
+# Global exporter instance
+_exporter: Optional[SpanExporter] = None
+
+
+def get_span_exporter() -> SpanExporter:
+    """Get or create the span exporter."""
+    global _exporter
+    if _exporter is None:
+        _exporter = SpanExporter(
+            settings.trace_dir,
+            settings.trace_max_bytes,
+            settings.trace_backup_count,
+            settings.trace_flush_interval,
+            settings.trace_buffer_size,
+            settings.trace_max_total_bytes
+        )
+    return _exporter
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Record a child span of the current span, if the request is traced.
+    
+    Yields the span, or None when the request is not being traced.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    
+    current = Span(name, parent.trace_id, parent.span_id, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set("error", type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        get_span_exporter().export(current.to_event(time.time_ns()))
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace id of the current request, if it is traced."""
+    current = _current_span.get()
+    return current.trace_id if current is not None else None
+
+
+def _incoming_trace(headers: Headers) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Decide whether to trace a request.
+    
+    Returns:
+        (trace_id, parent_span_id) for a traced request, otherwise None
+    """
+    traceparent = _TRACEPARENT.match(headers.get("traceparent", ""))
+    if traceparent is not None:
+        trace_id, parent_id, flags = traceparent.groups()
+        if int(flags, 16) & 0x01:
+            return trace_id, parent_id
+        return None
+    
+    trace_id = headers.get(TRACE_ID_HEADER, "").lower()
+    if _TRACE_ID.match(trace_id):
+        return trace_id, None
+    
+    if settings.trace_sample_rate > 0 and random.random() < settings.trace_sample_rate:
+        return f"{random.getrandbits(128):032x}", None
+    return None
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens the root span of traced HTTP requests."""
+    
+    def __init__(self, app: ASGIApp):
+        """Wrap an ASGI application."""
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Trace the request if it is sampled and return its trace id."""
+        if scope["type"] != "http" or not settings.tracing_enabled:
+            await self.app(scope, receive, send)
+            return
+        incoming = _incoming_trace(Headers(scope=scope))
+        if incoming is None:
+            await self.app(scope, receive, send)
+            return
+        
+        trace_id, parent_id = incoming
+        root = Span(
+            f"{scope['method']} {scope['path']}",
+            trace_id,
+            parent_id,
+            {"http.method": scope["method"], "http.path": scope["path"]}
+        )
+        token = _current_span.set(root)
+        
+        async def send_with_trace_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.set("http.status", message["status"])
+                message["headers"] = list(message.get("headers", [])) + [
+                    (TRACE_ID_HEADER.encode("latin-1"), trace_id.encode("latin-1"))
+                ]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            _current_span.reset(token)
+            get_span_exporter().export(root.to_event(time.time_ns()))
@@ -0,0 +1,104 @@
+"""
+Benchmark for the cache-hit request path of /analyze-sentiment.
+
+Compares the previous response path (model copy, response_model
+validation and stdlib json) with the pre-serialized cached body, then
+measures full cache-hit requests through the ASGI app.
+
+Usage:
+    python -m benchmarks.bench_cache_hit [--iterations N]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from langchain_core.messages import AIMessage
+
+from app.main import app
+from app.models import SentimentLabel, SentimentResponse
+from app.services.sentiment_service import SentimentOutput, get_sentiment_service
+
+TEXT = "I love this product! It's amazing!"
+
+
+def _legacy_path(result: SentimentOutput) -> bytes:
+    """Previous route behaviour: copy, validate again, encode with json."""
+    response = SentimentResponse(
+        sentiment=result.sentiment,
+        confidence=result.confidence,
+        explanation=result.explanation
+    )
+    validated = SentimentResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def _time(label: str, fn, iterations: int) -> float:
+    """Time a callable and print per-call latency."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed / iterations * 1e6
+    print(f"   {label:<32} {per_call_us:8.2f} us/call")
+    return per_call_us
+
+
+async def _bench_requests(iterations: int) -> None:
+    """Measure full cache-hit requests through the ASGI stack."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        payload = {"text": TEXT}
+        for _ in range(100):
+            await client.post("/analyze-sentiment", json=payload)
+        
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await client.post("/analyze-sentiment", json=payload)
+        elapsed = time.perf_counter() - start
+    
+    print(f"   {'cache-hit request':<32} {elapsed / iterations * 1e6:8.2f} us/call")
+    print(f"   {'throughput':<32} {iterations / elapsed:8.0f} req/s")
+
+
+def main() -> None:
+    """Run the cache-hit benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    
+    service = get_sentiment_service()
+    result = SentimentOutput(
+        sentiment=SentimentLabel.POSITIVE,
+        confidence=0.95,
+        explanation="The text expresses strong positive emotions."
+    )
+    
+    # Seed the cache so no LLM call is made
+    class _SeedChain:
+        async def ainvoke(self, inputs):
+            return AIMessage(content=result.model_dump_json())
+    service.chains = {
+        member: {model: _SeedChain() for model in models}
+        for member, models in service.chains.items()
+    }
+    service.clear_cache()
+    asyncio.run(service.analyze_sentiment(TEXT))
+    
+    print("Cache-hit serialization")
+    print("=" * 50)
+    legacy = _time("legacy (copy + validate + json)", lambda: _legacy_path(result), args.iterations)
+    # Keyed once, as prime() does, so only the cache lookup is timed
+    cache_key = service._namespaced_key(service.router.preferred(TEXT), TEXT)
+    fast = _time("cached bytes", lambda: service._cache[cache_key].body, args.iterations)
+    print(f"   speedup: {legacy / fast:.1f}x")
+    
+    print("\nCache-hit requests")
+    print("=" * 50)
+    asyncio.run(_bench_requests(args.iterations // 10))
+
+
+if __name__ == "__main__":
+    main()
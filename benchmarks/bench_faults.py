@@ -0,0 +1,140 @@
+"""
+Resilience benchmark: fallback rate and tail latency under injected faults.
+
+Runs each scenario in benchmarks/scenarios (or the files given) for one
+cycle of its phases. Open-loop traffic of distinct texts is sent to
+/analyze-sentiment through the ASGI app at a fixed rate, so every request
+needs an upstream call. Calls go to a local LLM stand-in, with the
+scenario's faults injected between the service and the stand-in.
+
+Usage:
+    python -m benchmarks.bench_faults
+    python -m benchmarks.bench_faults benchmarks/scenarios/rate_limit_storm.json --rps 50
+"""
+import argparse
+import asyncio
+import glob
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+import httpx
+import numpy as np
+import orjson
+
+import app.services.sentiment_service as sentiment_service
+from app.cli.llm_stub import start_stub
+from app.config import UpstreamConfig, settings
+from app.main import app
+from app.services.fault_injection import load_scenario
+
+SCENARIO_DIR = os.path.join(os.path.dirname(__file__), "scenarios")
+
+
+async def _drive(rps: float, duration: float) -> Tuple[List[Tuple[int, str, float]], float]:
+    """Send distinct texts at a fixed rate and collect (status, X-Cache, latency)."""
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None)
+    async with client:
+        async def send(index: int) -> Tuple[int, str, float]:
+            sent = time.perf_counter()
+            response = await client.post(
+                "/analyze-sentiment",
+                json={"text": f"Benchmark request {index}: the service was good"}
+            )
+            latency = time.perf_counter() - sent
+            return response.status_code, response.headers.get("x-cache", ""), latency
+        
+        started = time.monotonic()
+        tasks = []
+        for index in range(int(rps * duration)):
+            delay = index / rps - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(index)))
+        outcomes = await asyncio.gather(*tasks)
+        return list(outcomes), time.monotonic() - started
+
+
+def run_scenario(path: str, rps: float, upstream_latency: float) -> Dict[str, Any]:
+    """Run one scenario against a fresh service and report its results."""
+    scenario = load_scenario(path)
+    duration = sum(phase.duration for phase in scenario.phases)
+    stub = start_stub(latency=upstream_latency)
+    settings.upstreams = [UpstreamConfig(
+        name="stand-in", base_url=stub.base_url, api_key="sk-stand-in-bench-0000000000"
+    )]
+    settings.fault_scenario_path = path
+    sentiment_service._service = None
+    try:
+        outcomes, elapsed = asyncio.run(_drive(rps, duration))
+    finally:
+        stub.shutdown()
+        stub.server_close()
+    
+    metrics = sentiment_service.get_sentiment_service().get_metrics()
+    statuses = Counter(cache for code, cache, _ in outcomes if code == 200)
+    latencies = np.array([latency for _, _, latency in outcomes]) * 1000
+    requests = len(outcomes)
+    return {
+        "scenario": scenario.name,
+        "requests": requests,
+        "errors": sum(1 for code, _, _ in outcomes if code != 200),
+        "fallback_rate": round((statuses["FALLBACK"] + statuses["STALE"]) / requests, 4),
+        "latency_ms": {
+            name: round(float(np.percentile(latencies, q)), 1)
+            for name, q in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "elapsed_seconds": round(elapsed, 2),
+        "upstream_calls": stub.requests,
+        "retries": metrics["retries"]["retries"],
+        "injected": metrics["fault_injection"]["injected"],
+    }
+
+
+def main() -> None:
+    """Run the resilience benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "scenarios", nargs="*", help="Scenario files (default: benchmarks/scenarios/*.json)"
+    )
+    parser.add_argument("--rps", type=float, default=20.0, help="Requests per second")
+    parser.add_argument(
+        "--upstream-latency-ms", type=float, default=50.0, help="Stand-in base latency"
+    )
+    parser.add_argument("--json", action="store_true", help="Print one JSON report per scenario")
+    parser.add_argument("--verbose", action="store_true", help="Keep service logging")
+    args = parser.parse_args()
+    
+    if not args.verbose:
+        # Injected faults are logged as errors with tracebacks, and every call by the client
+        logging.disable(logging.CRITICAL)
+    
+    paths = args.scenarios or sorted(glob.glob(os.path.join(SCENARIO_DIR, "*.json")))
+    settings.enable_cache = False
+    settings.label_log_enabled = False
+    settings.aggregation_enabled = False
+    
+    if not args.json:
+        print(
+            f"{'scenario':<20} {'requests':>8} {'fallback':>9} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'p99 ms':>8} {'retries':>8}"
+        )
+        print("=" * 76)
+    for path in paths:
+        report = run_scenario(path, args.rps, args.upstream_latency_ms / 1000)
+        if args.json:
+            print(orjson.dumps(report).decode("utf-8"))
+            continue
+        latency = report["latency_ms"]
+        print(
+            f"{report['scenario']:<20} {report['requests']:>8} {report['fallback_rate']:>9.1%} "
+            f"{latency['p50']:>8.1f} {latency['p95']:>8.1f} {latency['p99']:>8.1f} "
+            f"{report['retries']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
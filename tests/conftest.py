@@ -0,0 +1,77 @@
+"""
+Shared pytest fixtures.
+"""
+import pytest
+from langchain_core.messages import AIMessage
+
+from app.models import SentimentLabel
+from app.services.admission import AdmissionController
+from app.services.sentiment_service import SentimentAnalysisService, SentimentOutput
+
+
+class StubChain:
+    """Stand-in for the LangChain chain that counts invocations."""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    @staticmethod
+    def message(output: SentimentOutput) -> AIMessage:
+        """Wrap a result in a model message with token usage."""
+        return AIMessage(
+            content=output.model_dump_json(),
+            usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150}
+        )
+    
+    async def ainvoke(self, inputs):
+        """Return a fixed positive result."""
+        self.calls += 1
+        return self.message(SentimentOutput(
+            sentiment=SentimentLabel.POSITIVE,
+            confidence=0.9,
+            explanation="Stubbed analysis"
+        ))
+
+
+@pytest.fixture(autouse=True)
+def admission_controller(monkeypatch):
+    """Give each test a fresh admission controller, since shutdown leaves one draining."""
+    controller = AdmissionController()
+    monkeypatch.setattr("app.services.admission._controller", controller)
+    yield controller
+
+
+# Settings naming files the app writes, and where tests put them under tmp_path
+DATA_PATHS = {
+    "label_log_path": "labels.jsonl",
+    "local_model_path": "local_model.npz",
+    "cache_snapshot_path": "cache_snapshot.jsonl",
+    "results_store_dir": "results",
+    "capture_path": "capture.jsonl",
+    "aggregation_snapshot_dir": "aggregates",
+    "priming_progress_path": "priming.json",
+    "trace_dir": "traces",
+    "job_storage_dir": "jobs",
+}
+
+
+@pytest.fixture(autouse=True)
+def data_paths(monkeypatch, tmp_path):
+    """Keep files written by the app, lifespan subsystems included, under tmp_path."""
+    for name, relative in DATA_PATHS.items():
+        monkeypatch.setattr(f"app.config.settings.{name}", str(tmp_path / relative))
+    # Built from the settings on first use, so rebuild them for each test
+    monkeypatch.setattr("app.services.job_service._manager", None)
+    monkeypatch.setattr("app.utils.tracing._exporter", None)
+
+
+@pytest.fixture
+def stub_chain(monkeypatch, tmp_path):
+    """Install a fresh service whose model chains are a shared stub."""
+    service = SentimentAnalysisService()
+    chain = StubChain()
+    service.chains = {
+        member: {model: chain for model in models} for member, models in service.chains.items()
+    }
+    monkeypatch.setattr("app.services.sentiment_service._service", service)
+    yield chain
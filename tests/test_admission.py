@@ -0,0 +1,110 @@
+"""
+Tests for liveness, readiness and priority-based load shedding.
+"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.admission import get_admission_controller
+from app.services.sentiment_service import get_sentiment_service
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def warm(monkeypatch):
+    """Mark the worker as warmed up."""
+    monkeypatch.setattr(get_admission_controller(), "warm", True)
+
+
+def queue_request(seconds_ago: float) -> None:
+    """Pretend a request has been waiting for an upstream slot."""
+    get_sentiment_service()._llm_waiters[object()] = time.monotonic() - seconds_ago
+
+
+class TestProbes:
+    """Test cases for /health/live and /health/ready."""
+    
+    def test_liveness(self):
+        """Test the liveness probe always answers."""
+        response = client.get("/health/live")
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+    
+    def test_not_ready_before_warm_up(self, stub_chain, monkeypatch):
+        """Test the worker is not ready until startup has finished."""
+        monkeypatch.setattr(get_admission_controller(), "warm", False)
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["checks"]["warm"] == {"ok": False}
+    
+    def test_ready_when_idle(self, stub_chain, warm):
+        """Test a warmed-up, idle worker is ready."""
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+    
+    def test_not_ready_with_deep_queue(self, stub_chain, warm, monkeypatch):
+        """Test a long upstream queue fails readiness."""
+        monkeypatch.setattr("app.config.settings.ready_max_queue_wait_ms", 1000)
+        queue_request(5.0)
+        
+        response = client.get("/health/ready")
+        
+        assert response.status_code == 503
+        queue = response.json()["checks"]["queue"]
+        assert not queue["ok"] and queue["waiting"] == 1
+        assert queue["queue_wait_ms"] >= 5000
+    
+    def test_not_ready_when_every_upstream_is_ejected(self, stub_chain, warm):
+        """Test readiness fails while the whole upstream pool is ejected."""
+        for member in get_sentiment_service().upstreams.members:
+            member.ejected_until = time.monotonic() + 60
+        
+        response = client.get("/health/ready")
+        
+        assert response.status_code == 503
+        assert response.json()["checks"]["upstream"]["available_members"] == 0
+
+
+class TestLoadShedding:
+    """Test cases for X-Priority load shedding."""
+    
+    def test_low_priority_is_shed_when_queue_is_long(self, stub_chain, monkeypatch):
+        """Test low priority requests get a fast 503 with Retry-After."""
+        monkeypatch.setattr("app.config.settings.shed_low_priority_wait_ms", 500)
+        queue_request(2.5)
+        shed_before = get_admission_controller().shed
+        
+        response = client.post(
+            "/analyze-sentiment",
+            json={"text": "Low priority text"},
+            headers={"X-Priority": "low"}
+        )
+        
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+        assert stub_chain.calls == 0
+        assert get_admission_controller().shed == shed_before + 1
+    
+    def test_normal_priority_is_admitted(self, stub_chain, monkeypatch):
+        """Test requests without a low priority still queue for the upstream."""
+        monkeypatch.setattr("app.config.settings.shed_low_priority_wait_ms", 500)
+        queue_request(2.5)
+        
+        for headers in ({}, {"X-Priority": "high"}, {"X-Priority": "unknown"}):
+            response = client.post(
+                "/analyze-sentiment", json={"text": "Normal priority text"}, headers=headers
+            )
+            assert response.status_code == 200
+    
+    def test_low_priority_is_admitted_when_queue_is_short(self, stub_chain):
+        """Test nothing is shed while the queue is short."""
+        response = client.post(
+            "/analyze-sentiment",
+            json={"text": "Low priority, quiet worker"},
+            headers={"X-Priority": "low"}
+        )
+        assert response.status_code == 200
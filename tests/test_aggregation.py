@@ -0,0 +1,170 @@
+"""
+Tests for windowed sentiment aggregates.
+"""
+import os
+
+import orjson
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.aggregation import (
+    MAX_SNAPSHOT_AGE,
+    OTHER_TAG,
+    RETIRED_SNAPSHOT,
+    SentimentAggregator,
+)
+from app.services.sentiment_service import get_sentiment_service
+
+
+def body(sentiment: str, confidence: float) -> bytes:
+    """Serialized result body."""
+    return orjson.dumps({"sentiment": sentiment, "confidence": confidence, "explanation": "Test"})
+
+
+def freeze_time(monkeypatch, now: float) -> None:
+    """Pin the clock used for bucketing."""
+    monkeypatch.setattr("app.services.aggregation.time.time", lambda: now)
+
+
+class TestSentimentAggregator:
+    """Test cases for the aggregation engine."""
+    
+    def test_counts_mean_and_quantiles(self, tmp_path, monkeypatch):
+        """Test a bucket reports label counts, mean confidence and quantiles."""
+        freeze_time(monkeypatch, 6000.0)
+        aggregator = SentimentAggregator(8, str(tmp_path), 60.0)
+        for confidence in (0.1, 0.5, 0.9, 0.9):
+            aggregator.record(body("positive", confidence), tag="app")
+        aggregator.record(body("negative", 0.5), tag="app")
+        
+        bucket = aggregator.query("minute")["buckets"][0]
+        
+        assert bucket["start"] == 6000
+        assert bucket["counts"] == {"positive": 4, "negative": 1, "neutral": 0}
+        assert bucket["mean_confidence"] == 0.58
+        assert bucket["quantiles"] == {"p50": 0.505, "p90": 0.905, "p99": 0.905}
+    
+    def test_buckets_roll_over(self, tmp_path, monkeypatch):
+        """Test results land in per-minute buckets and old laps are reset."""
+        aggregator = SentimentAggregator(8, str(tmp_path), 60.0)
+        for now in (6000.0, 6060.0, 6060.0, 6000.0 + 3600):
+            freeze_time(monkeypatch, now)
+            aggregator.record(body("neutral", 0.5), tag="app")
+        
+        minutes = aggregator.query("minute")["buckets"]
+        hours = aggregator.query("hour")["buckets"]
+        
+        # The first minute's slot was reused an hour later
+        assert [(bucket["start"], bucket["total"]) for bucket in minutes] == [(9600, 1), (6060, 2)]
+        assert [(bucket["start"], bucket["total"]) for bucket in hours] == [(7200, 1), (3600, 3)]
+    
+    def test_filter_by_tag(self, tmp_path, monkeypatch):
+        """Test a query can be restricted to one client tag."""
+        freeze_time(monkeypatch, 6000.0)
+        aggregator = SentimentAggregator(8, str(tmp_path), 60.0)
+        aggregator.record(body("positive", 0.9), tag="web")
+        aggregator.record(body("negative", 0.9), tag="bot")
+        
+        result = aggregator.query("minute", tag="bot")
+        
+        assert result["tags"] == ["bot", "web"]
+        assert result["buckets"][0]["counts"]["negative"] == 1
+        assert result["buckets"][0]["total"] == 1
+    
+    def test_tags_beyond_the_limit_are_grouped(self, tmp_path, monkeypatch):
+        """Test memory stays fixed when clients send many tags."""
+        freeze_time(monkeypatch, 6000.0)
+        aggregator = SentimentAggregator(3, str(tmp_path), 60.0)
+        for tag in ("a", "b", "c", "d"):
+            aggregator.record(body("positive", 0.9), tag=tag)
+        
+        assert aggregator.tags == ["a", "b", OTHER_TAG]
+        assert aggregator.query("minute", tag=OTHER_TAG)["buckets"][0]["total"] == 2
+    
+    def test_snapshots_merge_across_workers(self, tmp_path, monkeypatch):
+        """Test another worker's snapshot is added bucket by bucket."""
+        freeze_time(monkeypatch, 6000.0)
+        peer = SentimentAggregator(8, str(tmp_path), 60.0)
+        peer.record(body("positive", 0.9), tag="app")
+        peer.save_snapshot()
+        os.rename(tmp_path / f"aggregates-{os.getpid()}.npz", tmp_path / "aggregates-1.npz")
+        aggregator = SentimentAggregator(8, str(tmp_path), 60.0)
+        aggregator.record(body("negative", 0.7), tag="app")
+        
+        result = aggregator.query("minute")
+        
+        assert result["workers"] == 2
+        assert result["buckets"][0]["counts"] == {"positive": 1, "negative": 1, "neutral": 0}
+        assert aggregator.query("minute", merge=False)["buckets"][0]["total"] == 1
+    
+    def test_stop_hands_off_to_the_retired_snapshot(self, tmp_path, monkeypatch):
+        """Test stopped workers leave one merged file instead of one per pid."""
+        freeze_time(monkeypatch, 6000.0)
+        for sentiment in ("positive", "negative"):
+            worker = SentimentAggregator(8, str(tmp_path), 60.0)
+            worker.record(body(sentiment, 0.9), tag=sentiment)
+            worker.start()
+            worker.stop()
+        
+        assert sorted(os.listdir(tmp_path)) == [".aggregates.lock", RETIRED_SNAPSHOT]
+        result = SentimentAggregator(8, str(tmp_path), 60.0).query("minute")
+        assert result["tags"] == ["negative", "positive"]
+        assert result["buckets"][0]["counts"] == {"positive": 1, "negative": 1, "neutral": 0}
+    
+    def test_stale_snapshot_of_a_reused_pid_is_kept(self, tmp_path, monkeypatch):
+        """Test a snapshot left under this pid is handed off, not overwritten."""
+        freeze_time(monkeypatch, 6000.0)
+        crashed = SentimentAggregator(8, str(tmp_path), 60.0)
+        crashed.record(body("positive", 0.9), tag="app")
+        crashed.save_snapshot()
+        
+        worker = SentimentAggregator(8, str(tmp_path), 60.0)
+        worker.start()
+        worker.save_snapshot()
+        
+        assert worker.query("minute")["buckets"][0]["total"] == 1
+        worker.stop()
+    
+    def test_expired_snapshots_are_deleted(self, tmp_path, monkeypatch):
+        """Test snapshots older than the longest window are skipped and removed."""
+        freeze_time(monkeypatch, 6000.0 + MAX_SNAPSHOT_AGE + 1)
+        peer = SentimentAggregator(8, str(tmp_path), 60.0)
+        peer.save_snapshot()
+        stale = tmp_path / "aggregates-1.npz"
+        os.rename(tmp_path / f"aggregates-{os.getpid()}.npz", stale)
+        os.utime(stale, (6000.0, 6000.0))
+        
+        result = SentimentAggregator(8, str(tmp_path), 60.0).query("minute")
+        
+        assert result["workers"] == 1
+        assert not stale.exists()
+
+
+class TestAggregatesEndpoint:
+    """Test cases for GET /aggregates."""
+    
+    def test_served_results_are_aggregated_by_client_tag(self, stub_chain):
+        """Test results are counted under the X-Client-Tag header."""
+        client = TestClient(app)
+        client.post(
+            "/analyze-sentiment", json={"text": "Tagged text"}, headers={"X-Client-Tag": "web"}
+        )
+        client.post("/analyze-sentiment", json={"text": "Untagged text"})
+        
+        response = client.get("/aggregates", params={"window": "hour", "tag": "web"})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["tags"] == ["untagged", "web"]
+        assert data["buckets"][0]["total"] == 1
+    
+    def test_invalid_window(self, stub_chain):
+        """Test unknown windows are rejected."""
+        response = TestClient(app).get("/aggregates", params={"window": "week"})
+        assert response.status_code == 422
+    
+    def test_disabled(self, stub_chain):
+        """Test the endpoint reports when aggregation is disabled."""
+        get_sentiment_service().aggregates = None
+        response = TestClient(app).get("/aggregates")
+        assert response.status_code == 404
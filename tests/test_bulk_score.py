@@ -0,0 +1,72 @@
+"""
+Tests for the offline bulk scoring command.
+"""
+import json
+
+import orjson
+
+from app.cli import bulk_score
+
+
+def _read_output(path):
+    """Load output records keyed by row index."""
+    with open(path) as handle:
+        return [json.loads(line) for line in handle]
+
+
+class TestBulkScore:
+    """Test cases for bulk scoring of JSONL and CSV input."""
+    
+    def test_jsonl_input(self, stub_chain, tmp_path):
+        """Test every JSONL row is scored and written with its id."""
+        source = tmp_path / "input.jsonl"
+        source.write_text(
+            '{"id": 1, "text": "Great"}\n'
+            '\n'
+            '{"id": 2, "text": "Lovely"}\n'
+            '{"id": 3, "text": "   "}\n'
+        )
+        output = tmp_path / "output.jsonl"
+        bulk_score.main([str(source), str(output), "--id-field", "id", "--concurrency", "2"])
+        
+        records = sorted(_read_output(output), key=lambda r: r["index"])
+        assert [r["index"] for r in records] == [0, 2, 3]
+        assert records[0]["id"] == 1 and records[0]["sentiment"] == "positive"
+        assert records[2]["error"] == "Text cannot be empty or only whitespace"
+        assert not (tmp_path / "output.jsonl.checkpoint").exists()
+    
+    def test_csv_input(self, stub_chain, tmp_path):
+        """Test CSV rows are read from the configured column."""
+        source = tmp_path / "input.csv"
+        source.write_text('review_id,body\nr1,"Nice, really"\nr2,"Multi\nline"\n')
+        output = tmp_path / "output.jsonl"
+        bulk_score.main([
+            str(source), str(output),
+            "--text-field", "body", "--id-field", "review_id", "--include-text"
+        ])
+        
+        records = sorted(_read_output(output), key=lambda r: r["index"])
+        assert [r["id"] for r in records] == ["r1", "r2"]
+        assert records[1]["text"] == "Multi\nline"
+    
+    def test_resume_skips_completed_rows(self, stub_chain, tmp_path):
+        """Test a checkpoint resumes without re-scoring completed rows."""
+        source = tmp_path / "input.jsonl"
+        source.write_text("".join(f'{{"text": "row {i}"}}\n' for i in range(5)))
+        output = tmp_path / "output.jsonl"
+        
+        # Simulate a crash after rows 0, 1 and 3 were checkpointed,
+        # with a partial line written after the checkpoint
+        committed = b"".join(
+            orjson.dumps({"index": i, "sentiment": "neutral"}) + b"\n" for i in (0, 1, 3)
+        )
+        output.write_bytes(committed + b'{"index": 4, "sent')
+        (tmp_path / "output.jsonl.checkpoint").write_bytes(orjson.dumps({
+            "watermark": 2, "done": [3], "output_bytes": len(committed), "scored": 3
+        }))
+        
+        bulk_score.main([str(source), str(output)])
+        
+        records = _read_output(output)
+        assert sorted(r["index"] for r in records) == [0, 1, 2, 3, 4]
+        assert stub_chain.calls == 2
@@ -0,0 +1,190 @@
+"""
+Tests for cache priming.
+"""
+import asyncio
+import time
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cli import prime_cache
+from app.main import app
+from app.services.cache_priming import (
+    CachePrimer,
+    PrimingAlreadyRunningError,
+    PrimingPlan,
+    read_corpus,
+)
+from app.services.sentiment_service import get_sentiment_service
+
+ADMIN = {"X-Admin-Token": "secret-token"}
+CORPUS = (
+    ["Order shipped"] * 5 + ["  ORDER SHIPPED "] * 3 + ["Refund issued"] * 2
+    + ["One-off note", None, "   "]
+)
+
+
+@pytest.fixture
+def primer(monkeypatch):
+    """Give each test a fresh primer and an admin token."""
+    monkeypatch.setattr("app.config.settings.admin_token", "secret-token")
+    primer = CachePrimer()
+    monkeypatch.setattr("app.services.cache_priming._primer", primer)
+    yield primer
+
+
+class TestPrimingPlan:
+    """Test cases for ranking a corpus."""
+    
+    def test_ranks_by_normalized_frequency(self):
+        """Test texts are counted under the cache key and ranked most frequent first."""
+        plan = PrimingPlan(CORPUS, 2, lambda text: text.lower().strip())
+        
+        assert plan.texts == ["Order shipped", "Refund issued"]
+        assert plan.requests == 11
+        assert plan.distinct == 3
+        assert plan.unusable == 2
+    
+    def test_report(self):
+        """Test coverage and hit rates with and without priming."""
+        report = PrimingPlan(CORPUS, 2, lambda text: text.lower().strip()).get_report()
+        
+        assert report["texts_to_prime"] == 2
+        assert report["coverage"] == round(10 / 11, 4)
+        assert report["unprimed_hit_rate"] == round(8 / 11, 4)
+        assert report["expected_hit_rate"] == round(10 / 11, 4)
+    
+    def test_read_corpus(self, tmp_path):
+        """Test JSONL records yield their text field and other files yield lines."""
+        jsonl = tmp_path / "capture.jsonl"
+        jsonl.write_bytes(
+            b'{"text": "A"}\n{"hash": "ab", "length": 3}\n\nnot json\n{"body": "B"}\n'
+        )
+        text = tmp_path / "texts.txt"
+        text.write_text("A\nB\n\n")
+        
+        assert list(read_corpus(str(jsonl))) == ["A", None, None, None]
+        assert list(read_corpus(str(jsonl), "body")) == [None, None, None, "B"]
+        assert list(read_corpus(str(text))) == ["A\n", "B\n"]
+
+
+class TestCachePrimer:
+    """Test cases for priming the service's cache."""
+    
+    def test_primes_uncached_texts(self, stub_chain):
+        """Test primed texts are then served from cache without another upstream call."""
+        service = get_sentiment_service()
+        plan = PrimingPlan(CORPUS, 2, service._get_cache_key)
+        
+        progress = asyncio.run(CachePrimer().prime(plan, 1, 0.0))
+        assert progress["status"] == "completed"
+        assert progress["primed"] == 2
+        assert stub_chain.calls == 2
+        
+        progress = asyncio.run(CachePrimer().prime(plan, 1, 0.0))
+        assert progress["already_cached"] == 2
+        response = TestClient(app).post("/analyze-sentiment", json={"text": "order shipped"})
+        assert response.headers["x-cache"] == "HIT"
+        assert stub_chain.calls == 2
+    
+    def test_one_run_at_a_time_across_workers(self, stub_chain, tmp_path):
+        """Test a second worker cannot start and reports the first worker's run."""
+        path = str(tmp_path / "priming.json")
+        service = get_sentiment_service()
+        plan = PrimingPlan(CORPUS, 2, service._get_cache_key)
+        first, second = CachePrimer(path), CachePrimer(path)
+        first._lock()
+        first._reset(plan)
+        first._write_progress()
+        
+        with pytest.raises(PrimingAlreadyRunningError):
+            asyncio.run(second.prime(plan, 1, 0.0))
+        assert second.get_progress()["status"] == "running"
+        
+        first._unlock()
+        assert second.get_progress()["status"] == "interrupted"
+        assert asyncio.run(second.prime(plan, 1, 0.0))["primed"] == 2
+        assert first.get_progress()["status"] == "completed"
+
+
+class TestPrimingEndpoints:
+    """Test cases for the admin priming endpoints."""
+    
+    def test_requires_admin_token(self, stub_chain, primer):
+        """Test priming is refused without the admin token."""
+        response = TestClient(app).post("/cache/prime", json={"texts": ["Order shipped"]})
+        assert response.status_code == 403
+    
+    def test_start_and_progress(self, stub_chain, primer):
+        """Test a run starts in the background and reports progress until it completes."""
+        with TestClient(app) as client:
+            response = client.post(
+                "/cache/prime",
+                json={
+                    "texts": [text for text in CORPUS if text],
+                    "top_n": 2,
+                    "batch_interval_ms": 0
+                },
+                headers=ADMIN
+            )
+            assert response.status_code == 202
+            assert response.json()["texts_to_prime"] == 2
+            
+            deadline = time.monotonic() + 5
+            while client.get("/cache/prime", headers=ADMIN).json()["status"] != "completed":
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            assert client.get("/cache/prime", headers=ADMIN).json()["primed"] == 2
+    
+    def test_hash_only_capture_is_rejected(self, stub_chain, primer, tmp_path, monkeypatch):
+        """Test a capture without raw texts gives a 400 instead of an empty run."""
+        capture = tmp_path / "capture.jsonl"
+        capture.write_bytes(b'{"t": 0.0, "hash": "ab12", "length": 12}\n' * 3)
+        monkeypatch.setattr("app.config.settings.capture_path", str(capture))
+        response = TestClient(app).post("/cache/prime", json={}, headers=ADMIN)
+        assert response.status_code == 400
+        assert primer.progress["status"] == "idle"
+    
+    def test_conflict_when_cache_disabled(self, stub_chain, primer, monkeypatch):
+        """Test priming is refused when caching is disabled."""
+        monkeypatch.setattr("app.config.settings.enable_cache", False)
+        response = TestClient(app).post(
+            "/cache/prime", json={"texts": ["Order shipped"]}, headers=ADMIN
+        )
+        assert response.status_code == 409
+
+
+class TestPrimeCacheCommand:
+    """Test cases for the command line tool."""
+    
+    @pytest.fixture(autouse=True)
+    def keep_logging(self, monkeypatch):
+        """Keep the command from replacing the test's log handlers."""
+        monkeypatch.setattr(prime_cache, "setup_logging", lambda: None)
+    
+    def test_primes_and_writes_snapshot(self, stub_chain, tmp_path, capsys):
+        """Test the command prints the plan, primes and saves a loadable snapshot."""
+        corpus = tmp_path / "texts.txt"
+        corpus.write_text("Order shipped\norder shipped\nRefund issued\n")
+        
+        prime_cache.main([str(corpus), "--top-n", "1", "--interval-ms", "0"])
+        
+        plan, summary = [orjson.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert plan["texts_to_prime"] == 1
+        assert summary["primed"] == 1
+        assert summary["snapshot_entries"] == 1
+        
+        service = get_sentiment_service()
+        service.clear_cache()
+        assert service.load_cache(str(tmp_path / "cache_snapshot.jsonl")) == 1
+    
+    def test_dry_run(self, stub_chain, tmp_path, capsys):
+        """Test a dry run only prints the plan."""
+        corpus = tmp_path / "texts.txt"
+        corpus.write_text("Order shipped\n")
+        
+        prime_cache.main([str(corpus), "--dry-run"])
+        
+        assert orjson.loads(capsys.readouterr().out)["distinct_texts"] == 1
+        assert stub_chain.calls == 0
@@ -0,0 +1,108 @@
+"""
+Tests for long-document analysis.
+"""
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import SentimentLabel
+from app.services.chunking import split_into_chunks
+from app.services.sentiment_service import SentimentOutput
+
+client = TestClient(app)
+
+PARAGRAPH = " ".join(f"Sentence {i} is about the product." for i in range(20))
+SENTENCES = [
+    f"Review {i} says the product was {('great', 'late', 'fine', 'broken')[i % 4]}."
+    for i in range(300)
+]
+
+
+class TestChunking:
+    """Test cases for splitting documents into chunks."""
+    
+    def test_chunks_respect_limits_and_offsets(self):
+        """Test chunks stay under the limit and point back into the text."""
+        text = "\n\n".join([PARAGRAPH * 5, "Short heading", PARAGRAPH])
+        chunks = split_into_chunks(text, max_chars=1000, min_chars=200)
+        assert all(len(chunk.text) <= 1000 for chunk in chunks)
+        assert all(text[chunk.start:chunk.end] == chunk.text for chunk in chunks)
+        assert [c.start for c in chunks] == sorted(c.start for c in chunks)
+    
+    def test_short_paragraphs_are_merged(self):
+        """Test paragraphs below the minimum are merged forward."""
+        chunks = split_into_chunks("Title\n\nSubtitle\n\n" + PARAGRAPH, 2000, 300)
+        assert len(chunks) == 1
+    
+    def test_edit_only_changes_nearby_chunks(self):
+        """Test an edit in one paragraph leaves the chunks away from it unchanged."""
+        paragraphs = [f"Paragraph {i}. " + PARAGRAPH for i in range(6)]
+        before = split_into_chunks("\n\n".join(paragraphs), 1000, 200)
+        paragraphs[2] = paragraphs[2].replace("product", "service")
+        text = "\n\n".join(paragraphs)
+        after = split_into_chunks(text, 1000, 200)
+        edited_start = text.index(paragraphs[2])
+        edited_end = edited_start + len(paragraphs[2])
+        changed = [c for c in after if c.text not in {b.text for b in before}]
+        assert changed
+        assert all(c.start < edited_end and c.end > edited_start for c in changed)
+    
+    def test_deleting_a_short_paragraph_does_not_shift_later_chunks(self):
+        """Test merged short paragraphs keep their boundaries when an earlier one is removed."""
+        paragraphs = [" ".join(SENTENCES[i * 4:i * 4 + 4]) for i in range(12)]
+        before = split_into_chunks("\n\n".join(paragraphs), 2000, 300)
+        after = split_into_chunks("\n\n".join(paragraphs[1:]), 2000, 300)
+        assert len(before) > 2
+        assert len({c.text for c in after} - {c.text for c in before}) == 1
+    
+    def test_prepending_to_a_long_paragraph_does_not_shift_later_chunks(self):
+        """Test a sentence inserted before a long paragraph only changes the first chunk."""
+        paragraph = " ".join(SENTENCES)
+        before = split_into_chunks(paragraph, 2000, 300)
+        after = split_into_chunks("An opening sentence was added. " + paragraph, 2000, 300)
+        assert len(before) > 5
+        assert len({c.text for c in after} - {c.text for c in before}) == 1
+    
+    def test_unbroken_text_is_hard_split(self):
+        """Test text without sentence boundaries is still split."""
+        chunks = split_into_chunks("word " * 1000, 1000, 200)
+        assert all(len(chunk.text) <= 1000 for chunk in chunks)
+        assert len(chunks) == 5
+
+
+class TestDocumentAPI:
+    """Test cases for the /analyze-document endpoint."""
+    
+    def test_weighted_verdict(self, stub_chain):
+        """Test the verdict weights chunks by length and confidence."""
+        async def ainvoke(inputs):
+            stub_chain.calls += 1
+            negative = "refund" in inputs["text"]
+            return stub_chain.message(SentimentOutput(
+                sentiment=SentimentLabel.NEGATIVE if negative else SentimentLabel.POSITIVE,
+                confidence=0.9,
+                explanation="Stubbed analysis"
+            ))
+        stub_chain.ainvoke = ainvoke
+        
+        text = "\n\n".join(["I want a refund. " * 100, "Nice box. " * 30])
+        response = client.post("/analyze-document", json={"text": text, "include_chunks": True})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["sentiment"] == "negative"
+        assert data["chunk_count"] == len(data["chunks"]) == 2
+        assert data["chunks"][1]["sentiment"] == "positive"
+    
+    def test_unchanged_chunks_hit_cache(self, stub_chain):
+        """Test re-submitting an edited document only re-scores changed chunks."""
+        paragraphs = [f"Paragraph {i}. " + PARAGRAPH for i in range(4)]
+        client.post("/analyze-document", json={"text": "\n\n".join(paragraphs)})
+        first_calls = stub_chain.calls
+        
+        paragraphs[1] = paragraphs[1].replace("Sentence 7 is", "Sentence 7 really is")
+        data = client.post("/analyze-document", json={"text": "\n\n".join(paragraphs)}).json()
+        assert "chunks" not in data
+        assert stub_chain.calls == first_calls + 1
+    
+    def test_blank_document_rejected(self):
+        """Test whitespace-only documents are rejected."""
+        assert client.post("/analyze-document", json={"text": " \n\n "}).status_code == 422
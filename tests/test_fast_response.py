@@ -0,0 +1,42 @@
+"""
+Tests for the pre-serialized response path.
+"""
+import json
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services.sentiment_service import get_sentiment_service
+
+client = TestClient(app)
+
+
+class TestFastResponse:
+    """Test cases for cached response bodies."""
+    
+    def test_response_body_matches_schema(self, stub_chain):
+        """Test the serialized body has the documented fields."""
+        response = client.post("/analyze-sentiment", json={"text": "Great stuff"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        data = response.json()
+        assert data == {
+            "sentiment": "positive",
+            "confidence": 0.9,
+            "explanation": "Stubbed analysis"
+        }
+    
+    def test_cache_hit_returns_stored_bytes(self, stub_chain):
+        """Test repeated requests reuse the cached body."""
+        first = client.post("/analyze-sentiment", json={"text": "Great stuff"})
+        second = client.post("/analyze-sentiment", json={"text": "  GREAT stuff "})
+        assert first.content == second.content
+        assert stub_chain.calls == 1
+    
+    def test_cached_body_is_valid_json(self, stub_chain):
+        """Test the cache stores valid JSON next to the result."""
+        client.post("/analyze-sentiment", json={"text": "Great stuff"})
+        service = get_sentiment_service()
+        entry = service._cache[service._namespaced_key(settings.model_name, "Great stuff")]
+        assert json.loads(entry.body)["sentiment"] == entry.result.sentiment.value
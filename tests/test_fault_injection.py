@@ -0,0 +1,140 @@
+"""
+Tests for fault and latency injection.
+"""
+import asyncio
+import glob
+import os
+
+import openai
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+
+from app.main import app
+from app.services.fault_injection import FaultInjector, FaultScenario, load_scenario, malformed
+from app.services.retry_policy import is_retryable, retry_after
+from app.services.sentiment_service import SentimentAnalysisService, get_sentiment_service
+
+SCENARIO_DIR = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "scenarios")
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def scenario(repeat: bool = True, **phase) -> FaultScenario:
+    """Single-phase scenario of ten seconds followed by a healthy one."""
+    return FaultScenario(
+        name="test",
+        repeat=repeat,
+        seed=1,
+        phases=[{"name": "faulty", "duration": 10, **phase}, {"name": "healthy", "duration": 10}]
+    )
+
+
+async def healthy_call() -> AIMessage:
+    """Upstream call returning a valid result."""
+    return AIMessage(content='{"sentiment": "positive", "confidence": 0.9, "explanation": "Fine"}')
+
+
+class TestFaultInjector:
+    """Test cases for the injector."""
+    
+    def test_phases_follow_the_schedule(self):
+        """Test phases advance with time and repeat."""
+        clock = FakeClock()
+        injector = FaultInjector(scenario(), clock)
+        names = []
+        for now in (0.0, 9.9, 10.0, 19.9, 20.0):
+            clock.now = now
+            names.append(injector.phase().name)
+        assert names == ["faulty", "faulty", "healthy", "healthy", "faulty"]
+    
+    def test_non_repeating_scenario_ends(self):
+        """Test nothing is injected once a non-repeating scenario has run."""
+        clock = FakeClock()
+        injector = FaultInjector(scenario(repeat=False, error_rate=1.0), clock)
+        injector.phase()
+        clock.now = 25.0
+        assert injector.phase() is None
+        assert asyncio.run(injector.call(healthy_call)).content.startswith("{")
+    
+    def test_injected_errors_look_like_the_provider(self):
+        """Test injected errors are retryable client errors carrying Retry-After."""
+        injector = FaultInjector(scenario(error_rate=1.0, error_statuses=[429], retry_after=2))
+        with pytest.raises(openai.RateLimitError) as raised:
+            asyncio.run(injector.call(healthy_call))
+        assert is_retryable(raised.value)
+        assert retry_after(raised.value) == 2.0
+        assert injector.injected["error"] == 1
+    
+    def test_timeouts(self):
+        """Test injected timeouts raise the client's timeout error after the delay."""
+        injector = FaultInjector(scenario(timeout_rate=1.0, timeout_ms=10))
+        with pytest.raises(openai.APITimeoutError):
+            asyncio.run(injector.call(healthy_call))
+    
+    def test_malformed_output_breaks_the_parser(self):
+        """Test every kind of corrupted output is rejected by the service's parser."""
+        parser = SentimentAnalysisService().parser
+        message = asyncio.run(healthy_call())
+        for kind in ("truncated", "prose", "wrong_schema"):
+            with pytest.raises(Exception):
+                parser.parse(malformed(message, kind).content)
+    
+    def test_rates_are_applied(self):
+        """Test roughly the configured fraction of calls fail."""
+        injector = FaultInjector(scenario(error_rate=0.3, malformed_rate=0.2))
+        
+        async def run():
+            failures = 0
+            for _ in range(1000):
+                try:
+                    await injector.call(healthy_call)
+                except openai.APIStatusError:
+                    failures += 1
+            return failures
+        
+        failures = asyncio.run(run())
+        assert 250 < failures < 350
+        assert 150 < injector.injected["malformed"] < 250
+    
+    def test_bundled_scenarios_are_valid(self):
+        """Test the benchmark scenario files load."""
+        paths = glob.glob(os.path.join(SCENARIO_DIR, "*.json"))
+        assert paths
+        for path in paths:
+            assert load_scenario(path).phases
+
+
+class TestServiceFaults:
+    """Test cases for the service with faults injected."""
+    
+    def test_errors_fall_back(self, stub_chain, monkeypatch):
+        """Test an injected 503 storm ends in a fallback response."""
+        service = get_sentiment_service()
+        monkeypatch.setattr(service.retry_policy, "max_retries", 0)
+        service.faults = FaultInjector(scenario(error_rate=1.0))
+        
+        response = TestClient(app).post("/analyze-sentiment", json={"text": "Faulty upstream"})
+        
+        assert response.status_code == 200
+        assert response.headers["x-cache"] == "FALLBACK"
+        assert stub_chain.calls == 0
+        assert service.get_metrics()["fault_injection"]["injected"]["error"] == 1
+    
+    def test_scenario_from_settings(self, stub_chain, monkeypatch, tmp_path):
+        """Test the service loads the configured scenario, except in production."""
+        path = tmp_path / "scenario.json"
+        path.write_text(scenario(malformed_rate=1.0).model_dump_json())
+        monkeypatch.setattr("app.config.settings.fault_scenario_path", str(path))
+        
+        assert SentimentAnalysisService().faults.scenario.name == "test"
+        monkeypatch.setattr("app.config.settings.environment", "production")
+        assert SentimentAnalysisService().faults is None
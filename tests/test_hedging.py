@@ -0,0 +1,127 @@
+"""
+Tests for hedged upstream calls.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.hedging import Hedger
+from app.services.retry_policy import RetryBudget
+from app.services.sentiment_service import get_sentiment_service
+
+client = TestClient(app)
+
+
+def make_hedger(ratio: float = 1.0) -> Hedger:
+    """Hedger at the 90th percentile after 10 samples."""
+    return Hedger(90.0, 10, RetryBudget(ratio, 10, 0))
+
+
+class Calls:
+    """Async callable whose nth call sleeps for delays[n] then returns n or raises."""
+    
+    def __init__(self, *delays, fail=()):
+        self.delays = delays
+        self.fail = fail
+        self.started = 0
+        self.cancelled = 0
+    
+    async def __call__(self):
+        index = self.started
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delays[index])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if index in self.fail:
+            raise RuntimeError(f"call {index} failed")
+        return index
+
+
+class TestHedger:
+    """Test cases for Hedger.call and Hedger.delay."""
+    
+    def test_no_delay_makes_single_call(self):
+        """Test calls are not hedged until a delay is known."""
+        func = Calls(0.0)
+        assert asyncio.run(make_hedger().call(func, None)) == 0
+        assert func.started == 1
+    
+    def test_fast_call_is_not_hedged(self):
+        """Test a call finishing within the delay gets no backup."""
+        hedger = make_hedger()
+        func = Calls(0.0)
+        assert asyncio.run(hedger.call(func, 0.5)) == 0
+        assert func.started == 1
+        assert hedger.hedges == 0
+    
+    def test_slow_call_is_hedged_and_cancelled(self):
+        """Test the backup wins over a stalled call, which is cancelled."""
+        hedger = make_hedger()
+        func = Calls(5.0, 0.0)
+        
+        started = time.perf_counter()
+        assert asyncio.run(hedger.call(func, 0.05)) == 1
+        assert time.perf_counter() - started < 1.0
+        assert func.cancelled == 1
+        assert hedger.get_stats()["hedges"] == 1
+        assert hedger.get_stats()["hedge_wins"] == 1
+    
+    def test_failed_call_waits_for_the_other(self):
+        """Test a failing hedge does not fail the request while the first can finish."""
+        hedger = make_hedger()
+        func = Calls(0.2, 0.0, fail=(1,))
+        assert asyncio.run(hedger.call(func, 0.05)) == 0
+    
+    def test_all_calls_failing_raises(self):
+        """Test the error is raised when both calls fail."""
+        func = Calls(0.1, 0.0, fail=(0, 1))
+        with pytest.raises(RuntimeError):
+            asyncio.run(make_hedger().call(func, 0.05))
+    
+    def test_budget_caps_hedges(self):
+        """Test no backup is sent once the hedge budget is spent."""
+        hedger = make_hedger(ratio=0.0)
+        func = Calls(0.1)
+        assert asyncio.run(hedger.call(func, 0.01)) == 0
+        assert func.started == 1
+        assert hedger.get_stats()["budget"]["exhausted"] == 1
+    
+    def test_delay_needs_enough_samples(self):
+        """Test the delay is the configured percentile once samples suffice."""
+        hedger = make_hedger()
+        assert hedger.delay("few", [0.1] * 5) is None
+        delay = hedger.delay("many", [index / 100 for index in range(1, 101)])
+        assert delay == pytest.approx(0.901)
+
+
+class TestServiceHedging:
+    """Test cases for hedging in the sentiment service."""
+    
+    def test_stalled_llm_call_is_hedged(self, stub_chain, monkeypatch):
+        """Test a stalled chain call is overtaken by the hedge."""
+        monkeypatch.setattr("app.config.settings.hedging_enabled", True)
+        service = get_sentiment_service()
+        model = service.router.models[0]
+        service.router.stats[model].attempt_latencies.extend([0.01] * 20)
+        
+        original = stub_chain.ainvoke
+        
+        async def stalling_ainvoke(inputs):
+            if stub_chain.calls == 0:
+                stub_chain.calls += 1
+                await asyncio.sleep(5.0)
+            return await original(inputs)
+        
+        stub_chain.ainvoke = stalling_ainvoke
+        started = time.perf_counter()
+        response = client.post("/analyze-sentiment", json={"text": "Hedge this call"})
+        
+        assert response.status_code == 200
+        assert response.headers["x-cache"] == "MISS"
+        assert time.perf_counter() - started < 2.0
+        assert client.get("/metrics").json()["hedging"]["hedge_wins"] == 1
@@ -0,0 +1,129 @@
+"""
+Tests for the asynchronous job API.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services.job_service import JobManager
+
+
+@pytest.fixture
+def client(stub_chain, tmp_path, monkeypatch):
+    """Client with the job manager storing jobs in a temporary directory."""
+    monkeypatch.setattr("app.services.job_service._manager", JobManager(str(tmp_path)))
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _wait_for(client, job_id, expected="completed", timeout=5.0):
+    """Poll a job until it reaches the expected status."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = client.get(f"/jobs/{job_id}").json()
+        if data["status"] == expected:
+            return data
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not reach {expected}: {data}")
+
+
+class TestJobAPI:
+    """Test cases for job submission, progress and results."""
+    
+    def test_submit_returns_202(self, client):
+        """Test submitting a job returns 202 with a job id."""
+        response = client.post("/jobs", json={"texts": ["Great", "Lovely"]})
+        assert response.status_code == 202
+        data = response.json()
+        assert len(data["job_id"]) == 32
+        assert data["total"] == 2
+    
+    def test_results_are_paged_in_order(self, client):
+        """Test results are returned in input order with offset and limit."""
+        texts = [f"Text number {i}" for i in range(25)]
+        job_id = client.post("/jobs", json={"texts": texts}).json()["job_id"]
+        data = _wait_for(client, job_id)
+        assert data["completed"] == 25
+        
+        page = client.get(f"/jobs/{job_id}/results", params={"offset": 10, "limit": 5}).json()
+        assert [item["index"] for item in page["results"]] == [10, 11, 12, 13, 14]
+        assert page["results"][0]["sentiment"] == "positive"
+    
+    def test_unknown_job(self, client):
+        """Test unknown job ids return 404."""
+        assert client.get(f"/jobs/{'0' * 32}").status_code == 404
+    
+    def test_invalid_texts(self, client):
+        """Test empty lists and blank texts are rejected."""
+        assert client.post("/jobs", json={"texts": []}).status_code == 422
+        assert client.post("/jobs", json={"texts": ["ok", "  "]}).status_code == 422
+    
+    def test_unfinished_job_resumes_after_restart(self, stub_chain, tmp_path, monkeypatch):
+        """Test a job interrupted mid-run is resumed from its persisted results."""
+        manager = JobManager(str(tmp_path))
+        monkeypatch.setattr("app.services.job_service._manager", manager)
+        monkeypatch.setattr(settings, "job_workers", 1)
+        
+        # Persist a job as a crashed worker would have left it
+        job_dir = tmp_path / ("a" * 32)
+        job_dir.mkdir()
+        (job_dir / "inputs.jsonl").write_text('"one"\n"two"\n"three"\n')
+        (job_dir / "results.jsonl").write_text(
+            '{"index": 0, "sentiment": "neutral", "confidence": 0.5, "explanation": "x"}\n{"ind'
+        )
+        (job_dir / "meta.json").write_text(
+            '{"job_id": "%s", "status": "running", "total": 3, "completed": 0, '
+            '"created_at": 0, "updated_at": 0, "error": null}' % ("a" * 32)
+        )
+        
+        with TestClient(app) as client:
+            data = _wait_for(client, "a" * 32)
+            results = client.get(f"/jobs/{'a' * 32}/results").json()["results"]
+        
+        assert data["completed"] == 3
+        assert [item["index"] for item in results] == [0, 1, 2]
+        assert results[0]["sentiment"] == "neutral"
+        assert stub_chain.calls == 2
+    
+    def test_workers_share_jobs_without_running_them_twice(self, stub_chain, tmp_path, monkeypatch):
+        """Test another worker reports a job's progress but does not resume it while claimed."""
+        monkeypatch.setattr(settings, "job_workers", 1)
+        owner, other = JobManager(str(tmp_path)), JobManager(str(tmp_path))
+        
+        async def run():
+            await owner.start()
+            job_id = (await owner.create_job(["one", "two", "three"]))["job_id"]
+            await other.start()
+            seen = await other.get_job(job_id)
+            while (await other.get_job(job_id))["status"] != "completed":
+                await asyncio.sleep(0.01)
+            results = await other.get_results(job_id, 0, 10)
+            await owner.stop()
+            await other.stop()
+            return seen, results
+        
+        seen, results = asyncio.run(run())
+        
+        assert seen["total"] == 3
+        assert [item["index"] for item in results] == [0, 1, 2]
+        assert stub_chain.calls == 3
+    
+    def test_released_job_is_claimed_by_another_worker(self, tmp_path):
+        """Test an unfinished job is resumed only once its owner releases it."""
+        job_dir = tmp_path / ("b" * 32)
+        job_dir.mkdir()
+        (job_dir / "inputs.jsonl").write_text('"one"\n')
+        (job_dir / "meta.json").write_text(
+            '{"job_id": "%s", "status": "queued", "total": 1, "completed": 0, '
+            '"created_at": 0, "updated_at": 0, "error": null}' % ("b" * 32)
+        )
+        owner, other = JobManager(str(tmp_path)), JobManager(str(tmp_path))
+        
+        assert owner._recover() == ["b" * 32]
+        assert other._recover() == []
+        owner._release("b" * 32)
+        assert other._recover() == ["b" * 32]
@@ -0,0 +1,140 @@
+"""
+Tests for the distilled local model and its serving tier.
+"""
+import json
+import random
+
+import pytest
+
+from app.cli import train_local_model
+from app.models import SentimentLabel
+from app.services.label_log import LabelLog, read_labels
+from app.services.local_model import LocalSentimentModel
+from app.services.sentiment_service import get_sentiment_service
+
+_WORDS = {
+    "positive": ["love", "great", "excellent", "wonderful", "fantastic"],
+    "negative": ["hate", "awful", "broken", "terrible", "refund"],
+    "neutral": ["arrived", "tuesday", "box", "package", "delivered"],
+}
+
+
+def _examples(count, seed=0):
+    """Synthetic labelled texts with label-specific vocabulary."""
+    rng = random.Random(seed)
+    examples = []
+    for index in range(count):
+        label = rng.choice(list(_WORDS))
+        words = rng.sample(_WORDS[label], 3) + ["the", "item", str(index)]
+        rng.shuffle(words)
+        examples.append((" ".join(words), label))
+    return examples
+
+
+def _write_labels(path, examples):
+    """Write examples in label log format."""
+    with open(path, "w") as handle:
+        for text, label in examples:
+            handle.write(json.dumps({"text": text, "sentiment": label, "confidence": 0.9}) + "\n")
+
+
+class TestLocalSentimentModel:
+    """Test cases for training and inference."""
+    
+    def test_learns_separable_labels(self):
+        """Test the classifier fits clearly separable labels."""
+        texts, labels = zip(*_examples(600))
+        model = LocalSentimentModel.train(texts, labels, dims=2 ** 12, epochs=10)
+        assert model.predict("I love it, great and wonderful")[0] == SentimentLabel.POSITIVE
+        assert model.predict("awful, broken, I want a refund")[0] == SentimentLabel.NEGATIVE
+    
+    def test_save_and_load_round_trip(self, tmp_path):
+        """Test a saved model predicts the same after loading."""
+        texts, labels = zip(*_examples(200))
+        model = LocalSentimentModel.train(texts, labels, dims=2 ** 10)
+        model.calibrate(texts[:50], labels[:50])
+        path = str(tmp_path / "model.npz")
+        model.save(path)
+        loaded = LocalSentimentModel.load(path)
+        assert loaded.temperature == model.temperature
+        expected = model.predict("great item")[1]
+        assert loaded.predict("great item")[1] == pytest.approx(expected, abs=1e-4)
+
+
+class TestTrainCommand:
+    """Test cases for the training command."""
+    
+    def test_trains_from_label_log(self, tmp_path, capsys):
+        """Test the command writes a model and reports held-out metrics."""
+        labels_path = tmp_path / "labels.jsonl"
+        output = tmp_path / "model.npz"
+        _write_labels(labels_path, _examples(400))
+        train_local_model.main([
+            "--labels", str(labels_path), "--output", str(output),
+            "--dims", "4096", "--epochs", "10"
+        ])
+        summary = json.loads(capsys.readouterr().out.splitlines()[-1])
+        assert output.exists()
+        assert summary["examples"] == 400
+        assert summary["accuracy"] > 0.9
+    
+    def test_refuses_too_few_labels(self, tmp_path):
+        """Test training stops when there are not enough labels."""
+        labels_path = tmp_path / "labels.jsonl"
+        _write_labels(labels_path, _examples(10))
+        with pytest.raises(SystemExit):
+            train_local_model.main([
+                "--labels", str(labels_path), "--output", str(tmp_path / "m.npz")
+            ])
+
+
+class TestLabelLog:
+    """Test cases for the label log."""
+    
+    def test_stops_at_size_cap(self, tmp_path):
+        """Test labels are dropped once the file is full and written again once it is moved."""
+        path = tmp_path / "labels.jsonl"
+        log = LabelLog(str(path), 1024)
+        for index in range(50):
+            log.append(f"Text number {index}", "positive", 0.9, "model")
+        
+        assert path.stat().st_size <= 1024
+        assert log.written + log.dropped == 50
+        assert log.dropped > 0
+        
+        path.rename(tmp_path / "labels.trained.jsonl")
+        log.append("After training", "positive", 0.9, "model")
+        assert [record["text"] for record in read_labels(str(path))] == ["After training"]
+
+
+class TestLocalServing:
+    """Test cases for serving from the local model."""
+    
+    @pytest.mark.asyncio
+    async def test_llm_results_are_logged_as_labels(self, stub_chain, tmp_path):
+        """Test upstream results are appended to the label log once it is enabled."""
+        service = get_sentiment_service()
+        assert service._label_log is None
+        service._label_log = LabelLog(str(tmp_path / "labels.jsonl"), 1024 * 1024)
+        await service.analyze_sentiment("Log this text")
+        with open(tmp_path / "labels.jsonl") as handle:
+            record = json.loads(handle.readline())
+        assert record["text"] == "Log this text"
+        assert record["sentiment"] == "positive"
+    
+    @pytest.mark.asyncio
+    async def test_hot_swapped_model_serves_confident_texts(
+        self, stub_chain, tmp_path, monkeypatch
+    ):
+        """Test a model written at runtime serves without an upstream call."""
+        monkeypatch.setattr("app.config.settings.local_model_threshold", 0.6)
+        texts, labels = zip(*_examples(600))
+        model = LocalSentimentModel.train(texts, labels, dims=2 ** 12, epochs=10)
+        model.save(str(tmp_path / "local_model.npz"))
+        
+        service = get_sentiment_service()
+        assert service.reload_local_model()
+        result = await service.analyze_sentiment("awful broken terrible refund")
+        assert result.sentiment == SentimentLabel.NEGATIVE
+        assert stub_chain.calls == 0
+        assert service.local_hits == 1
@@ -0,0 +1,73 @@
+"""
+Tests for the local scoring executor pool.
+"""
+import asyncio
+
+import pytest
+
+from app.models import SentimentLabel
+from app.services.local_scoring import LocalScoringPool, fallback_batch
+
+_batch_sizes = []
+
+
+def _recording_batch(texts):
+    """Batch function that records the size of each batch."""
+    _batch_sizes.append(len(texts))
+    return [text.upper() for text in texts]
+
+
+class TestLocalScoringPool:
+    """Test cases for batched executor offload."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_batches(self):
+        """Test concurrent submissions are grouped into one batch."""
+        _batch_sizes.clear()
+        pool = LocalScoringPool("thread", 2, batch_size=8, batch_wait=0.05)
+        results = await asyncio.gather(
+            *(pool.submit(_recording_batch, (), f"text {i}") for i in range(8))
+        )
+        pool.shutdown()
+        assert results == [f"TEXT {i}" for i in range(8)]
+        assert _batch_sizes == [8]
+        assert pool.get_stats()["mean_batch_size"] == 8
+    
+    @pytest.mark.asyncio
+    async def test_partial_batch_flushes_after_wait(self):
+        """Test a batch that never fills is sent after the wait."""
+        _batch_sizes.clear()
+        pool = LocalScoringPool("thread", 1, batch_size=64, batch_wait=0.001)
+        results = await asyncio.gather(*(pool.submit(_recording_batch, (), "x") for _ in range(3)))
+        pool.shutdown()
+        assert results == ["X"] * 3
+        assert _batch_sizes == [3]
+    
+    @pytest.mark.asyncio
+    async def test_process_pool_scores_fallback(self):
+        """Test the keyword fallback runs in worker processes."""
+        pool = LocalScoringPool("process", 1, batch_size=4, batch_wait=0.01)
+        try:
+            results = await asyncio.gather(
+                pool.submit(fallback_batch, (), "I love it, great"),
+                pool.submit(fallback_batch, (), "awful and terrible")
+            )
+        finally:
+            pool.shutdown()
+        assert results[0][0] == SentimentLabel.POSITIVE
+        assert results[1][0] == SentimentLabel.NEGATIVE
+        stats = pool.get_stats()
+        assert stats["queue_depth"] == 0
+        assert stats["items"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_batch_errors_reach_every_caller(self):
+        """Test an exception in a batch fails each waiting call."""
+        pool = LocalScoringPool("thread", 1, batch_size=2, batch_wait=0.01)
+        results = await asyncio.gather(
+            pool.submit(fallback_batch, (), None),
+            pool.submit(fallback_batch, (), None),
+            return_exceptions=True
+        )
+        pool.shutdown()
+        assert all(isinstance(result, AttributeError) for result in results)
@@ -0,0 +1,66 @@
+"""
+Tests for event loop lag and slow callback monitoring.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.loop_monitor import LoopLagMonitor
+
+
+def _blocking_call():
+    """Block the event loop thread."""
+    time.sleep(0.2)
+
+
+class TestLoopLagMonitor:
+    """Test cases for lag measurement and slow callback capture."""
+    
+    @pytest.mark.asyncio
+    async def test_blocking_call_shows_as_lag(self):
+        """Test a blocking call on the loop is reported as lag."""
+        monitor = LoopLagMonitor(interval=0.01, slow_threshold=0.05)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        _blocking_call()
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+        stats = monitor.get_stats()
+        assert stats["loop_lag_max_ms"] >= 100
+        assert stats["slow_callbacks"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_slow_callback_stack_is_captured(self):
+        """Test the watchdog captures the stack of the blocking call."""
+        monitor = LoopLagMonitor(interval=0.01, slow_threshold=0.05)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        _blocking_call()
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+        event = monitor.get_events()[0]
+        assert event["lag_ms"] >= 100
+        assert any("_blocking_call" in line for line in event["stack"])
+    
+    def test_fast_loop_records_no_events(self):
+        """Test lag under the threshold is not recorded as slow."""
+        monitor = LoopLagMonitor(interval=0.01, slow_threshold=0.05)
+        monitor.record(0.001)
+        assert monitor.get_events() == []
+
+
+class TestEventLoopEndpoint:
+    """Test cases for the /debug/event-loop endpoint."""
+    
+    def test_reports_stats_and_events(self, monkeypatch):
+        """Test the endpoint returns lag statistics and slow callbacks."""
+        monkeypatch.setattr("app.config.settings.admin_token", "secret-token")
+        with TestClient(app) as client:
+            response = client.get("/debug/event-loop", headers={"X-Admin-Token": "secret-token"})
+        assert response.status_code == 200
+        data = response.json()
+        assert "loop_lag_ewma_ms" in data
+        assert isinstance(data["events"], list)
@@ -0,0 +1,138 @@
+"""
+Tests for cost- and latency-aware model routing.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.main import app
+from app.services.lexicon import estimate_ambiguity
+from app.services.model_router import ModelRouter
+from app.services.sentiment_service import get_sentiment_service
+
+client = TestClient(app)
+
+CHEAP, STRONG = "cheap-model", "strong-model"
+
+
+class TestAmbiguityEstimate:
+    """Test cases for the local ambiguity estimate."""
+    
+    def test_one_sided_text_is_clear(self):
+        """Test plain one-sided text scores low."""
+        assert estimate_ambiguity("I love this, it is great") < 0.5
+    
+    def test_mixed_text_is_ambiguous(self):
+        """Test mixed cues with contrast and negation score high."""
+        text = "The screen is great but the battery is terrible and I don't love it"
+        assert estimate_ambiguity(text) >= 0.5
+
+
+class TestModelRoutesSetting:
+    """Test cases for reading MODEL_ROUTES from the environment."""
+    
+    def test_comma_separated(self, monkeypatch):
+        """Test a comma-separated list is split into models."""
+        monkeypatch.setenv("MODEL_ROUTES", f"{CHEAP}, {STRONG}")
+        assert Settings().model_routes == [CHEAP, STRONG]
+    
+    def test_json_list(self, monkeypatch):
+        """Test a JSON list is still accepted."""
+        monkeypatch.setenv("MODEL_ROUTES", f'["{CHEAP}", "{STRONG}"]')
+        assert Settings().model_routes == [CHEAP, STRONG]
+
+
+class TestModelRouter:
+    """Test cases for ModelRouter.choose."""
+    
+    def test_short_clear_text_uses_cheap_model(self):
+        """Test easy texts go to the first model."""
+        router = ModelRouter([CHEAP, STRONG])
+        assert router.choose("I love it") == CHEAP
+    
+    def test_long_ambiguous_text_uses_strong_model(self, monkeypatch):
+        """Test long, ambiguous texts go to the last model."""
+        monkeypatch.setattr("app.config.settings.router_long_text_chars", 20)
+        router = ModelRouter([CHEAP, STRONG])
+        text = "The food was great but the service was terrible, not good"
+        assert router.choose(text) == STRONG
+    
+    def test_slow_model_is_routed_around(self, monkeypatch):
+        """Test a model over the latency budget is swapped for the fastest."""
+        monkeypatch.setattr("app.config.settings.router_long_text_chars", 20)
+        monkeypatch.setattr("app.config.settings.router_latency_budget_ms", 1000)
+        router = ModelRouter([CHEAP, STRONG])
+        router.record(CHEAP, 0.2, None)
+        router.record(STRONG, 3.0, None)
+        text = "The food was great but the service was terrible, not good"
+        assert router.choose(text) == CHEAP
+    
+    def test_slow_model_still_gets_probe_traffic(self, monkeypatch):
+        """Test a share of requests still reaches a slow model so it can recover."""
+        monkeypatch.setattr("app.config.settings.router_long_text_chars", 20)
+        monkeypatch.setattr("app.config.settings.router_latency_budget_ms", 1000)
+        router = ModelRouter([CHEAP, STRONG])
+        router.record(CHEAP, 0.2, None)
+        router.record(STRONG, 3.0, None)
+        text = "The food was great but the service was terrible, not good"
+        
+        chosen = [router.choose(text) for _ in range(40)]
+        
+        assert chosen.count(STRONG) == 2
+        assert router.preferred(text) == STRONG
+        for _ in range(10):
+            router.record(STRONG, 0.2, None)
+        assert router.choose(text) == STRONG
+    
+    def test_stats_include_latency_and_tokens(self):
+        """Test per-model stats aggregate latency and token usage."""
+        router = ModelRouter([CHEAP])
+        router.choose("text")
+        router.record(CHEAP, 0.1, {"input_tokens": 100, "output_tokens": 20})
+        router.record(CHEAP, 0.3, {"input_tokens": 50, "output_tokens": 10})
+        stats = router.get_stats()[CHEAP]
+        assert stats["routed"] == 1
+        assert stats["calls"] == 2
+        assert stats["prompt_tokens"] == 150
+        assert stats["completion_tokens"] == 30
+        assert stats["latency_p50_ms"] == pytest.approx(200.0)
+
+
+class TestRoutedService:
+    """Test cases for routing through the sentiment service."""
+    
+    def test_metrics_report_routes(self, stub_chain):
+        """Test /metrics exposes per-route calls and tokens."""
+        client.post("/analyze-sentiment", json={"text": "Metrics text"})
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        data = response.json()
+        route = next(iter(data["routes"].values()))
+        assert route["calls"] == 1
+        assert route["prompt_tokens"] == 120
+        assert "upstream" in data and "jobs" in data
+    
+    def test_cache_hits_are_not_routed(self, stub_chain):
+        """Test only cache misses are routed and counted."""
+        client.post("/analyze-sentiment", json={"text": "Routed once"})
+        client.post("/analyze-sentiment", json={"text": "Routed once"})
+        route = next(iter(client.get("/metrics").json()["routes"].values()))
+        assert route["routed"] == 1
+    
+    def test_cache_namespace_ignores_latency(self, stub_chain, monkeypatch):
+        """Test a slow preferred model does not move its texts to another namespace."""
+        monkeypatch.setattr("app.config.settings.router_latency_budget_ms", 1000)
+        service = get_sentiment_service()
+        service.router = ModelRouter([CHEAP, STRONG])
+        service.router.record(CHEAP, 3.0, None)
+        service.router.record(STRONG, 0.2, None)
+        assert service.router.preferred("I love it") == CHEAP
+        assert service.router.choose("I love it") == STRONG
+    
+    def test_models_have_separate_cache_namespaces(self, stub_chain):
+        """Test the same text cached under one model misses under another."""
+        service = get_sentiment_service()
+        key = service._get_cache_key("Namespaced text")
+        assert service._namespaced_key(CHEAP, "Namespaced text") != \
+            service._namespaced_key(STRONG, "Namespaced text")
+        assert service._namespaced_key(CHEAP, "Namespaced text").endswith(key)
@@ -0,0 +1,91 @@
+"""
+Tests for admin-guarded profiling and per-request phase timing.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+ADMIN = {"X-Admin-Token": "secret-token"}
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    """Configure an admin token."""
+    monkeypatch.setattr("app.config.settings.admin_token", "secret-token")
+
+
+class TestAdminGuard:
+    """Test cases for the admin token check."""
+    
+    def test_disabled_without_configured_token(self, monkeypatch):
+        """Test admin endpoints are closed when no token is configured."""
+        monkeypatch.setattr("app.config.settings.admin_token", "")
+        response = client.get("/debug/event-loop", headers=ADMIN)
+        assert response.status_code == 403
+    
+    def test_wrong_token_rejected(self, admin_token):
+        """Test a wrong token is rejected."""
+        response = client.get("/debug/event-loop", headers={"X-Admin-Token": "wrong"})
+        assert response.status_code == 403
+
+
+class TestProfileEndpoints:
+    """Test cases for the CPU and memory profile endpoints."""
+    
+    def test_cpu_profile_folded(self, admin_token):
+        """Test the folded CPU profile is a downloadable stack list."""
+        response = client.get("/debug/profile/cpu?seconds=0.2&interval_ms=5", headers=ADMIN)
+        assert response.status_code == 200
+        assert "attachment" in response.headers["content-disposition"]
+        line = response.text.splitlines()[0]
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) >= 1
+        assert ";" in stack
+    
+    def test_cpu_profile_json(self, admin_token):
+        """Test the JSON CPU profile lists functions with percentages."""
+        response = client.get("/debug/profile/cpu?seconds=0.2&format=json", headers=ADMIN)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["samples"] > 0
+        assert 0 < data["functions"][0]["total_percent"] <= 100
+    
+    def test_memory_profile(self, admin_token):
+        """Test the memory profile returns allocation sites."""
+        response = client.get("/debug/profile/memory?seconds=0.1&top=5", headers=ADMIN)
+        assert response.status_code == 200
+        assert isinstance(response.json()["allocations"], list)
+    
+    def test_duration_is_capped(self, admin_token, monkeypatch):
+        """Test durations above the configured maximum are rejected."""
+        monkeypatch.setattr("app.config.settings.profile_max_seconds", 5)
+        response = client.get("/debug/profile/cpu?seconds=10", headers=ADMIN)
+        assert response.status_code == 400
+
+
+class TestRequestProfiling:
+    """Test cases for the X-Profile request header."""
+    
+    def test_server_timing_breakdown(self, stub_chain, admin_token):
+        """Test a profiled request reports its phases in Server-Timing."""
+        response = client.post(
+            "/analyze-sentiment",
+            json={"text": "Profile this request"},
+            headers={"X-Profile": "1", **ADMIN}
+        )
+        assert response.status_code == 200
+        phases = {entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")}
+        assert {"validation", "cache", "llm", "parse", "serialization", "total"} <= phases
+    
+    def test_header_ignored_without_admin_token(self, stub_chain, admin_token):
+        """Test the full breakdown is not enabled for unauthenticated requests."""
+        response = client.post(
+            "/analyze-sentiment",
+            json={"text": "Profile this request"},
+            headers={"X-Profile": "1"}
+        )
+        assert response.status_code == 200
+        assert "validation" not in response.headers["server-timing"]
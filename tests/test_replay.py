@@ -0,0 +1,183 @@
+"""
+Tests for traffic capture, the LLM stand-in and the replay command.
+"""
+import asyncio
+import uuid
+
+import httpx
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cli import replay
+from app.cli.llm_stub import start_stub
+from app.main import app
+from app.services.sentiment_service import get_sentiment_service
+from app.services.shared_cache import SharedMemoryCache
+from app.services.traffic_capture import TrafficCapture, read_capture
+
+
+@pytest.fixture
+def stub_server():
+    """Run a stand-in with no delay."""
+    server = start_stub(latency=0.0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def live_segment():
+    """A shared cache segment standing in for the live workers' one."""
+    cache = SharedMemoryCache.create(f"test_{uuid.uuid4().hex[:12]}", slots=64, slot_size=1024)
+    yield cache
+    cache.close()
+
+
+class TestTrafficCapture:
+    """Test cases for sampled capture."""
+    
+    def test_hashes_and_lengths_by_default(self, tmp_path):
+        """Test texts are not stored unless raw capture is enabled."""
+        capture = TrafficCapture(str(tmp_path / "capture.jsonl"), 1.0, raw_text=False)
+        capture.record("Private text", "private text", 100.0)
+        
+        record = next(read_capture(capture.path))
+        
+        assert record["length"] == len("Private text")
+        assert len(record["hash"]) == 16
+        assert "text" not in record
+    
+    def test_sampling_keeps_every_repeat(self, tmp_path):
+        """Test a sampled text is captured each time it is seen, so duplicates survive."""
+        capture = TrafficCapture(str(tmp_path / "capture.jsonl"), 0.5, raw_text=True)
+        texts = [f"text {index}" for index in range(200)]
+        for text in texts + texts:
+            capture.record(text, text, 100.0)
+        
+        captured = [record["text"] for record in read_capture(capture.path)]
+        
+        assert 50 < len(set(captured)) < 150
+        assert len(captured) == 2 * len(set(captured))
+    
+    def test_service_captures_served_requests(self, stub_chain, tmp_path):
+        """Test the service records arrivals when capture is enabled."""
+        service = get_sentiment_service()
+        path = str(tmp_path / "capture.jsonl")
+        service.traffic_capture = TrafficCapture(path, 1.0, raw_text=False)
+        client = TestClient(app)
+        client.post("/analyze-sentiment", json={"text": "Captured text"})
+        client.post("/analyze-sentiment", json={"text": "  CAPTURED TEXT "})
+        
+        records = list(read_capture(service.traffic_capture.path))
+        
+        assert len(records) == 2
+        assert records[0]["hash"] == records[1]["hash"]
+        assert records[0]["t"] <= records[1]["t"]
+    
+    def test_hash_is_keyed_per_capture(self, tmp_path):
+        """Test workers sharing a capture agree on hashes another capture cannot reproduce."""
+        shared, other = str(tmp_path / "a" / "capture.jsonl"), str(tmp_path / "b" / "capture.jsonl")
+        paths = [shared, shared, other]
+        hashes = []
+        for path in paths:
+            capture = TrafficCapture(path, 1.0, raw_text=False)
+            capture.record("Order shipped", "order shipped", 100.0)
+            capture.close()
+            hashes.append(list(read_capture(path))[-1]["hash"])
+        
+        assert hashes[0] == hashes[1]
+        assert hashes[0] != hashes[2]
+
+
+class TestLLMStub:
+    """Test cases for the OpenAI-compatible stand-in."""
+    
+    def test_answers_chat_completions(self, stub_server):
+        """Test the stand-in returns a sentiment JSON with token usage."""
+        response = httpx.post(f"{stub_server.base_url}/chat/completions", json={
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "user", "content": "Analyze the sentiment of this text: I love it"}
+            ]
+        })
+        
+        payload = response.json()
+        content = orjson.loads(payload["choices"][0]["message"]["content"])
+        assert content["sentiment"] == "positive"
+        assert payload["usage"]["total_tokens"] > 0
+        assert stub_server.requests == 1
+    
+    def test_unknown_path(self, stub_server):
+        """Test other paths are not found."""
+        assert httpx.post(f"{stub_server.base_url}/embeddings", json={}).status_code == 404
+
+
+class TestReplay:
+    """Test cases for replaying a capture."""
+    
+    def test_synthetic_texts_keep_length_and_duplicates(self):
+        """Test hash-only records become stable texts of the recorded length."""
+        first = replay.synthesize_text({"hash": "ab" * 8, "length": 120})
+        assert len(first) == 120
+        assert replay.synthesize_text({"hash": "ab" * 8, "length": 120}) == first
+        assert replay.synthesize_text({"hash": "cd" * 8, "length": 120}) != first
+    
+    def test_short_texts_do_not_collide(self):
+        """Test texts shorter than a hash keep the whole hash rather than share a prefix."""
+        texts = {replay.synthesize_text({"hash": f"{digit}" * 16, "length": 12}) for digit in "abc"}
+        assert len(texts) == 3
+    
+    def test_latency_includes_queueing(self):
+        """Test latency is measured from the scheduled arrival, not when a slot frees up."""
+        class SlowClient:
+            async def post(self, path, json):
+                await asyncio.sleep(0.05)
+                return httpx.Response(200, headers={"x-cache": "MISS"})
+        
+        arrivals = [(0.0, "a"), (0.0, "b"), (0.0, "c")]
+        outcomes = asyncio.run(replay.replay(SlowClient(), arrivals, 1.0, 1))
+        
+        latencies = sorted(latency for _, _, latency in outcomes)
+        assert latencies[2] >= 0.14
+    
+    def test_replay_reports_cache_and_latency(self, monkeypatch, tmp_path, live_segment):
+        """Test a replay through the stand-in reports hit rate and upstream calls."""
+        monkeypatch.setattr("app.config.settings.label_log_path", str(tmp_path / "labels.jsonl"))
+        monkeypatch.setattr("app.config.settings.upstreams", [])
+        monkeypatch.setattr("app.config.settings.capture_enabled", False)
+        monkeypatch.setattr("app.config.settings.label_log_enabled", True)
+        monkeypatch.setattr("app.config.settings.aggregation_enabled", True)
+        monkeypatch.setattr("app.config.settings.results_store_enabled", True)
+        monkeypatch.setattr("app.config.settings.shared_cache_enabled", True)
+        monkeypatch.setattr("app.config.settings.shared_cache_name", live_segment.name)
+        monkeypatch.setattr("app.services.sentiment_service._service", None)
+        capture = tmp_path / "capture.jsonl"
+        lines = [
+            {"t": 100.0, "hash": "a" * 16, "length": 40},
+            {"t": 100.1, "hash": "b" * 16, "length": 80},
+            {"t": 100.2, "text": "I love this"},
+            {"t": 100.3, "hash": "a" * 16, "length": 40},
+        ]
+        capture.write_bytes(b"".join(orjson.dumps(line) + b"\n" for line in lines))
+        args = replay.build_parser().parse_args([
+            str(capture), "--speed", "10", "--latency-ms", "0", "--jitter-ms", "0"
+        ])
+        
+        report = asyncio.run(replay.run_replay(args))
+        
+        assert report["requests"] == 4
+        assert report["errors"] == 0
+        assert report["distinct_texts"] == 3
+        # The repeat is a hit, or coalesced if the first call is still running
+        assert report["cache_hit_rate"] + report["coalesced_rate"] == 0.25
+        assert report["upstream_calls"] == 3
+        assert report["latency_ms"]["p50"] > 0
+        assert report["elapsed_seconds"] >= 0.03
+        assert not (tmp_path / "labels.jsonl").exists()
+        # Stand-in labels never reach the live workers' shared cache
+        service = get_sentiment_service()
+        assert service._shared_cache is None and service.results_store is None
+        assert live_segment.get(service._namespaced_key(
+            service.router.preferred("I love this"), "I love this"
+        )) is None
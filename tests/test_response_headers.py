@@ -0,0 +1,91 @@
+"""
+Tests for the X-Cache and Server-Timing response headers.
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.sentiment_service import CacheStatus, get_sentiment_service
+
+client = TestClient(app)
+
+
+def _phases(response):
+    """Phase names listed in the Server-Timing header."""
+    return {entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")}
+
+
+class TestCacheStatusHeader:
+    """Test cases for the X-Cache header."""
+    
+    def test_miss_then_hit(self, stub_chain):
+        """Test the first request is a miss and the repeat a hit."""
+        first = client.post("/analyze-sentiment", json={"text": "Header text"})
+        second = client.post("/analyze-sentiment", json={"text": "Header text"})
+        assert first.headers["x-cache"] == "MISS"
+        assert second.headers["x-cache"] == "HIT"
+    
+    def test_fallback_when_upstream_fails(self, stub_chain):
+        """Test a failed upstream call without a cached result is a fallback."""
+        async def failing(inputs):
+            raise RuntimeError("upstream down")
+        stub_chain.ainvoke = failing
+        response = client.post("/analyze-sentiment", json={"text": "I love it"})
+        assert response.status_code == 200
+        assert response.headers["x-cache"] == "FALLBACK"
+    
+    def test_stale_when_upstream_fails_after_expiry(self, stub_chain, monkeypatch):
+        """Test an expired entry is served when the upstream call fails."""
+        client.post("/analyze-sentiment", json={"text": "Stale text"})
+        service = get_sentiment_service()
+        for key, entry in service._cache.items():
+            service._cache[key] = entry._replace(expires=0.0)
+        
+        async def failing(inputs):
+            raise RuntimeError("upstream down")
+        stub_chain.ainvoke = failing
+        response = client.post("/analyze-sentiment", json={"text": "Stale text"})
+        assert response.headers["x-cache"] == "STALE"
+        assert response.json()["explanation"] == "Stubbed analysis"
+    
+    @pytest.mark.asyncio
+    async def test_followers_are_coalesced(self, stub_chain):
+        """Test requests that join an in-flight call report COALESCED."""
+        service = get_sentiment_service()
+        original = stub_chain.ainvoke
+        
+        async def slow_ainvoke(inputs):
+            await asyncio.sleep(0.05)
+            return await original(inputs)
+        stub_chain.ainvoke = slow_ainvoke
+        
+        results = await asyncio.gather(
+            *(service.analyze_sentiment_json("Coalesced text") for _ in range(3))
+        )
+        assert [status for _, status in results] == [
+            CacheStatus.MISS, CacheStatus.COALESCED, CacheStatus.COALESCED
+        ]
+
+
+class TestServerTimingHeader:
+    """Test cases for the Server-Timing header."""
+    
+    def test_miss_reports_upstream_phases(self, stub_chain):
+        """Test a miss reports cache, llm, parse and total phases."""
+        response = client.post("/analyze-sentiment", json={"text": "Timed text"})
+        assert {"cache", "llm", "parse", "total"} <= _phases(response)
+    
+    def test_hit_reports_cache_phase(self, stub_chain):
+        """Test a hit reports only the cache lookup and total."""
+        client.post("/analyze-sentiment", json={"text": "Timed text"})
+        response = client.post("/analyze-sentiment", json={"text": "Timed text"})
+        assert _phases(response) == {"cache", "total"}
+    
+    def test_disabled_by_setting(self, stub_chain, monkeypatch):
+        """Test timing can be turned off while X-Cache stays."""
+        monkeypatch.setattr("app.config.settings.server_timing_enabled", False)
+        response = client.post("/analyze-sentiment", json={"text": "Untimed text"})
+        assert "server-timing" not in response.headers
+        assert response.headers["x-cache"] == "MISS"
@@ -0,0 +1,122 @@
+"""
+Tests for the columnar results store.
+"""
+import asyncio
+import os
+
+import numpy as np
+import orjson
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.results_store import (
+    LABELS,
+    STATUSES,
+    ResultsStore,
+    iter_segments,
+    read_results,
+    text_hash,
+)
+from app.services.sentiment_service import get_sentiment_service
+
+
+def body(sentiment: str, confidence: float) -> bytes:
+    """Serialized result body."""
+    return orjson.dumps({"sentiment": sentiment, "confidence": confidence, "explanation": "Test"})
+
+
+class TestResultsStore:
+    """Test cases for writing and reading segments."""
+    
+    def test_rows_round_trip_as_columns(self, tmp_path):
+        """Test recorded rows are written as typed columns."""
+        store = ResultsStore(str(tmp_path), 100, 60.0, 100)
+        store.record("Great", body("positive", 0.9), "MISS", 0.25)
+        store.record("Awful", body("negative", 0.8), "HIT", 0.001)
+        store.flush()
+        
+        columns = read_results(str(tmp_path))
+        
+        assert [LABELS[code] for code in columns["label"]] == ["positive", "negative"]
+        assert [STATUSES[code] for code in columns["status"]] == ["MISS", "HIT"]
+        np.testing.assert_allclose(columns["confidence"], [0.9, 0.8], rtol=1e-6)
+        np.testing.assert_allclose(columns["latency_ms"], [250.0, 1.0], rtol=1e-6)
+        assert columns["text_hash"].tolist() == [text_hash("Great"), text_hash("Awful")]
+        assert columns["timestamp"].dtype == np.float64
+        assert store.get_stats()["rows_written"] == 2
+    
+    def test_segments_are_split_and_memory_mapped(self, tmp_path):
+        """Test large batches split into segments opened without copying."""
+        store = ResultsStore(str(tmp_path), 2, 60.0, 100)
+        for index in range(5):
+            store.record(f"Text {index}", body("neutral", 0.5), "LOCAL", 0.01)
+        store.flush()
+        
+        segments = list(iter_segments(str(tmp_path), ["label"]))
+        
+        assert [len(segment["label"]) for segment in segments] == [2, 2, 1]
+        assert all(isinstance(segment["label"], np.memmap) for segment in segments)
+        assert store.get_stats()["segments_written"] == 3
+    
+    def test_full_buffer_drops_rows(self, tmp_path):
+        """Test recording never blocks once the buffer is full."""
+        store = ResultsStore(str(tmp_path), 100, 60.0, 2)
+        for _ in range(3):
+            store.record("Text", body("positive", 0.9), "MISS", 0.01)
+        
+        assert store.get_stats()["rows_buffered"] == 2
+        assert store.get_stats()["rows_dropped"] == 1
+    
+    def test_only_complete_segments_are_read(self, tmp_path):
+        """Test segments still being written are invisible to readers."""
+        os.makedirs(tmp_path / ".tmp-partial")
+        assert read_results(str(tmp_path))["label"].size == 0
+    
+    def test_stop_writes_remaining_rows(self, tmp_path):
+        """Test stopping the writer thread flushes the buffer."""
+        store = ResultsStore(str(tmp_path), 100, 60.0, 100)
+        store.start()
+        store.record("Text", body("positive", 0.9), "MISS", 0.01)
+        store.stop()
+        
+        assert read_results(str(tmp_path))["label"].size == 1
+
+
+class TestServiceRecording:
+    """Test cases for results recorded by the service."""
+    
+    def test_served_results_are_recorded(self, stub_chain, tmp_path):
+        """Test misses and hits are both recorded with their status."""
+        service = get_sentiment_service()
+        directory = str(tmp_path / "results")
+        os.makedirs(directory)
+        service.results_store = ResultsStore(directory, 100, 60.0, 100)
+        client = TestClient(app)
+        
+        for _ in range(2):
+            client.post("/analyze-sentiment", json={"text": "Record this text"})
+        service.results_store.flush()
+        
+        columns = read_results(directory)
+        assert [STATUSES[code] for code in columns["status"]] == ["MISS", "HIT"]
+        assert set(columns["text_hash"].tolist()) == {text_hash("Record this text")}
+        assert client.get("/metrics").json()["results_store"]["rows_written"] == 2
+    
+    def test_internal_scoring_is_not_recorded(self, stub_chain, tmp_path):
+        """Test document chunks are scored without counting as served results."""
+        service = get_sentiment_service()
+        directory = str(tmp_path / "results")
+        os.makedirs(directory)
+        service.results_store = ResultsStore(directory, 100, 60.0, 100)
+        client = TestClient(app)
+        
+        client.post("/analyze-document", json={"text": "First part. " * 200})
+        asyncio.run(service.analyze_sentiment("Scored for a job", record=False))
+        
+        assert service.results_store.get_stats()["rows_buffered"] == 0
+    
+    def test_disabled_by_default(self, stub_chain):
+        """Test nothing is recorded unless the store is enabled."""
+        service = get_sentiment_service()
+        assert service.results_store is None
+        assert service.get_metrics()["results_store"] == {"enabled": False}
@@ -0,0 +1,181 @@
+"""
+Tests for the upstream retry policy and retry budget.
+"""
+import asyncio
+
+import httpx
+import openai
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.retry_policy import RetryBudget, RetryPolicy, retry_after
+from app.services.sentiment_service import get_sentiment_service
+
+client = TestClient(app)
+
+
+def rate_limit_error(headers=None) -> openai.RateLimitError:
+    """A 429 from the provider with optional response headers."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers=headers or {}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+class Flaky:
+    """Async callable failing with the given errors before succeeding."""
+    
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+    
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays instead of sleeping."""
+    delays = []
+    
+    async def fake_sleep(delay):
+        delays.append(delay)
+    
+    monkeypatch.setattr("app.services.retry_policy.asyncio.sleep", fake_sleep)
+    return delays
+
+
+def make_policy(max_retries=3, ratio=1.0, min_retries=10) -> RetryPolicy:
+    """Policy with a 100ms base delay and a 1s maximum delay."""
+    return RetryPolicy(max_retries, 0.1, 1.0, RetryBudget(ratio, 10, min_retries))
+
+
+class TestRetryPolicy:
+    """Test cases for RetryPolicy.call."""
+    
+    def test_transient_errors_are_retried_with_backoff(self, sleeps):
+        """Test rate limits are retried with jittered, bounded delays."""
+        policy = make_policy()
+        func = Flaky(rate_limit_error(), rate_limit_error())
+        
+        assert asyncio.run(policy.call(func)) == "ok"
+        assert func.calls == 3
+        assert len(sleeps) == 2
+        assert 0 <= sleeps[0] <= 0.1 and 0 <= sleeps[1] <= 0.2
+        assert policy.get_stats()["retries"] == 2
+    
+    def test_other_errors_are_not_retried(self, sleeps):
+        """Test errors that are not transient fail immediately."""
+        func = Flaky(ValueError("bad output"))
+        with pytest.raises(ValueError):
+            asyncio.run(make_policy().call(func))
+        assert func.calls == 1
+    
+    def test_gives_up_after_max_retries(self, sleeps):
+        """Test the last error is raised once attempts run out."""
+        func = Flaky(*(rate_limit_error() for _ in range(3)))
+        with pytest.raises(openai.RateLimitError):
+            asyncio.run(make_policy(max_retries=2).call(func))
+        assert func.calls == 3
+    
+    def test_retry_after_is_honoured(self, sleeps):
+        """Test the provider's Retry-After replaces the backoff."""
+        policy = make_policy()
+        asyncio.run(policy.call(Flaky(rate_limit_error({"retry-after": "0.5"}))))
+        assert sleeps == [0.5]
+        assert policy.get_stats()["retry_after_honoured"] == 1
+    
+    def test_retry_after_beyond_max_delay_is_not_waited(self, sleeps):
+        """Test a Retry-After longer than the maximum delay fails at once."""
+        policy = make_policy()
+        func = Flaky(rate_limit_error({"retry-after": "30"}))
+        with pytest.raises(openai.RateLimitError):
+            asyncio.run(policy.call(func))
+        assert sleeps == []
+        assert policy.get_stats()["retry_after_too_long"] == 1
+    
+    def test_retry_after_ms_header(self):
+        """Test the millisecond header takes precedence."""
+        error = rate_limit_error({"retry-after-ms": "250", "retry-after": "1"})
+        assert retry_after(error) == 0.25
+
+
+class TestRetryBudget:
+    """Test cases for RetryBudget."""
+    
+    def test_budget_caps_retries(self, sleeps):
+        """Test retries stop once they reach the ratio of recent calls."""
+        policy = make_policy(ratio=0.2, min_retries=0)
+        for _ in range(10):
+            asyncio.run(policy.call(Flaky()))
+        
+        results = []
+        for _ in range(4):
+            try:
+                asyncio.run(policy.call(Flaky(rate_limit_error())))
+                results.append(True)
+            except openai.RateLimitError:
+                results.append(False)
+        
+        # The fourth failure would be the fourth retry in 14 calls (allowance 2.8)
+        assert results == [True, True, True, False]
+        stats = policy.get_stats()["budget"]
+        assert stats["window_calls"] == 14
+        assert stats["window_retries"] == 3
+        assert stats["exhausted"] == 1
+    
+    def test_exhausted_budget_is_reported(self, sleeps):
+        """Test failures beyond the budget are not retried and are counted."""
+        policy = make_policy(ratio=0.0, min_retries=1)
+        asyncio.run(policy.call(Flaky(rate_limit_error())))
+        with pytest.raises(openai.RateLimitError):
+            asyncio.run(policy.call(Flaky(rate_limit_error())))
+        assert policy.get_stats()["budget"]["exhausted"] == 1
+
+
+class TestServiceRetries:
+    """Test cases for retries in the sentiment service."""
+    
+    def test_rate_limited_call_is_retried(self, stub_chain, sleeps):
+        """Test a 429 from the chain is retried and reported in /metrics."""
+        original = stub_chain.ainvoke
+        errors = [rate_limit_error()]
+        
+        async def flaky_ainvoke(inputs):
+            if errors:
+                raise errors.pop()
+            return await original(inputs)
+        
+        stub_chain.ainvoke = flaky_ainvoke
+        response = client.post("/analyze-sentiment", json={"text": "Retry me please"})
+        
+        assert response.headers["x-cache"] == "MISS"
+        assert client.get("/metrics").json()["retries"]["retries"] == 1
+        assert get_sentiment_service().retry_policy.attempts == 2
+    
+    def test_backoff_does_not_hold_a_call_slot(self, stub_chain, monkeypatch):
+        """Test the call slot is free during backoff and only attempts are timed."""
+        service = get_sentiment_service()
+        in_flight = []
+        
+        async def fake_sleep(delay):
+            in_flight.append(service.llm_in_flight)
+        
+        monkeypatch.setattr("app.services.retry_policy.asyncio.sleep", fake_sleep)
+        original = stub_chain.ainvoke
+        errors = [rate_limit_error()]
+        
+        async def flaky_ainvoke(inputs):
+            if errors:
+                raise errors.pop()
+            return await original(inputs)
+        
+        stub_chain.ainvoke = flaky_ainvoke
+        client.post("/analyze-sentiment", json={"text": "Back off without a slot"})
+        
+        assert in_flight == [0]
+        model = service.router.models[0]
+        assert len(service.router.stats[model].attempt_latencies) == 1
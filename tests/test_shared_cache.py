@@ -0,0 +1,100 @@
+"""
+Tests for the cross-process shared memory cache.
+"""
+import multiprocessing
+import uuid
+
+import pytest
+
+from app.services.shared_cache import SharedMemoryCache, _hash_key
+
+
+@pytest.fixture
+def segment():
+    """Create a small, uniquely named segment."""
+    cache = SharedMemoryCache.create(f"test_{uuid.uuid4().hex[:12]}", slots=64, slot_size=256)
+    yield cache
+    cache.close()
+
+
+def _write_from_child(name: str) -> None:
+    """Store an entry from another process."""
+    cache = SharedMemoryCache.attach(name)
+    cache.set("from child", b'{"sentiment":"negative"}', ttl=60)
+
+
+def _same_slot_keys(slots: int):
+    """Two keys whose first candidate slot is the same."""
+    seen = {}
+    for index in range(10000):
+        key = f"key {index}"
+        other = seen.setdefault(_hash_key(key) % slots, key)
+        if other != key:
+            return other, key
+    raise AssertionError("No colliding keys found")
+
+
+def _write_repeatedly(name: str, key: str, body: bytes, count: int) -> None:
+    """Overwrite one key many times from another process."""
+    cache = SharedMemoryCache.attach(name)
+    for _ in range(count):
+        cache.set(key, body, ttl=60)
+    cache.close()
+
+
+class TestSharedMemoryCache:
+    """Test cases for the shared memory cache segment."""
+    
+    def test_set_and_get(self, segment):
+        """Test a stored body is returned for the same key."""
+        assert segment.set("hello", b'{"sentiment":"positive"}', ttl=60)
+        assert segment.get("hello") == b'{"sentiment":"positive"}'
+        assert segment.get("other") is None
+    
+    def test_expired_entry_is_miss(self, segment):
+        """Test entries past their TTL are not returned."""
+        segment.set("hello", b"{}", ttl=-1)
+        assert segment.get("hello") is None
+    
+    def test_oversized_body_is_rejected(self, segment):
+        """Test bodies larger than a slot are not stored."""
+        assert not segment.set("big", b"x" * 1024, ttl=60)
+        assert segment.get("big") is None
+    
+    def test_clear(self, segment):
+        """Test clearing invalidates all entries."""
+        segment.set("hello", b"{}", ttl=60)
+        segment.clear()
+        assert segment.get("hello") is None
+    
+    def test_visible_across_processes(self, segment):
+        """Test an entry written by another process is a hit here."""
+        process = multiprocessing.get_context("fork").Process(
+            target=_write_from_child, args=(segment.name,)
+        )
+        process.start()
+        process.join(timeout=10)
+        assert segment.get("from child") == b'{"sentiment":"negative"}'
+    
+    def test_concurrent_writers_of_one_slot(self, segment):
+        """Test two processes rewriting one slot never serve one key's body for the other."""
+        keys = _same_slot_keys(segment.slots)
+        bodies = {key: f'{{"sentiment":"{key}"}}'.encode() for key in keys}
+        context = multiprocessing.get_context("fork")
+        writers = [
+            context.Process(target=_write_repeatedly, args=(segment.name, key, body, 20000))
+            for key, body in bodies.items()
+        ]
+        for writer in writers:
+            writer.start()
+        while any(writer.is_alive() for writer in writers):
+            for key, body in bodies.items():
+                assert segment.get(key) in (body, None)
+        for writer in writers:
+            writer.join(timeout=10)
+        assert all(segment.get(key) == body for key, body in bodies.items())
+    
+    def test_attach_missing_segment(self):
+        """Test attaching to a missing segment raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            SharedMemoryCache.attach(f"missing_{uuid.uuid4().hex[:12]}")
@@ -0,0 +1,175 @@
+"""
+Tests for the shutdown drain and the cache snapshot.
+"""
+import asyncio
+import os
+import time
+
+import orjson
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.models import JobStatus
+from app.services.cache_priming import CachePrimer, PrimingPlan
+from app.services.job_service import JobManager
+from app.services.sentiment_service import get_sentiment_service
+from app.services.shutdown import drain
+
+
+def slow_chain(stub_chain, seconds: float):
+    """Make every chain call take the given time."""
+    original = stub_chain.ainvoke
+    
+    async def slow_ainvoke(inputs):
+        await asyncio.sleep(seconds)
+        return await original(inputs)
+    
+    stub_chain.ainvoke = slow_ainvoke
+
+
+def start_call(service, text: str) -> asyncio.Task:
+    """Start an upstream call and detach it, as if its client went away."""
+    model = service.router.choose(text)
+    cache_key = service._namespaced_key(model, text)
+    return asyncio.ensure_future(service._analyze_coalesced(text, model, cache_key))
+
+
+class TestCacheSnapshot:
+    """Test cases for saving and loading the cache."""
+    
+    def test_round_trip(self, stub_chain, tmp_path):
+        """Test fresh entries survive a save and load with identical bodies."""
+        service = get_sentiment_service()
+        asyncio.run(service.analyze_sentiment("Snapshot this text"))
+        path = str(tmp_path / "snapshot.jsonl")
+        
+        assert service.save_cache(path) == 1
+        body = next(iter(service._cache.values())).body
+        service.clear_cache()
+        assert service.load_cache(path) == 1
+        assert next(iter(service._cache.values())).body == body
+    
+    def test_workers_merge_into_one_snapshot(self, stub_chain, tmp_path):
+        """Test a second worker's save keeps the entries the first one saved."""
+        service = get_sentiment_service()
+        path = str(tmp_path / "snapshot.jsonl")
+        asyncio.run(service.analyze_sentiment("Saved by the first worker"))
+        assert service.save_cache(path) == 1
+        
+        service.clear_cache()
+        asyncio.run(service.analyze_sentiment("Saved by the second worker"))
+        assert service.save_cache(path) == 2
+        
+        service.clear_cache()
+        assert service.load_cache(path) == 2
+        assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+    
+    def test_expired_and_invalid_lines_are_skipped(self, stub_chain, tmp_path):
+        """Test loading ignores expired entries and corrupt lines."""
+        path = tmp_path / "snapshot.jsonl"
+        result = {"sentiment": "positive", "confidence": 0.9, "explanation": "Kept"}
+        path.write_bytes(
+            orjson.dumps(["model:expired", time.time() - 1, result]) + b"\n"
+            + b"not json\n"
+            + orjson.dumps(["model:fresh", time.time() + 60, result]) + b"\n"
+        )
+        service = get_sentiment_service()
+        assert service.load_cache(str(path)) == 1
+        assert list(service._cache) == ["model:fresh"]
+    
+    def test_missing_snapshot(self, stub_chain, tmp_path):
+        """Test a missing snapshot loads nothing."""
+        assert get_sentiment_service().load_cache(str(tmp_path / "missing.jsonl")) == 0
+
+
+class TestDrain:
+    """Test cases for draining the worker."""
+    
+    def test_detached_calls_finish_and_are_cached(self, stub_chain):
+        """Test upstream calls in progress complete within the deadline and reach the cache."""
+        slow_chain(stub_chain, 0.1)
+        service = get_sentiment_service()
+        
+        async def run():
+            start_call(service, "Paid-for result")
+            await asyncio.sleep(0)
+            return await service.drain(5.0)
+        
+        assert asyncio.run(run()) == {"calls_completed": 1, "calls_dropped": 0}
+        assert len(service._cache) == 1
+    
+    def test_calls_past_deadline_are_dropped(self, stub_chain):
+        """Test calls still running at the deadline are cancelled and reported."""
+        slow_chain(stub_chain, 5.0)
+        service = get_sentiment_service()
+        
+        async def run():
+            start_call(service, "Too slow")
+            await asyncio.sleep(0)
+            started = time.perf_counter()
+            report = await service.drain(0.1)
+            return report, time.perf_counter() - started
+        
+        report, elapsed = asyncio.run(run())
+        assert report == {"calls_completed": 0, "calls_dropped": 1}
+        assert elapsed < 1.0
+    
+    def test_running_job_pauses_between_chunks(self, stub_chain, tmp_path, monkeypatch):
+        """Test a job stops after its current chunk and resumes on the next start."""
+        monkeypatch.setattr(settings, "job_workers", 1)
+        monkeypatch.setattr(settings, "job_concurrency", 1)
+        slow_chain(stub_chain, 0.05)
+        manager = JobManager(str(tmp_path))
+        
+        async def run():
+            await manager.start()
+            job = await manager.create_job(["one", "two", "three", "four"])
+            await asyncio.sleep(0.08)
+            return job["job_id"], await manager.drain(5.0)
+        
+        job_id, report = asyncio.run(run())
+        
+        assert report == {"jobs_paused": 1, "jobs_interrupted": 0}
+        meta = orjson.loads((tmp_path / job_id / "meta.json").read_bytes())
+        assert meta["status"] == JobStatus.RUNNING
+        assert 0 < meta["completed"] < 4
+    
+    def test_drain_sheds_requests_and_saves_snapshot(self, stub_chain, tmp_path, monkeypatch):
+        """Test draining stops accepting work and writes the cache snapshot."""
+        monkeypatch.setattr("app.services.job_service._manager", JobManager(str(tmp_path / "jobs")))
+        client = TestClient(app)
+        client.post("/analyze-sentiment", json={"text": "Cached before shutdown"})
+        
+        report = asyncio.run(drain(1.0))
+        
+        assert report["cache_entries_saved"] == 1
+        assert report["calls_dropped"] == 0
+        assert report["drain_seconds"] < 1.0
+        lines = (tmp_path / "cache_snapshot.jsonl").read_bytes().splitlines()
+        assert len(lines) == 1
+        response = client.post("/analyze-sentiment", json={"text": "Sent during the drain"})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+    
+    def test_priming_run_is_cancelled(self, stub_chain, tmp_path, monkeypatch):
+        """Test a priming run stops before the service drain and releases its lock."""
+        path = str(tmp_path / "priming.json")
+        primer = CachePrimer(path)
+        monkeypatch.setattr("app.services.cache_priming._primer", primer)
+        slow_chain(stub_chain, 0.05)
+        service = get_sentiment_service()
+        plan = PrimingPlan([f"Text {index}" for index in range(50)], 50, service._get_cache_key)
+        
+        async def run():
+            primer.start(plan, 1, 0.0)
+            await asyncio.sleep(0.08)
+            return await drain(5.0)
+        
+        report = asyncio.run(run())
+        
+        assert report["priming_cancelled"]
+        assert report["calls_dropped"] == 0
+        assert primer.progress["status"] == "cancelled"
+        assert primer.progress["primed"] < 50
+        assert CachePrimer(path).get_progress()["status"] == "cancelled"
@@ -0,0 +1,81 @@
+"""
+Tests for the streaming NDJSON / SSE endpoint.
+"""
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.api.streaming import MAX_LINE_BYTES, SentimentStreamResponse
+from app.main import app
+
+client = TestClient(app)
+
+
+def _ndjson(texts):
+    """Encode texts as an NDJSON request body."""
+    return "".join(json.dumps({"text": text}) + "\n" for text in texts).encode()
+
+
+class _ChunkedRequest:
+    """Request stand-in delivering its body in the given chunks."""
+    
+    def __init__(self, chunks):
+        self.chunks = chunks
+    
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class TestSentimentStream:
+    """Test cases for streamed sentiment analysis."""
+    
+    def test_ndjson_results_tagged_with_index(self, stub_chain):
+        """Test every input line produces one result with its index."""
+        texts = [f"Line {i}" for i in range(100)]
+        response = client.post(
+            "/analyze-sentiment/stream",
+            content=_ndjson(texts),
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(r["index"] for r in records) == list(range(100))
+        assert all(r["sentiment"] == "positive" for r in records)
+    
+    def test_invalid_lines_report_errors(self, stub_chain):
+        """Test invalid lines produce error records without stopping the stream."""
+        body = b'{"text": "Good"}\n{"text": "   "}\nnot json\n{"text": "Fine"}'
+        response = client.post("/analyze-sentiment/stream", content=body)
+        records = {r["index"]: r for r in map(json.loads, response.text.splitlines())}
+        assert set(records) == {0, 1, 2, 3}
+        assert "error" in records[1] and "error" in records[2]
+        assert records[3]["sentiment"] == "positive"
+    
+    def test_oversized_line_is_rejected_without_buffering(self, stub_chain):
+        """Test a line past the size cap becomes an error and the next line still runs."""
+        oversized = b'{"text": "' + b"x" * (MAX_LINE_BYTES * 3) + b'"}\n'
+        chunks = [oversized[i:i + 65536] for i in range(0, len(oversized), 65536)]
+        chunks.append(b'{"text": "Fine"}\n')
+        stream = SentimentStreamResponse(_ChunkedRequest(chunks), sse=False)
+        results: asyncio.Queue = asyncio.Queue()
+        
+        assert asyncio.run(stream._read_body(results)) == 2
+        records = {r["index"]: r for r in (results.get_nowait() for _ in range(results.qsize()))}
+        assert "exceeds" in records[0]["error"]
+        assert records[1]["sentiment"] == "positive"
+    
+    def test_server_sent_events(self, stub_chain):
+        """Test SSE output when requested through the Accept header."""
+        response = client.post(
+            "/analyze-sentiment/stream",
+            content=_ndjson(["Good", "Great"]),
+            headers={"Accept": "text/event-stream"}
+        )
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [block for block in response.text.split("\n\n") if block]
+        names = [e.splitlines()[0] for e in events]
+        assert names == ["event: result", "event: result", "event: end"]
+        assert json.loads(events[-1].splitlines()[1][len("data: "):]) == {"count": 2}
@@ -0,0 +1,191 @@
+"""
+Tests for LLM token accounting and the tokens-per-minute budget.
+"""
+import asyncio
+import time
+
+import httpx
+import openai
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.sentiment_service import SentimentAnalysisService, get_sentiment_service
+from app.services.token_budget import TokenBudget, set_usage_endpoint
+
+client = TestClient(app)
+
+
+def rate_limit_error() -> openai.RateLimitError:
+    """A 429 from the provider."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def make_budget(tokens_per_minute: int, max_wait: float = 0.0) -> TokenBudget:
+    """Budget with a 10% burst, no completion reservation and no prompt overhead."""
+    return TokenBudget(tokens_per_minute, 0.1, max_wait, 0, 0)
+
+
+class TestTokenBudget:
+    """Test cases for TokenBudget."""
+    
+    def test_disabled_budget_admits_everything(self):
+        """Test a zero limit never waits or rejects."""
+        budget = make_budget(0)
+        assert all(asyncio.run(budget.acquire(10**6)) for _ in range(3))
+        assert budget.get_stats()["rejected"] == 0
+    
+    def test_overflow_beyond_max_wait_is_rejected(self):
+        """Test the burst is admitted and a request needing a long wait is not."""
+        budget = make_budget(6000)
+        assert asyncio.run(budget.acquire(600))
+        assert not asyncio.run(budget.acquire(600))
+        assert budget.get_stats()["rejected"] == 1
+    
+    def test_short_deficit_is_paced(self):
+        """Test a request waits for the refill when it fits within max_wait."""
+        budget = make_budget(60000, max_wait=1.0)
+        
+        async def run():
+            assert await budget.acquire(6000)
+            started = time.perf_counter()
+            assert await budget.acquire(90)
+            return time.perf_counter() - started
+        
+        waited = asyncio.run(run())
+        assert 0.05 < waited < 1.0
+        assert budget.get_stats()["paced"] == 1
+    
+    def test_background_callers_wait_for_budget(self):
+        """Test callers that wait for budget are queued instead of rejected."""
+        budget = make_budget(60000)
+        
+        async def run():
+            set_usage_endpoint("jobs", wait_for_budget=True)
+            assert await budget.acquire(6000)
+            return await budget.acquire(90)
+        
+        assert asyncio.run(run())
+        assert budget.get_stats()["rejected"] == 0
+    
+    def test_oversized_request_is_admitted_alone(self):
+        """Test a request above the burst capacity waits for a full bucket instead of hanging."""
+        budget = TokenBudget(600000, 0.01, 1.0, 0, 0)
+        
+        async def run():
+            assert await budget.acquire(3000)
+            started = time.perf_counter()
+            assert await asyncio.wait_for(budget.acquire(9000), 2.0)
+            return time.perf_counter() - started
+        
+        assert 0.2 < asyncio.run(run()) < 2.0
+        assert budget.get_stats()["available"] < 0
+    
+    def test_reconcile_never_overfills(self):
+        """Test an overestimated reservation refunds at most up to the capacity."""
+        budget = make_budget(6000)
+        assert asyncio.run(budget.acquire(100))
+        budget.reconcile("x", 100, {"input_tokens": 1, "output_tokens": 0, "total_tokens": 1})
+        budget.reconcile("x", 500, {"input_tokens": 1, "output_tokens": 0, "total_tokens": 1})
+        assert budget.get_stats()["available"] == 600
+    
+    def test_limit_is_split_across_workers(self, stub_chain, monkeypatch):
+        """Test each worker paces its share of the configured limit."""
+        monkeypatch.setattr("app.config.settings.llm_tokens_per_minute", 90000)
+        monkeypatch.setattr("app.config.settings.worker_processes", 4)
+        budgets = SentimentAnalysisService().token_budgets.values()
+        assert {budget.tokens_per_minute for budget in budgets} == {22500}
+    
+    def test_reconcile_refunds_and_learns_token_ratio(self):
+        """Test reported usage corrects the reservation and the estimate."""
+        budget = TokenBudget(6000, 0.1, 0.0, 100, 0)
+        text = "x" * 400
+        reserved = budget.estimate(text)
+        assert reserved == 200
+        assert asyncio.run(budget.acquire(reserved))
+        usage = {"input_tokens": 200, "output_tokens": 10, "total_tokens": 210}
+        budget.reconcile(text, reserved, usage)
+        assert budget.get_stats()["available"] == 600 - 210
+        assert budget.tokens_per_char > 0.25
+
+
+class TestTokenAccounting:
+    """Test cases for token usage reported by the service."""
+    
+    def test_usage_is_attributed_to_endpoint_and_model(self, stub_chain):
+        """Test /metrics totals tokens per route and per model."""
+        client.post("/analyze-sentiment", json={"text": "Token accounting example"})
+        tokens = client.get("/metrics").json()["tokens"]
+        
+        endpoint = tokens["by_endpoint"]["/analyze-sentiment"]
+        assert endpoint == {"calls": 1, "prompt_tokens": 120, "completion_tokens": 30}
+        model = get_sentiment_service().router.models[0]
+        assert tokens["by_model"][model]["prompt_tokens"] == 120
+        assert tokens["budgets"][model]["tokens_per_minute"] == 0
+    
+    def test_exhausted_budget_falls_back(self, stub_chain):
+        """Test requests over the budget are answered without an upstream call."""
+        service = get_sentiment_service()
+        service.token_budgets = {model: make_budget(60) for model in service.router.models}
+        for budget in service.token_budgets.values():
+            asyncio.run(budget.acquire(6))
+        
+        response = client.post("/analyze-sentiment", json={"text": "A fairly long text " * 20})
+        
+        assert response.status_code == 200
+        assert response.headers["x-cache"] == "FALLBACK"
+        assert stub_chain.calls == 0
+    
+    def _install_budgets(self, service) -> TokenBudget:
+        """Give every model one budget that does not refill during the test."""
+        budget = TokenBudget(60000, 1.0, 0.0, 0, 0)
+        service.token_budgets = {model: budget for model in service.router.models}
+        return budget
+    
+    def test_retried_attempt_is_charged(self, stub_chain, monkeypatch):
+        """Test a retry spends the request's estimate again."""
+        async def no_sleep(delay):
+            pass
+        
+        monkeypatch.setattr("app.services.retry_policy.asyncio.sleep", no_sleep)
+        budget = self._install_budgets(get_sentiment_service())
+        text = "Charge the retry as well"
+        estimate = budget.estimate(text)
+        original = stub_chain.ainvoke
+        errors = [rate_limit_error()]
+        
+        async def flaky_ainvoke(inputs):
+            if errors:
+                raise errors.pop()
+            return await original(inputs)
+        
+        stub_chain.ainvoke = flaky_ainvoke
+        response = client.post("/analyze-sentiment", json={"text": text})
+        
+        assert response.headers["x-cache"] == "MISS"
+        assert budget.get_stats()["available"] == 60000 - 150 - estimate
+    
+    def test_hedged_attempt_is_charged(self, stub_chain, monkeypatch):
+        """Test a hedged backup spends the request's estimate again."""
+        monkeypatch.setattr("app.config.settings.hedging_enabled", True)
+        service = get_sentiment_service()
+        for stats in service.router.stats.values():
+            stats.attempt_latencies.extend([0.01] * 20)
+        budget = self._install_budgets(service)
+        text = "Charge the hedge as well"
+        estimate = budget.estimate(text)
+        original = stub_chain.ainvoke
+        
+        async def stalling_ainvoke(inputs):
+            if stub_chain.calls == 0:
+                stub_chain.calls += 1
+                await asyncio.sleep(5.0)
+            return await original(inputs)
+        
+        stub_chain.ainvoke = stalling_ainvoke
+        response = client.post("/analyze-sentiment", json={"text": text})
+        
+        assert response.headers["x-cache"] == "MISS"
+        assert service.hedger.hedge_wins == 1
+        assert budget.get_stats()["available"] == 60000 - 150 - estimate
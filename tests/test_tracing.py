@@ -0,0 +1,116 @@
+"""
+Tests for request tracing and the span file exporter.
+"""
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.tracing import SpanExporter
+
+client = TestClient(app)
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+
+
+def _load_events(path):
+    """Load a trace file the way trace viewers do, closing the array."""
+    with open(path) as handle:
+        text = handle.read()
+    assert text.startswith("[\n")
+    return json.loads(text.rstrip().rstrip(",") + "]")
+
+
+@pytest.fixture
+def exporter(tmp_path, monkeypatch):
+    """Install an exporter writing to a temporary directory."""
+    exporter = SpanExporter(str(tmp_path), 1024 * 1024, 2, 60.0, 1000)
+    monkeypatch.setattr("app.utils.tracing._exporter", exporter)
+    monkeypatch.setattr("app.config.settings.trace_sample_rate", 0.0)
+    return exporter
+
+
+class TestRequestTracing:
+    """Test cases for traced requests."""
+    
+    def test_trace_id_header_traces_request(self, stub_chain, exporter):
+        """Test an incoming trace id produces nested spans in the file."""
+        response = client.post(
+            "/analyze-sentiment",
+            json={"text": "Traced text"},
+            headers={"X-Trace-Id": TRACE_ID}
+        )
+        assert response.headers["x-trace-id"] == TRACE_ID
+        exporter.flush()
+        
+        events = _load_events(exporter.path)
+        spans = {event["name"]: event for event in events}
+        assert {
+            "POST /analyze-sentiment", "route.analyze_sentiment",
+            "service.analyze_sentiment", "cache", "llm", "parse"
+        } <= set(spans)
+        assert all(event["args"]["trace_id"] == TRACE_ID for event in events)
+        assert spans["llm"]["args"]["model"]
+        root = spans["POST /analyze-sentiment"]
+        assert root["args"]["http.status"] == 200
+        assert spans["route.analyze_sentiment"]["args"]["parent_id"] == root["args"]["span_id"]
+    
+    def test_traceparent_continues_trace(self, stub_chain, exporter):
+        """Test a sampled W3C traceparent sets the trace and parent ids."""
+        response = client.post(
+            "/analyze-sentiment",
+            json={"text": "Traced text"},
+            headers={"traceparent": f"00-{TRACE_ID}-b7ad6b7169203331-01"}
+        )
+        assert response.headers["x-trace-id"] == TRACE_ID
+        exporter.flush()
+        events = _load_events(exporter.path)
+        root = next(e for e in events if e["name"] == "POST /analyze-sentiment")
+        assert root["args"]["parent_id"] == "b7ad6b7169203331"
+    
+    def test_unsampled_requests_are_not_traced(self, stub_chain, exporter):
+        """Test requests without a trace header are skipped at rate zero."""
+        response = client.post(
+            "/analyze-sentiment",
+            json={"text": "Untraced text"},
+            headers={"traceparent": f"00-{TRACE_ID}-b7ad6b7169203331-00"}
+        )
+        assert "x-trace-id" not in response.headers
+        exporter.flush()
+        assert exporter.get_stats()["spans_exported"] == 0
+
+
+class TestSpanExporter:
+    """Test cases for file rotation."""
+    
+    def test_rotates_and_keeps_each_file_loadable(self, tmp_path):
+        """Test full files rotate and every file opens as a trace array."""
+        exporter = SpanExporter(str(tmp_path), 2048, 2, 60.0, 1000)
+        event = {"name": "span", "ph": "X", "ts": 0, "dur": 1, "pid": 1, "tid": 1, "args": {}}
+        for _ in range(5):
+            for _ in range(20):
+                exporter.export(event)
+            exporter.flush()
+        assert os.path.exists(f"{exporter.path}.2")
+        assert not os.path.exists(f"{exporter.path}.3")
+        for path in [exporter.path, f"{exporter.path}.1", f"{exporter.path}.2"]:
+            assert all(e["name"] == "span" for e in _load_events(path))
+    
+    def test_prunes_oldest_files_of_other_processes(self, tmp_path):
+        """Test stale files left by recycled workers are removed oldest first."""
+        for i, name in enumerate(["trace-1.json", "trace-2.json.1", "trace-3.json"]):
+            path = tmp_path / name
+            path.write_text("[\n" + "x" * 1000)
+            os.utime(path, (1000 + i, 1000 + i))
+        (tmp_path / "other.txt").write_text("x" * 5000)
+        
+        exporter = SpanExporter(str(tmp_path), 1024 * 1024, 2, 60.0, 1000, 2500)
+        exporter.start()
+        exporter.stop()
+        
+        assert not (tmp_path / "trace-1.json").exists()
+        assert (tmp_path / "trace-2.json.1").exists()
+        assert (tmp_path / "trace-3.json").exists()
+        assert (tmp_path / "other.txt").exists()
@@ -0,0 +1,187 @@
+"""
+Tests for load balancing across upstream endpoints.
+"""
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import openai
+import pytest
+
+from app.config import UpstreamConfig
+from app.services.sentiment_service import SentimentAnalysisService
+from app.services.upstream_pool import UpstreamPool
+
+
+def server_error() -> openai.InternalServerError:
+    """A 503 from an upstream member."""
+    request = httpx.Request("POST", "http://upstream/v1/chat/completions")
+    response = httpx.Response(503, request=request)
+    return openai.InternalServerError("Service unavailable", response=response, body=None)
+
+
+def make_pool(*weights, balancer="least_outstanding", eject_failures=2) -> UpstreamPool:
+    """Pool of members named a, b, ... with the given weights."""
+    configs = [
+        UpstreamConfig(name=chr(ord("a") + index), weight=weight)
+        for index, weight in enumerate(weights)
+    ]
+    return UpstreamPool(configs, balancer, eject_failures, 30.0)
+
+
+async def fail_on(pool: UpstreamPool, count: int = 1) -> None:
+    """Fail the given number of calls with a transient error."""
+    for _ in range(count):
+        with pytest.raises(openai.InternalServerError):
+            async with pool.acquire():
+                raise server_error()
+
+
+class TestUpstreamPool:
+    """Test cases for UpstreamPool member selection and ejection."""
+    
+    def test_least_outstanding_respects_weights(self):
+        """Test a member with twice the weight takes twice the concurrent calls."""
+        pool = make_pool(2.0, 1.0)
+        for _ in range(6):
+            pool.choose().outstanding += 1
+        assert [member.outstanding for member in pool.members] == [4, 2]
+    
+    def test_latency_ewma_prefers_fast_member(self):
+        """Test the latency balancer sends traffic to the faster member."""
+        pool = make_pool(1.0, 1.0, balancer="latency_ewma")
+        pool.members[0].record_success(0.5)
+        pool.members[1].record_success(0.05)
+        assert pool.choose().name == "b"
+    
+    def test_consecutive_failures_eject_member(self):
+        """Test a failing member is left out until its ejection expires."""
+        pool = make_pool(1.0, 1.0)
+        pool.members[1].outstanding = 5
+        asyncio.run(fail_on(pool, 2))
+        
+        assert pool.members[0].ejected
+        assert pool.choose().name == "b"
+        assert pool.get_stats()["members"][0]["ejections"] == 1
+    
+    def test_returning_member_is_on_probation(self):
+        """Test a member back from ejection is ejected on its first failure."""
+        pool = make_pool(1.0, eject_failures=2)
+        asyncio.run(fail_on(pool, 2))
+        pool.members[0].ejected_until = 0.0
+        
+        asyncio.run(fail_on(pool, 1))
+        assert pool.members[0].ejections == 2
+    
+    def test_all_ejected_still_serves(self):
+        """Test the pool keeps using members when every one is ejected."""
+        pool = make_pool(1.0, eject_failures=1)
+        asyncio.run(fail_on(pool, 1))
+        assert pool.choose().name == "a"
+    
+    def test_other_errors_do_not_eject(self):
+        """Test non-transient errors such as bad requests do not count."""
+        pool = make_pool(1.0, eject_failures=1)
+        
+        async def run():
+            with pytest.raises(ValueError):
+                async with pool.acquire():
+                    raise ValueError("bad request")
+        
+        asyncio.run(run())
+        assert not pool.members[0].ejected
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI chat completions endpoint."""
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests += 1
+        if self.server.failing:
+            self.send_response(503)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"error": {"message": "unavailable", "type": "server_error"}}')
+            return
+        content = json.dumps(
+            {"sentiment": "positive", "confidence": 0.9, "explanation": "Stand-in"}
+        )
+        payload = {
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120}
+        }
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_servers():
+    """Start two healthy stand-in upstreams and one that always returns 503."""
+    servers = []
+    for failing in (False, False, True):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        server.failing = failing
+        server.requests = 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    yield servers
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class TestUpstreamPoolIntegration:
+    """Test cases for the service against local stand-in upstreams."""
+    
+    def test_traffic_avoids_failing_upstream(self, stand_in_servers, monkeypatch, tmp_path):
+        """Test calls are spread over healthy members and the failing one is ejected."""
+        monkeypatch.setattr("app.config.settings.label_log_path", str(tmp_path / "labels.jsonl"))
+        monkeypatch.setattr("app.config.settings.upstream_eject_failures", 1)
+        monkeypatch.setattr("app.config.settings.retry_base_delay_ms", 1)
+        monkeypatch.setattr("app.config.settings.upstreams", [
+            UpstreamConfig(
+                name=f"upstream-{index}",
+                base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+                api_key="sk-stand-in-key-0000000000",
+                # The failing member is preferred until it is ejected
+                weight=2.0 if server.failing else 1.0
+            )
+            for index, server in enumerate(stand_in_servers)
+        ])
+        service = SentimentAnalysisService()
+        
+        async def run():
+            first = await service.analyze_sentiment("Stand-in request", use_cache=False)
+            rest = await asyncio.gather(*(
+                service.analyze_sentiment(f"Stand-in request {index}", use_cache=False)
+                for index in range(10)
+            ))
+            return [first, *rest]
+        
+        results = asyncio.run(run())
+        
+        assert all(result.explanation == "Stand-in" for result in results)
+        pool = service.get_metrics()["upstream_pool"]
+        members = {member["name"]: member for member in pool["members"]}
+        assert members["upstream-2"]["ejected"]
+        assert stand_in_servers[2].requests == 1
+        assert stand_in_servers[0].requests > 0 and stand_in_servers[1].requests > 0
+        assert "api_key" not in members["upstream-0"]
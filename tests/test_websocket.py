@@ -0,0 +1,80 @@
+"""
+Tests for the WebSocket sentiment endpoint.
+"""
+import asyncio
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.sentiment_service import get_sentiment_service
+
+client = TestClient(app)
+
+
+class TestSentimentWebSocket:
+    """Test cases for persistent WebSocket analysis."""
+    
+    def test_replies_carry_message_ids(self, stub_chain):
+        """Test each message gets a reply tagged with its id."""
+        with client.websocket_connect("/ws/analyze-sentiment") as websocket:
+            for i in range(20):
+                websocket.send_json({"id": i, "text": f"Message {i}"})
+            replies = [websocket.receive_json() for _ in range(20)]
+        
+        assert sorted(r["id"] for r in replies) == list(range(20))
+        assert all(r["sentiment"] == "positive" for r in replies)
+    
+    def test_replies_are_text_frames(self, stub_chain):
+        """Test replies arrive as text, which browsers can JSON.parse directly."""
+        with client.websocket_connect("/ws/analyze-sentiment") as websocket:
+            websocket.send_json({"id": 1, "text": "Browser client"})
+            message = websocket.receive()
+        
+        assert message.get("bytes") is None
+        assert orjson.loads(message["text"])["id"] == 1
+    
+    def test_invalid_messages_get_errors(self, stub_chain):
+        """Test invalid messages are answered with an error, not a disconnect."""
+        with client.websocket_connect("/ws/analyze-sentiment") as websocket:
+            websocket.send_text("not json")
+            websocket.send_json({"id": "a", "text": "   "})
+            websocket.send_json({"id": "b", "text": "Fine"})
+            replies = [websocket.receive_json() for _ in range(3)]
+        
+        by_id = {r["id"]: r for r in replies}
+        assert "error" in by_id[None]
+        assert "error" in by_id["a"]
+        assert by_id["b"]["sentiment"] == "positive"
+    
+    def test_uses_response_cache(self, stub_chain):
+        """Test repeated texts are served from the cache."""
+        with client.websocket_connect("/ws/analyze-sentiment") as websocket:
+            websocket.send_json({"id": 1, "text": "Same text"})
+            websocket.receive_json()
+            websocket.send_json({"id": 2, "text": "same text"})
+            assert websocket.receive_json()["id"] == 2
+        assert stub_chain.calls == 1
+
+
+class TestRequestCoalescing:
+    """Test cases for coalescing concurrent misses."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_call(self, stub_chain):
+        """Test concurrent requests for one text make a single upstream call."""
+        service = get_sentiment_service()
+        original = stub_chain.ainvoke
+        
+        async def slow_ainvoke(inputs):
+            await asyncio.sleep(0.05)
+            return await original(inputs)
+        
+        stub_chain.ainvoke = slow_ainvoke
+        results = await asyncio.gather(
+            *(service.analyze_sentiment("Shared text") for _ in range(10))
+        )
+        assert stub_chain.calls == 1
+        assert service.coalesced_requests == 9
+        assert all(r is results[0] for r in results)